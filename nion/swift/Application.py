@@ -27,15 +27,19 @@ from nion.swift import SessionPanel
 from nion.swift import Task
 from nion.swift import Test
 from nion.swift import ToolbarPanel
+from nion.swift import Undo
 from nion.swift import Workspace
 from nion.swift.model import ApplicationData
 from nion.swift.model import Cache
 from nion.swift.model import ColorMaps
 from nion.swift.model import DocumentModel
 from nion.swift.model import FileStorageSystem
+from nion.swift.model import HDF5Handler
 from nion.swift.model import HardwareSource
 from nion.swift.model import PlugInManager
 from nion.swift.model import Profile
+from nion.swift.model import StallDetector
+from nion.swift.model import Tracing
 from nion.ui import Application as UIApplication
 from nion.utils import Event
 from nion.utils import Process
@@ -72,6 +76,8 @@ class Application(UIApplication.Application):
 
         self.__document_model = None
 
+        self.__stall_detector = None
+
         # a list of document controllers in the application.
         self.__document_controllers = []
         self.__menu_handlers = []
@@ -122,6 +128,18 @@ class Application(UIApplication.Application):
                 logging.info("NOT Loading color maps from " + str(color_maps_dir) + " (missing)")
 
     def deinitialize(self):
+        # stop watching the main thread and log the stall report for the session, if any.
+        if self.__stall_detector:
+            self.__stall_detector.close()
+            if self.__stall_detector.stalls:
+                logging.info(self.__stall_detector.report())
+            self.__stall_detector = None
+        # write the trace of this session, if tracing is enabled.
+        if Tracing.is_enabled():
+            trace_file_path = self.ui.get_configuration_location() / pathlib.Path("nionswift_trace.json")
+            Tracing.dump(trace_file_path)
+            logging.info("Trace written to " + str(trace_file_path))
+            Tracing.disable()
         # shut down hardware source manager, unload plug-ins, and really exit ui
         HardwareSource.HardwareSourceManager().close()
         PlugInManager.unload_plug_ins()
@@ -146,6 +164,9 @@ class Application(UIApplication.Application):
         # document model, it will be closed.
 
     def periodic(self) -> None:
+        # the main thread is responsive; called from the periodic processing of each window.
+        if self.__stall_detector:
+            self.__stall_detector.beat()
         if self.__event_loop:  # special for shutdown
             self.__event_loop.stop()
             self.__event_loop.run_forever()
@@ -158,6 +179,10 @@ class Application(UIApplication.Application):
     def document_model(self):
         return self.__document_model
 
+    @property
+    def stall_detector(self) -> typing.Optional[StallDetector.StallDetector]:
+        return self.__stall_detector
+
     # for testing
     def _set_document_model(self, document_model):
         self.__document_model = document_model
@@ -199,10 +224,72 @@ class Application(UIApplication.Application):
         # configure the document model object.
         DocumentModel.DocumentModel.computation_min_period = 0.1
         DocumentModel.DocumentModel.computation_min_factor = 1.0
+        DocumentModel.DocumentModel.data_item_updates_time_budget = 0.02
         document_model = DocumentModel.DocumentModel(profile=profile)
         document_model.create_default_data_groups()
         document_model.start_dispatcher()
 
+        # optionally limit the data kept loaded in memory; the budget is stored in megabytes.
+        memory_budget_mb = self.ui.get_persistent_string("memory_budget_mb", str())
+        if memory_budget_mb:
+            try:
+                document_model.memory_manager.budget = int(float(memory_budget_mb) * 1024 * 1024)
+            except ValueError:
+                logging.getLogger("loader").warning(f"Ignoring invalid memory budget {memory_budget_mb}")
+
+        # limit the memory held by undo history; the limit is stored in megabytes.
+        undo_memory_limit_mb = self.ui.get_persistent_string("undo_memory_limit_mb", "256")
+        try:
+            Undo.UndoStack.default_memory_limit = int(float(undo_memory_limit_mb) * 1024 * 1024) if undo_memory_limit_mb else None
+        except ValueError:
+            logging.getLogger("loader").warning(f"Ignoring invalid undo memory limit {undo_memory_limit_mb}")
+
+        # limit the rate at which computations are evaluated while dragging graphics; the period is stored in milliseconds.
+        drag_preview_period_ms = self.ui.get_persistent_string("drag_preview_period_ms", "")
+        if drag_preview_period_ms:
+            try:
+                DocumentModel.DocumentModel.drag_preview_period = float(drag_preview_period_ms) / 1000
+            except ValueError:
+                logging.getLogger("loader").warning(f"Ignoring invalid drag preview period {drag_preview_period_ms}")
+
+        # optionally compress new large format data with a lossless filter ("gzip" or "lzf").
+        large_format_compression = self.ui.get_persistent_string("large_format_compression", "")
+        if large_format_compression in ("gzip", "lzf"):
+            HDF5Handler.HDF5Handler.compression = large_format_compression
+            HDF5Handler.HDF5Handler.shuffle = True
+        elif large_format_compression:
+            logging.getLogger("loader").warning(f"Ignoring unknown large format compression {large_format_compression}")
+
+        # limit the number of large format files kept open; the least recently used files are closed first.
+        large_format_max_open_files = self.ui.get_persistent_string("large_format_max_open_files", "")
+        if large_format_max_open_files:
+            try:
+                HDF5Handler.HDF5Handler.handle_pool.max_open_files = max(1, int(large_format_max_open_files))
+            except ValueError:
+                logging.getLogger("loader").warning(f"Ignoring invalid large format max open files {large_format_max_open_files}")
+
+        # optionally keep the properties of large format items in a sidecar file so that the data file is only written
+        # when the data changes.
+        if self.ui.get_persistent_string("large_format_properties_sidecar", "false") == "true":
+            HDF5Handler.HDF5Handler.properties_in_sidecar = True
+
+        # watch for stalls of the main thread; the threshold is stored in milliseconds and empty disables the watch.
+        stall_threshold_ms = self.ui.get_persistent_string("stall_threshold_ms", "250")
+        if stall_threshold_ms and not self.__stall_detector:
+            try:
+                self.__stall_detector = StallDetector.StallDetector(threshold=float(stall_threshold_ms) / 1000)
+                self.__stall_detector.start()
+            except ValueError:
+                logging.getLogger("loader").warning(f"Ignoring invalid stall threshold {stall_threshold_ms}")
+
+        # optionally trace work across threads, keeping the most recent spans; tracing is off by default.
+        trace_capacity = self.ui.get_persistent_string("trace_capacity", "")
+        if trace_capacity:
+            try:
+                Tracing.enable(int(trace_capacity))
+            except ValueError:
+                logging.getLogger("loader").warning(f"Ignoring invalid trace capacity {trace_capacity}")
+
         # create the document controller
         document_controller = self.create_document_controller(document_model, "library")
         if profile_dir is None:
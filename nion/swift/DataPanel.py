@@ -1,9 +1,11 @@
 # standard libraries
 import asyncio
+import collections
 import copy
 import gettext
 import pkgutil
 import threading
+import typing
 
 # third party libraries
 # None
@@ -72,24 +74,56 @@ class DisplayItemAdapter:
             (property, read-only) status_str
             (property, read-only) project_str
             (method) drag_started(ui, x, y, modifiers), returns mime_data, thumbnail_data
+            (method) activate()
+            (method) deactivate()
             (event) needs_update_event
+
+        An adapter only listens to its display item and holds a thumbnail while it is active, i.e. while it is in the
+        visible window of a list or grid. Activations are counted; each activate must be balanced with deactivate.
     """
 
     def __init__(self, display_item: DisplayItem.DisplayItem, ui):
         self.__display_item = display_item
         self.ui = ui
         self.needs_update_event = Event.Event()
-
-        def display_item_changed():
-            self.needs_update_event.fire()
-
-        self.__display_changed_event_listener = display_item.item_changed_event.listen(display_item_changed) if display_item else None
-
+        self.__active_lock = threading.RLock()
+        self.__active_count = 0
+        self.__closed = False
+        self.__display_changed_event_listener = None
         self.__thumbnail_updated_event_listener = None
         self.__thumbnail_source = None
 
     def close(self):
-        # remove the listener.
+        with self.__active_lock:
+            self.__active_count = 0
+            self.__closed = True
+            self.__release()
+
+    def activate(self) -> None:
+        with self.__active_lock:
+            if self.__closed:
+                return
+            self.__active_count += 1
+            if self.__active_count == 1 and self.__display_item:
+
+                def display_item_changed():
+                    self.needs_update_event.fire()
+
+                self.__display_changed_event_listener = self.__display_item.item_changed_event.listen(display_item_changed)
+
+    def deactivate(self) -> None:
+        with self.__active_lock:
+            if self.__active_count > 0:
+                self.__active_count -= 1
+                if self.__active_count == 0:
+                    self.__release()
+
+    @property
+    def is_active(self) -> bool:
+        return self.__active_count > 0
+
+    def __release(self) -> None:
+        # remove the listeners and release the thumbnail.
         if self.__thumbnail_updated_event_listener:
             self.__thumbnail_updated_event_listener.close()
             self.__thumbnail_updated_event_listener = None
@@ -110,19 +144,21 @@ class DisplayItemAdapter:
 
     def __create_thumbnail_source(self):
         # grab the display specifier and if there is a display, handle thumbnail updating.
-        if self.__display_item and not self.__thumbnail_source:
-            self.__thumbnail_source = Thumbnails.ThumbnailManager().thumbnail_source_for_display_item(self.ui, self.__display_item)
+        with self.__active_lock:
+            if self.__display_item and not self.__thumbnail_source:
+                self.__thumbnail_source = Thumbnails.ThumbnailManager().thumbnail_source_for_display_item(self.ui, self.__display_item)
 
-            def thumbnail_updated():
-                self.needs_update_event.fire()
+                def thumbnail_updated():
+                    self.needs_update_event.fire()
 
-            self.__thumbnail_updated_event_listener = self.__thumbnail_source.thumbnail_updated_event.listen(thumbnail_updated)
+                self.__thumbnail_updated_event_listener = self.__thumbnail_source.thumbnail_updated_event.listen(thumbnail_updated)
+            return self.__thumbnail_source
 
     def __create_thumbnail(self, draw_rect):
         drawing_context = DrawingContext.DrawingContext()
         if self.__display_item:
-            self.__create_thumbnail_source()
-            thumbnail_data = self.__thumbnail_source.thumbnail_data
+            thumbnail_source = self.__create_thumbnail_source()
+            thumbnail_data = thumbnail_source.thumbnail_data
             if thumbnail_data is not None:
                 draw_rect = Geometry.fit_to_size(draw_rect, thumbnail_data.shape)
                 drawing_context.draw_image(thumbnail_data, draw_rect[0][1], draw_rect[0][0], draw_rect[1][1], draw_rect[1][0])
@@ -153,8 +189,8 @@ class DisplayItemAdapter:
             mime_data = self.ui.create_mime_data()
             if self.__display_item:
                 MimeTypes.mime_data_put_display_item(mime_data, self.__display_item)
-            self.__create_thumbnail_source()
-            thumbnail_data = self.__thumbnail_source.thumbnail_data if self.__thumbnail_source else None
+            thumbnail_source = self.__create_thumbnail_source()
+            thumbnail_data = thumbnail_source.thumbnail_data if thumbnail_source else None
             return mime_data, thumbnail_data
         return None, None
 
@@ -177,6 +213,91 @@ class DisplayItemAdapter:
         drawing_context.add(self.__create_thumbnail(rect.inset(6)))
 
 
+class DisplayItemAdapterWindow:
+    """Keep the display item adapters in the visible window of a list or grid active.
+
+    The canvas item reports each paint pass with begin_paint, item_painted for each painted adapter, and end_paint.
+    Painted adapters are activated and their needs update events are forwarded to needs_update_fn. After each pass,
+    the least recently painted adapters beyond the number painted plus margin_count are deactivated, so listeners and
+    thumbnails exist only for the visible adapters and a few recently visible ones.
+    """
+
+    margin_count = 32
+
+    def __init__(self, needs_update_fn: typing.Callable[[], None]):
+        self.__lock = threading.RLock()
+        self.__needs_update_fn = needs_update_fn
+        self.__active_adapters = collections.OrderedDict()  # adapter -> needs update listener; least recent first
+        self.__painted_count = 0
+
+    def close(self) -> None:
+        with self.__lock:
+            while self.__active_adapters:
+                self.__deactivate(*self.__active_adapters.popitem())
+
+    @property
+    def active_count(self) -> int:
+        return len(self.__active_adapters)
+
+    def begin_paint(self) -> None:
+        with self.__lock:
+            self.__painted_count = 0
+
+    def item_painted(self, display_item_adapter) -> None:
+        with self.__lock:
+            listener = self.__active_adapters.pop(display_item_adapter, None)
+            if not listener:
+                display_item_adapter.activate()
+                listener = display_item_adapter.needs_update_event.listen(self.__needs_update_fn)
+            self.__active_adapters[display_item_adapter] = listener
+            self.__painted_count += 1
+
+    def end_paint(self) -> None:
+        with self.__lock:
+            while len(self.__active_adapters) > self.__painted_count + self.margin_count:
+                self.__deactivate(*self.__active_adapters.popitem(last=False))
+
+    def remove_item(self, display_item_adapter) -> None:
+        with self.__lock:
+            listener = self.__active_adapters.pop(display_item_adapter, None)
+            if listener:
+                self.__deactivate(display_item_adapter, listener)
+
+    def __deactivate(self, display_item_adapter, listener) -> None:
+        listener.close()
+        display_item_adapter.deactivate()
+
+
+class DataListCanvasItem(ListCanvasItem.ListCanvasItem):
+    """A list canvas item reporting its paint passes to a display item adapter window."""
+
+    def __init__(self, delegate, selection, display_item_adapter_window: DisplayItemAdapterWindow):
+        super().__init__(delegate, selection)
+        self.__display_item_adapter_window = display_item_adapter_window
+
+    def _repaint_visible(self, drawing_context, visible_rect):
+        self.__display_item_adapter_window.begin_paint()
+        try:
+            super()._repaint_visible(drawing_context, visible_rect)
+        finally:
+            self.__display_item_adapter_window.end_paint()
+
+
+class DataGridCanvasItem(GridCanvasItem.GridCanvasItem):
+    """A grid canvas item reporting its paint passes to a display item adapter window."""
+
+    def __init__(self, delegate, selection, direction, wrap, display_item_adapter_window: DisplayItemAdapterWindow):
+        super().__init__(delegate, selection, direction, wrap)
+        self.__display_item_adapter_window = display_item_adapter_window
+
+    def _repaint_visible(self, drawing_context, visible_rect):
+        self.__display_item_adapter_window.begin_paint()
+        try:
+            super()._repaint_visible(drawing_context, visible_rect)
+        finally:
+            self.__display_item_adapter_window.end_paint()
+
+
 class DataListController:
     """Control a list of display items in a list widget.
 
@@ -213,11 +334,17 @@ class DataListController:
         self.on_key_pressed = None
 
         self.__display_item_adapters = list()
-        self.__display_item_adapter_needs_update_listeners = list()
+        self.__display_item_adapter_window = DisplayItemAdapterWindow(self.__display_item_adapter_needs_update)
+
+        # layout is refreshed once at the end of a batch of changes rather than for each inserted or removed item.
+        self.__change_level = 0
+        self.__needs_refresh_layout = False
 
         self.__display_item_adapters_model = display_item_adapters_model
         self.__display_item_adapter_inserted_event_listener = self.__display_item_adapters_model.item_inserted_event.listen(self.__display_item_adapter_inserted)
         self.__display_item_adapter_removed_event_listener = self.__display_item_adapters_model.item_removed_event.listen(self.__display_item_adapter_removed)
+        self.__begin_changes_event_listener = self.__display_item_adapters_model.begin_changes_event.listen(self.__begin_changes)
+        self.__end_changes_event_listener = self.__display_item_adapters_model.end_changes_event.listen(self.__end_changes)
 
         class ListCanvasItemDelegate:
             def __init__(self, data_list_controller):
@@ -232,7 +359,7 @@ class DataListController:
                 return self.__data_list_controller.display_item_adapters
 
             def paint_item(self, drawing_context, display_item_adapter, rect, is_selected):
-                display_item_adapter.draw_list_item(drawing_context, rect)
+                self.__data_list_controller._paint_item(drawing_context, display_item_adapter, rect)
 
             def context_menu_event(self, index, x, y, gx, gy):
                 return self.__data_list_controller.context_menu_event(index, x, y, gx, gy)
@@ -246,7 +373,7 @@ class DataListController:
             def drag_started(self, index, x, y, modifiers):
                 self.__data_list_controller.drag_started(index, x, y, modifiers)
 
-        self.__list_canvas_item = ListCanvasItem.ListCanvasItem(ListCanvasItemDelegate(self), self.__selection)
+        self.__list_canvas_item = DataListCanvasItem(ListCanvasItemDelegate(self), self.__selection, self.__display_item_adapter_window)
         def focus_changed(focused):
             self.__list_canvas_item.update()
             if self.on_focus_changed:
@@ -287,13 +414,16 @@ class DataListController:
         self.__pending_tasks = None
         self.__selection_changed_listener.close()
         self.__selection_changed_listener = None
-        for display_item_adapter_needs_update_listener in self.__display_item_adapter_needs_update_listeners:
-            display_item_adapter_needs_update_listener.close()
-        self.__display_item_adapter_needs_update_listeners = None
+        self.__display_item_adapter_window.close()
+        self.__display_item_adapter_window = None
         self.__display_item_adapter_inserted_event_listener.close()
         self.__display_item_adapter_inserted_event_listener = None
         self.__display_item_adapter_removed_event_listener.close()
         self.__display_item_adapter_removed_event_listener = None
+        self.__begin_changes_event_listener.close()
+        self.__begin_changes_event_listener = None
+        self.__end_changes_event_listener.close()
+        self.__end_changes_event_listener = None
         self.__display_item_adapters = None
         self.on_display_item_adapter_selection_changed = None
         self.on_context_menu_event = None
@@ -359,21 +489,42 @@ class DataListController:
     def __display_item_adapter_inserted(self, key, display_item_adapter, before_index):
         if key == "display_item_adapters":
             self.__display_item_adapters.insert(before_index, display_item_adapter)
-            self.__display_item_adapter_needs_update_listeners.insert(before_index, display_item_adapter.needs_update_event.listen(self.__display_item_adapter_needs_update))
             # tell the icon view to update.
-            self.__list_canvas_item.refresh_layout()
-            self.__list_canvas_item.update()
+            self.__refresh_layout()
 
     # call this method to remove a display item (by index)
     # not thread safe
     def __display_item_adapter_removed(self, key, display_item_adapter, index):
         if key == "display_item_adapters":
-            self.__display_item_adapter_needs_update_listeners[index].close()
-            del self.__display_item_adapter_needs_update_listeners[index]
+            self.__display_item_adapter_window.remove_item(display_item_adapter)
             del self.__display_item_adapters[index]
+            self.__refresh_layout()
+
+    def __begin_changes(self, key):
+        if key == "display_item_adapters":
+            self.__change_level += 1
+
+    def __end_changes(self, key):
+        if key == "display_item_adapters" and self.__change_level > 0:
+            self.__change_level -= 1
+            if self.__change_level == 0 and self.__needs_refresh_layout:
+                self.__refresh_layout()
+
+    def __refresh_layout(self):
+        if self.__change_level > 0:
+            self.__needs_refresh_layout = True
+        else:
+            self.__needs_refresh_layout = False
             self.__list_canvas_item.refresh_layout()
             self.__list_canvas_item.update()
 
+    def _paint_item(self, drawing_context, display_item_adapter, rect):
+        # called from the canvas item for each display item adapter painted; may be called from a thread.
+        display_item_adapter_window = self.__display_item_adapter_window
+        if display_item_adapter_window:
+            display_item_adapter_window.item_painted(display_item_adapter)
+        display_item_adapter.draw_list_item(drawing_context, rect)
+
 
 class DataGridController:
     """Control a grid of display items in a grid widget.
@@ -419,11 +570,17 @@ class DataGridController:
         self.on_drag_started = None
 
         self.__display_item_adapters = list()
-        self.__display_item_adapter_needs_update_listeners = list()
+        self.__display_item_adapter_window = DisplayItemAdapterWindow(self.__display_item_adapter_needs_update)
+
+        # layout is refreshed once at the end of a batch of changes rather than for each inserted or removed item.
+        self.__change_level = 0
+        self.__needs_refresh_layout = False
 
         self.__display_item_adapters_model = display_item_adapters_model
         self.__display_item_adapter_inserted_event_listener = self.__display_item_adapters_model.item_inserted_event.listen(self.__display_item_adapter_inserted)
         self.__display_item_adapter_removed_event_listener = self.__display_item_adapters_model.item_removed_event.listen(self.__display_item_adapter_removed)
+        self.__begin_changes_event_listener = self.__display_item_adapters_model.begin_changes_event.listen(self.__begin_changes)
+        self.__end_changes_event_listener = self.__display_item_adapters_model.end_changes_event.listen(self.__end_changes)
 
         class GridCanvasItemDelegate:
             def __init__(self, data_grid_controller):
@@ -438,7 +595,7 @@ class DataGridController:
                 return self.__data_grid_controller.display_item_adapters
 
             def paint_item(self, drawing_context, display_item_adapter, rect, is_selected):
-                display_item_adapter.draw_grid_item(drawing_context, rect)
+                self.__data_grid_controller._paint_item(drawing_context, display_item_adapter, rect)
 
             def on_context_menu_event(self, index, x, y, gx, gy):
                 return self.__data_grid_controller.context_menu_event(index, x, y, gx, gy)
@@ -455,7 +612,7 @@ class DataGridController:
             def on_drag_started(self, index, x, y, modifiers):
                 self.__data_grid_controller.drag_started(index, x, y, modifiers)
 
-        self.icon_view_canvas_item = GridCanvasItem.GridCanvasItem(GridCanvasItemDelegate(self), self.__selection, direction, wrap)
+        self.icon_view_canvas_item = DataGridCanvasItem(GridCanvasItemDelegate(self), self.__selection, direction, wrap, self.__display_item_adapter_window)
         def icon_view_canvas_item_focus_changed(focused):
             self.icon_view_canvas_item.update()
             if self.on_focus_changed:
@@ -516,9 +673,12 @@ class DataGridController:
         self.__display_item_adapter_inserted_event_listener = None
         self.__display_item_adapter_removed_event_listener.close()
         self.__display_item_adapter_removed_event_listener = None
-        for display_item_adapter_needs_update_listener in self.__display_item_adapter_needs_update_listeners:
-            display_item_adapter_needs_update_listener.close()
-        self.__display_item_adapter_needs_update_listeners = None
+        self.__begin_changes_event_listener.close()
+        self.__begin_changes_event_listener = None
+        self.__end_changes_event_listener.close()
+        self.__end_changes_event_listener = None
+        self.__display_item_adapter_window.close()
+        self.__display_item_adapter_window = None
         self.__display_item_adapters = None
         self.on_display_item_adapter_selection_changed = None
         self.on_context_menu_event = None
@@ -592,21 +752,42 @@ class DataGridController:
     def __display_item_adapter_inserted(self, key, display_item_adapter, before_index):
         if key == "display_item_adapters":
             self.__display_item_adapters.insert(before_index, display_item_adapter)
-            self.__display_item_adapter_needs_update_listeners.insert(before_index, display_item_adapter.needs_update_event.listen(self.__display_item_adapter_needs_update))
             # tell the icon view to update.
-            self.icon_view_canvas_item.refresh_layout()
-            self.icon_view_canvas_item.update()
+            self.__refresh_layout()
 
     # call this method to remove a display item (by index)
     # not thread safe
     def __display_item_adapter_removed(self, key, display_item_adapter, index):
         if key == "display_item_adapters":
-            self.__display_item_adapter_needs_update_listeners[index].close()
-            del self.__display_item_adapter_needs_update_listeners[index]
+            self.__display_item_adapter_window.remove_item(display_item_adapter)
             del self.__display_item_adapters[index]
+            self.__refresh_layout()
+
+    def __begin_changes(self, key):
+        if key == "display_item_adapters":
+            self.__change_level += 1
+
+    def __end_changes(self, key):
+        if key == "display_item_adapters" and self.__change_level > 0:
+            self.__change_level -= 1
+            if self.__change_level == 0 and self.__needs_refresh_layout:
+                self.__refresh_layout()
+
+    def __refresh_layout(self):
+        if self.__change_level > 0:
+            self.__needs_refresh_layout = True
+        else:
+            self.__needs_refresh_layout = False
             self.icon_view_canvas_item.refresh_layout()
             self.icon_view_canvas_item.update()
 
+    def _paint_item(self, drawing_context, display_item_adapter, rect):
+        # called from the canvas item for each display item adapter painted; may be called from a thread.
+        display_item_adapter_window = self.__display_item_adapter_window
+        if display_item_adapter_window:
+            display_item_adapter_window.item_painted(display_item_adapter)
+        display_item_adapter.draw_grid_item(drawing_context, rect)
+
 
 class DataListWidget(Widgets.CompositeWidgetBase):
 
@@ -493,6 +493,7 @@ class DisplayTracker:
         self.__draw_background = draw_background
 
         self.__closing_lock = threading.RLock()
+        self.__closed = False
 
         self.__display_canvas_item = None
 
@@ -526,11 +527,16 @@ class DisplayTracker:
             # this message comes from the display when the graphic selection changes
             self.__display_canvas_item.update_graphics_coordinate_system(display_item.graphics, graphic_selection, DisplayItem.DisplayCalibrationInfo(display_item))
 
-        def display_values_changed():
-            # this notification is for the rgba values only
+        # generation of the most recently requested and most recently delivered display values
+        display_values_generation_ref = [0, 0]
+
+        def display_values_prepared(display_values_list, generation):
+            # called when the display values have been prepared, possibly on a worker thread.
             # thread safe
             with self.__closing_lock:
-                display_values_list = [display_data_channel.get_calculated_display_values() for display_data_channel in display_item.display_data_channels]
+                if self.__closed or generation < display_values_generation_ref[1]:
+                    return  # newer display values have already been delivered
+                display_values_generation_ref[1] = generation
                 self.__display_canvas_item.update_display_values(display_values_list)
             display_changed()
             # if the display data channel shapes change, update the graphics, but use the display channel to determine the shape; otherwise
@@ -542,6 +548,21 @@ class DisplayTracker:
                 self.__display_canvas_item.update_graphics_coordinate_system(display_item.graphics, display_item.graphic_selection, DisplayItem.DisplayCalibrationInfo(display_item, display_data_shape))
                 display_data_channel_shapes_ref[0] = new_display_data_channel_shapes
 
+        def display_values_changed():
+            # this notification is for the rgba values only. the display values are prepared (calculated) by the
+            # delegate, typically on a worker thread, and passed to the canvas item once prepared so that painting
+            # never waits for the calculation and always uses the most recent prepared values.
+            # thread safe
+            with self.__closing_lock:
+                display_values_list = [display_data_channel.get_calculated_display_values() for display_data_channel in display_item.display_data_channels]
+                display_values_generation_ref[0] += 1
+                generation = display_values_generation_ref[0]
+
+            def is_stale() -> bool:
+                return generation < display_values_generation_ref[0]
+
+            delegate.prepare_display_values(display_values_list, functools.partial(display_values_prepared, display_values_list, generation), is_stale)
+
         def display_changed():
             # called when anything in the data item changes, including things like graphics or the data itself.
             # this notification does not cover the rgba data, which is handled in the function below.
@@ -600,6 +621,7 @@ class DisplayTracker:
 
     def close(self):
         with self.__closing_lock:  # ensures that display pipeline finishes
+            self.__closed = True
             self.__display_changed_event_listener.close()
             self.__display_changed_event_listener = None
             self.__display_property_changed_listener.close()
@@ -638,7 +660,7 @@ class DisplayTracker:
         self.__display_canvas_item = value
 
 
-class InsertGraphicsCommand(Undo.UndoableCommand):
+class InsertGraphicsCommand(Undo.UndeleteLogCommand):
 
     def __init__(self, document_controller, display_item: DisplayItem.DisplayItem, graphics: typing.Sequence[Graphics.Graphic], *, existing_graphics: typing.Sequence[Graphics.Graphic] = None):
         super().__init__(_("Insert Graphics"))
@@ -649,7 +671,6 @@ class InsertGraphicsCommand(Undo.UndoableCommand):
         self.__new_workspace_layout = None
         self.__graphics_properties = None
         self.__graphic_proxies = [graphic.create_proxy() for graphic in existing_graphics or list()]
-        self.__undelete_logs = list()
         self.initialize()
 
     def close(self):
@@ -657,9 +678,6 @@ class InsertGraphicsCommand(Undo.UndoableCommand):
         self.__document_controller = None
         self.__old_workspace_layout = None
         self.__new_workspace_layout = None
-        for undelete_log in self.__undelete_logs:
-            undelete_log.close()
-        self.__undelete_logs = None
         for graphic_proxy in self.__graphic_proxies:
             graphic_proxy.close()
         self.__graphic_proxies = None
@@ -685,10 +703,7 @@ class InsertGraphicsCommand(Undo.UndoableCommand):
         display_item.modified_state, self.__document_controller.workspace_controller.document_model.modified_state = modified_state
 
     def _redo(self):
-        for undelete_log in reversed(self.__undelete_logs):
-            self.__document_controller.document_model.undelete_all(undelete_log)
-            undelete_log.close()
-        self.__undelete_logs.clear()
+        self._undelete_all(self.__document_controller.document_model)
         self.__document_controller.workspace_controller.reconstruct(self.__new_workspace_layout)
 
     def _undo(self):
@@ -696,7 +711,7 @@ class InsertGraphicsCommand(Undo.UndoableCommand):
         graphics = [graphic_proxy.item for graphic_proxy in self.__graphic_proxies]
         self.__new_workspace_layout = self.__document_controller.workspace_controller.deconstruct()
         for graphic in graphics:
-            self.__undelete_logs.append(display_item.remove_graphic(graphic, safe=True))
+            self._undelete_logs.append(display_item.remove_graphic(graphic, safe=True))
         self.__document_controller.workspace_controller.reconstruct(self.__old_workspace_layout)
 
 
@@ -791,7 +806,7 @@ class ChangeDisplayDataChannelCommand(Undo.UndoableCommand):
         return isinstance(command, ChangeDisplayDataChannelCommand) and self.command_id and self.command_id == command.command_id and self.__display_data_channel_proxy.item == command.__display_data_channel_proxy.item
 
 
-class MoveDisplayLayerCommand(Undo.UndoableCommand):
+class MoveDisplayLayerCommand(Undo.UndeleteLogCommand):
 
     def __init__(self, document_model,
                  old_display_item: DisplayItem.DisplayItem, old_display_layer_index: int,
@@ -807,16 +822,12 @@ class MoveDisplayLayerCommand(Undo.UndoableCommand):
         self.__new_display_item_proxy = new_display_item.create_proxy()
         self.__new_display_layer_index = new_display_layer_index
         self.__new_display_data_channel_index = None
-        self.__undelete_logs = list()
         self.initialize()
 
     def close(self):
         self.__document_model = None
         self.__display_data_channel_uuid = None
         self.__properties = None
-        for undelete_log in self.__undelete_logs:
-            undelete_log.close()
-        self.__undelete_logs = None
         self.__old_display_item_proxy.close()
         self.__old_display_item_proxy = None
         self.__new_display_item_proxy.close()
@@ -834,7 +845,7 @@ class MoveDisplayLayerCommand(Undo.UndoableCommand):
         # remove display layer and then display data channel from old display item
         self.__old_display_layers = copy.deepcopy(old_display_item.display_layers)
         old_display_item.remove_display_layer(self.__old_display_layer_index)
-        self.__undelete_logs.append(old_display_item.remove_display_data_channel(old_display_item.display_data_channels[self.__old_display_data_channel_index]))
+        self._undelete_logs.append(old_display_item.remove_display_data_channel(old_display_item.display_data_channels[self.__old_display_data_channel_index]))
 
     def _get_modified_state(self):
         old_display_item = self.__old_display_item_proxy.item
@@ -854,10 +865,7 @@ class MoveDisplayLayerCommand(Undo.UndoableCommand):
         old_display_item = self.__old_display_item_proxy.item
         new_display_item = self.__new_display_item_proxy.item
         # restore original display item display data channel, display layer
-        for undelete_log in reversed(self.__undelete_logs):
-            self.__document_model.undelete_all(undelete_log)
-            undelete_log.close()
-        self.__undelete_logs.clear()
+        self._undelete_all(self.__document_model)
         old_display_item.display_layers = self.__old_display_layers
         # remove new display item display layer, display data channel, and restore legend state
         new_display_item.remove_display_layer(self.__new_display_layer_index)
@@ -1766,7 +1774,7 @@ class DisplayPanel(CanvasItem.CanvasItemComposition):
         return self.show_context_menu(menu, gx, gy)
 
     def begin_mouse_tracking(self):
-        self.__mouse_tracking_transaction = self.__document_controller.document_model.begin_display_item_transaction(self.__display_item)
+        self.__mouse_tracking_transaction = self.__document_controller.document_model.begin_drag_session(self.__display_item)
 
     def create_mime_data(self) -> UserInterface.MimeData:
         return self.ui.create_mime_data()
@@ -1856,6 +1864,9 @@ class DisplayPanel(CanvasItem.CanvasItemComposition):
     def push_undo_command(self, command: Undo.UndoableCommand) -> None:
         self.__document_controller.push_undo_command(command)
 
+    def prepare_display_values(self, display_values_list: typing.Sequence[DisplayItem.DisplayValues], prepared_fn: typing.Callable[[], None], is_stale_fn: typing.Callable[[], bool]) -> None:
+        self.__document_controller.document_model.prepare_display_values(display_values_list, prepared_fn, is_stale_fn)
+
     def create_rectangle(self, pos):
         bounds = tuple(pos), (0, 0)
         self.__display_item.graphic_selection.clear()
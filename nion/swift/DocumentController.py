@@ -1,9 +1,10 @@
 # standard libraries
 import collections
-import copy
+import contextlib
 import datetime
 import functools
 import gettext
+import heapq
 import itertools
 import logging
 import math
@@ -41,6 +42,7 @@ from nion.swift.model import ImportExportManager
 from nion.swift.model import Processing
 from nion.swift.model import Profile
 from nion.swift.model import Project
+from nion.swift.model import StallDetector
 from nion.swift.model import Symbolic
 from nion.ui import CanvasItem
 from nion.ui import Dialog
@@ -80,6 +82,8 @@ class DocumentController(Window.Window):
 
         self.__dialogs = list()
 
+        self.__file_task_cancel_events = set()
+
         self.__last_activity = None
 
         # document_model may be shared between several DocumentControllers, so use reference counting
@@ -91,7 +95,10 @@ class DocumentController(Window.Window):
         self.replaced_display_panel_content = None  # used to facilitate display panel functionality to exchange displays
         self.__weak_selected_display_panel = None
         self.__tool_mode = "pointer"
-        self.__weak_periodic_listeners = []
+        # periodic listeners are kept in a heap of (next scheduled time, sequence, weak listener) entries.
+        self.__periodic_listener_heap = []
+        self.__periodic_listener_sequence = itertools.count()
+        self.__periodic_listener_stats = collections.OrderedDict()  # label -> [call count, cumulative time]
         self.__weak_periodic_listeners_mutex = threading.RLock()
 
         self.selection = Selection.IndexedSelection()
@@ -129,6 +136,8 @@ class DocumentController(Window.Window):
         if workspace_id:  # used only when testing reference counting
             self.__workspace_controller = Workspace.Workspace(self, workspace_id)
             self.__workspace_controller.restore(self.document_model.workspace_uuid)
+        # the panels (inspector, data panel, etc.) refresh at low priority so they are deferred when time is short.
+        self.__workspace_periodic_listener = self.add_periodic(0.0, self.__workspace_periodic, priority=-1)
 
     def close(self):
         """Close the document controller.
@@ -150,6 +159,7 @@ class DocumentController(Window.Window):
         """
         assert self.__closed == False
         self.__closed = True
+        self.cancel_file_tasks()
         self.finish_periodic()  # required to finish periodic operations during tests
         # dialogs
         for weak_dialog in self.__dialogs:
@@ -176,6 +186,8 @@ class DocumentController(Window.Window):
         self._processing_redimension_menu = None
         self._display_type_menu = None
 
+        self.__workspace_periodic_listener.close()
+        self.__workspace_periodic_listener = None
         if self.__workspace_controller:
             self.__workspace_controller.close()
             self.__workspace_controller = None
@@ -195,6 +207,11 @@ class DocumentController(Window.Window):
         self.did_close_event = None
         super().close()
 
+    def cancel_file_tasks(self) -> None:
+        """Stop the imports and exports in progress. Files already read by an import are still inserted."""
+        for cancel_event in list(self.__file_task_cancel_events):
+            cancel_event.set()
+
     def _register_ui_activity(self):
         self.__last_activity = time.time()
 
@@ -571,12 +588,25 @@ class DocumentController(Window.Window):
         """ Return the dock widget by id. """
         return self.workspace_controller._find_dock_widget(dock_widget_id)
 
-    def add_periodic(self, interval: float, listener_fn):
-        """Add a listener function and return listener token. Token can be closed or deleted to unlisten."""
+    # the time budget (seconds) for periodic listeners in each call to periodic. once used, listeners with negative
+    # priority are deferred to the next call to periodic, but for no longer than the maximum delay (seconds) after they
+    # came due, so that they run even when higher priority listeners use up the budget in every call.
+    periodic_time_budget = 0.02
+    periodic_max_delay = 0.2
+
+    def add_periodic(self, interval: float, listener_fn, *, priority: int = 0):
+        """Add a listener function and return listener token. Token can be closed or deleted to unlisten.
+
+        Listeners which are due are called in order of decreasing priority. Listeners with negative priority are low
+        priority and may be deferred when the periodic time budget is used up, up to the periodic maximum delay.
+        """
         class PeriodicListener:
             def __init__(self, interval: float, listener_fn):
                 self.interval = interval
+                self.priority = priority
+                self.closed = False
                 self.__listener_fn = listener_fn
+                self.label = StallDetector.describe(listener_fn) if callable(listener_fn) else str()
                 # the call function is very performance critical; make it fast by using a property
                 # instead of a logic statement each time.
                 if callable(listener_fn):
@@ -588,40 +618,106 @@ class DocumentController(Window.Window):
                 self.next_scheduled_time = time.time() + interval
             def close(self):
                 self.__listener_fn = None
+                self.closed = True
                 def void(*args, **kwargs):
                     pass
                 self.call = void
         listener = PeriodicListener(interval, listener_fn)
-        def remove_listener(weak_listener):
-            with self.__weak_periodic_listeners_mutex:
-                self.__weak_periodic_listeners.remove(weak_listener)
-        weak_listener = weakref.ref(listener, remove_listener)
-        with self.__weak_periodic_listeners_mutex:
-            self.__weak_periodic_listeners.append(weak_listener)
+        # closed or deleted listeners are dropped from the heap the next time they come due.
+        self.__schedule_periodic_listener(listener.next_scheduled_time, weakref.ref(listener))
         return listener
 
-    def periodic(self):
+    def __schedule_periodic_listener(self, next_scheduled_time: float, weak_listener) -> None:
+        with self.__weak_periodic_listeners_mutex:
+            heapq.heappush(self.__periodic_listener_heap, (next_scheduled_time, next(self.__periodic_listener_sequence), weak_listener))
+
+    def __pop_due_periodic_listeners(self, current_time: float) -> typing.List:
+        # return the due listeners sorted by decreasing priority (and scheduled order within a priority).
+        due_listeners = list()
+        with self.__weak_periodic_listeners_mutex:
+            heap = self.__periodic_listener_heap
+            while heap and heap[0][0] <= current_time:
+                next_scheduled_time, sequence, weak_listener = heapq.heappop(heap)
+                periodic_listener = weak_listener()
+                if periodic_listener and not periodic_listener.closed:
+                    due_listeners.append((-periodic_listener.priority, next_scheduled_time, sequence, periodic_listener, weak_listener))
+        due_listeners.sort(key=operator.itemgetter(0, 1, 2))
+        return [(periodic_listener, weak_listener) for _, _, _, periodic_listener, weak_listener in due_listeners]
+
+    @property
+    def periodic_listener_count(self) -> int:
         with self.__weak_periodic_listeners_mutex:
-            periodic_listeners = copy.copy(self.__weak_periodic_listeners)
-        current_time = time.time()
-        for weak_periodic_listener in periodic_listeners:
-            periodic_listener = weak_periodic_listener()
-            if periodic_listener and current_time >= periodic_listener.next_scheduled_time:
+            return sum(1 for entry in self.__periodic_listener_heap if entry[2]() is not None)
+
+    def get_periodic_listener_times(self) -> typing.List[typing.Tuple[str, int, float]]:
+        """Return (label, call count, cumulative time) for each periodic listener called, most time consuming first."""
+        with self.__weak_periodic_listeners_mutex:
+            stats = [(label, call_count, cumulative_time) for label, (call_count, cumulative_time) in self.__periodic_listener_stats.items()]
+        return sorted(stats, key=lambda stat: -stat[2])
+
+    @property
+    def stall_detector(self) -> typing.Optional[StallDetector.StallDetector]:
+        return getattr(self.app, "stall_detector", None)
+
+    def _activity(self, label: str) -> typing.ContextManager:
+        """Return a context manager labeling the work done on the main thread, to annotate stall reports."""
+        stall_detector = self.stall_detector
+        return stall_detector.activity(label) if stall_detector else contextlib.nullcontext()
+
+    def __wrap_task(self, task):
+        # label tasks run from the periodic function so that they are identified in stall reports.
+        if not self.stall_detector:
+            return task
+        label = "task: " + StallDetector.describe(task)
+
+        def labeled_task():
+            with self._activity(label):
+                task()
+
+        return labeled_task
+
+    def add_task(self, key, task):
+        super().add_task(key, self.__wrap_task(task))
+
+    def queue_task(self, task):
+        super().queue_task(self.__wrap_task(task))
+
+    def periodic(self):
+        with self._activity("periodic"):
+            current_time = time.time()
+            start_time = time.perf_counter()
+            for periodic_listener, weak_periodic_listener in self.__pop_due_periodic_listeners(current_time):
+                is_over_budget = time.perf_counter() - start_time > self.periodic_time_budget
+                if periodic_listener.priority < 0 and is_over_budget and current_time - periodic_listener.next_scheduled_time < self.periodic_max_delay:
+                    # defer low priority listeners to the next call; they remain due.
+                    self.__schedule_periodic_listener(periodic_listener.next_scheduled_time, weak_periodic_listener)
+                    continue
+                call_start_time = time.perf_counter()
                 try:
-                    periodic_listener.call()
+                    with self._activity("periodic listener: " + periodic_listener.label):
+                        periodic_listener.call()
                 except Exception as e:
                     import traceback
                     logging.debug("Event Error: %s", e)
                     traceback.print_exc()
                     traceback.print_stack()
+                call_time = time.perf_counter() - call_start_time
+                with self.__weak_periodic_listeners_mutex:
+                    stats = self.__periodic_listener_stats.setdefault(periodic_listener.label, [0, 0.0])
+                    stats[0] += 1
+                    stats[1] += call_time
                 periodic_listener.next_scheduled_time = current_time + periodic_listener.interval
-        super().periodic()
-        self.document_model.perform_data_item_updates()
-        if self.workspace_controller:
-            self.workspace_controller.periodic()
+                self.__schedule_periodic_listener(periodic_listener.next_scheduled_time, weak_periodic_listener)
+            super().periodic()
+            with self._activity("data item updates"):
+                self.document_model.perform_data_item_updates()
         if self.__last_activity is not None and time.time() - self.__last_activity > 60 * 60:
             pass  # self.app.choose_library()
 
+    def __workspace_periodic(self) -> None:
+        if self.workspace_controller:
+            self.workspace_controller.periodic()
+
     @property
     def _undo_stack(self):
         return self.__undo_stack
@@ -1009,7 +1105,40 @@ class DocumentController(Window.Window):
 
     def __handle_upgrade_project(self) -> None:
         for project in self.selected_projects:
-            self.document_model.profile.upgrade_project(project)
+            self.upgrade_project(project)
+
+    def upgrade_project(self, project: Project.Project, *, threaded: bool = True) -> None:
+        """Upgrade the legacy project as a task listing the items to be copied and showing the progress.
+
+        If threaded, the items are copied on a background thread and the new project replaces the legacy project on
+        the main thread when done.
+        """
+        profile = self.document_model.profile
+        if not project.needs_upgrade:
+            return
+
+        def upgrade_project_on_thread() -> None:
+            with self.create_task_context_manager(_("Upgrade Project"), "table", logging=threaded) as task:
+                headers = project.read_migration_headers()
+                task_data = {"headers": [_("Title"), _("Created"), _("Shape")],
+                             "data": [[header.get("title") or str(), str(header.get("created") or str()), str(header.get("data_shape") or str())] for header in headers]}
+                task.update_progress(_("Upgrading {} items.").format(len(headers)), (0, len(headers)), task_data)
+
+                def progress(index: int, count: int) -> None:
+                    task.update_progress(_("Upgrading item {} of {}.").format(index, count), (index, count), task_data)
+
+                target_project_path = profile.migrate_project(project, progress)
+                task.update_progress(_("Finishing upgrade."), (len(headers), len(headers)), task_data)
+            if target_project_path:
+                if threaded:
+                    self.queue_task(functools.partial(profile.replace_upgraded_project, project, target_project_path))
+                else:
+                    profile.replace_upgraded_project(project, target_project_path)
+
+        if threaded:
+            threading.Thread(target=upgrade_project_on_thread).start()
+        else:
+            upgrade_project_on_thread()
 
     def __handle_remove_project(self) -> None:
         for project in self.selected_projects:
@@ -1108,11 +1237,45 @@ class DocumentController(Window.Window):
         if selected_writer and path:
             self.ui.set_persistent_string("export_directory", selected_directory)
             self.ui.set_persistent_string("export_filter", selected_filter)
-            ImportExportManager.ImportExportManager().write_display_item_with_writer(self.ui, selected_writer, display_item, path)
+            self.write_display_items(selected_writer, [(display_item, path)])
+
+    def write_display_items(self, writer, display_items_and_paths: typing.Sequence[typing.Tuple[DisplayItem.DisplayItem, str]], *, threaded: bool = True) -> None:
+        """Write each display item to its path using writer, as a task which is cancelled by cancel_file_tasks.
+
+        If threaded, the task runs on a background thread; the writers stream the data in chunks where the file
+        format allows, so only one item (and for large format items only one chunk) is in memory at a time.
+        """
+        cancel_event = threading.Event()
+        self.__file_task_cancel_events.add(cancel_event)
+
+        def write_display_items_on_thread() -> None:
+            try:
+                with self.create_task_context_manager(_("Export Data Items"), "table", logging=threaded) as task:
+                    count = len(display_items_and_paths)
+                    task.update_progress(_("Starting export."), (0, count))
+                    task_data = {"headers": ["Number", "File"]}
+                    for index, (display_item, path) in enumerate(display_items_and_paths):
+                        if cancel_event.is_set():
+                            break
+                        try:
+                            ImportExportManager.ImportExportManager().write_display_item_with_writer(self.ui, writer, display_item, path)
+                        except Exception as e:
+                            logging.debug("Could not export image %s / %s", str(display_item), str(e))
+                            traceback.print_exc()
+                        task_data.setdefault("data", list()).append([str(index + 1), os.path.basename(path)])
+                        task.update_progress(_("Exporting item {}.").format(index + 1), (index + 1, count), task_data)
+                    task.update_progress(_("Finishing export."), (count, count))
+            finally:
+                self.__file_task_cancel_events.discard(cancel_event)
+
+        if threaded:
+            threading.Thread(target=write_display_items_on_thread).start()
+        else:
+            write_display_items_on_thread()
 
     def export_files(self, display_items: typing.Sequence[DisplayItem.DisplayItem]) -> None:
         if len(display_items) > 1:
-            export_dialog = ExportDialog.ExportDialog(self.ui)
+            export_dialog = ExportDialog.ExportDialog(self.ui, self)
             export_dialog.on_accept = functools.partial(export_dialog.do_export, display_items)
             export_dialog.show()
             self.__dialogs.append(weakref.ref(export_dialog))
@@ -1303,7 +1466,7 @@ class DocumentController(Window.Window):
     def create_insert_data_group_display_item_command(self, data_group: DataGroup.DataGroup, before_index: int, display_item: DisplayItem.DisplayItem) -> InsertDataGroupDisplayItemCommand:
         return DocumentController.InsertDataGroupDisplayItemCommand(self.document_model, data_group, before_index, display_item)
 
-    class InsertDataGroupDataItemsCommand(Undo.UndoableCommand):
+    class InsertDataGroupDataItemsCommand(Undo.UndeleteLogCommand):
         def __init__(self, document_controller: "DocumentController", data_group: DataGroup.DataGroup, data_items: typing.Sequence[DataItem.DataItem], index: int):
             super().__init__("Insert Data Items")
             self.__document_controller = document_controller
@@ -1313,7 +1476,6 @@ class DocumentController(Window.Window):
             self.__data_items = data_items  # only in perform
             self.__display_item_index = index
             self.__display_item_indexes = list()
-            self.__undelete_logs = list()
             self.initialize()
 
         def close(self):
@@ -1323,9 +1485,6 @@ class DocumentController(Window.Window):
                 display_item_proxy.close()
             self.__data_group_display_item_proxies = None
             self.__display_item_index = None
-            for undelete_log in self.__undelete_logs:
-                undelete_log.close()
-            self.__undelete_logs = None
             self.__data_group_proxy.close()
             self.__data_group_proxy = None
             super().close()
@@ -1365,14 +1524,11 @@ class DocumentController(Window.Window):
             display_items = [document_model.display_items[index] for index in self.__display_item_indexes]
             for display_item in display_items:
                 if display_item in document_model.display_items:
-                    self.__undelete_logs.append(document_model.remove_display_item_with_log(display_item, safe=True))
+                    self._undelete_logs.append(document_model.remove_display_item_with_log(display_item, safe=True))
 
         def _redo(self) -> None:
             data_group = self.__data_group_proxy.item
-            for undelete_log in reversed(self.__undelete_logs):
-                self.__document_controller.document_model.undelete_all(undelete_log)
-                undelete_log.close()
-            self.__undelete_logs.clear()
+            self._undelete_all(self.__document_controller.document_model)
             index = self.__display_item_index
             display_items = [display_item_proxy.item for display_item_proxy in reversed(self.__data_group_display_item_proxies)]
             for display_item in display_items:
@@ -1769,7 +1925,7 @@ class DocumentController(Window.Window):
                     command.perform()
                     self.push_undo_command(command)
 
-    class RemoveGraphicsCommand(Undo.UndoableCommand):
+    class RemoveGraphicsCommand(Undo.UndeleteLogCommand):
 
         def __init__(self, document_controller: "DocumentController", display_item: DisplayItem.DisplayItem, graphics: typing.Sequence[Graphics.Graphic]):
             super().__init__(_("Remove Graphics"))
@@ -1778,7 +1934,6 @@ class DocumentController(Window.Window):
             self.__old_workspace_layout = self.__document_controller.workspace_controller.deconstruct()
             self.__new_workspace_layout = None
             self.__graphic_indexes = [display_item.graphics.index(graphic) for graphic in graphics]
-            self.__undelete_logs = list()
             self.initialize()
 
         def close(self):
@@ -1788,16 +1943,13 @@ class DocumentController(Window.Window):
             self.__old_workspace_layout = None
             self.__new_workspace_layout = None
             self.__graphic_indexes = None
-            for undelete_log in self.__undelete_logs:
-                undelete_log.close()
-            self.__undelete_logs = None
             super().close()
 
         def perform(self):
             display_item = self.__display_item_proxy.item
             graphics = [display_item.graphics[index] for index in self.__graphic_indexes]
             for graphic in graphics:
-                self.__undelete_logs.append(display_item.remove_graphic(graphic, safe=True))
+                self._undelete_logs.append(display_item.remove_graphic(graphic, safe=True))
 
         def _get_modified_state(self):
             display_item = self.__display_item_proxy.item
@@ -1809,10 +1961,7 @@ class DocumentController(Window.Window):
 
         def _undo(self):
             self.__new_workspace_layout = self.__document_controller.workspace_controller.deconstruct()
-            for undelete_log in reversed(self.__undelete_logs):
-                self.__document_controller.document_model.undelete_all(undelete_log)
-                undelete_log.close()
-            self.__undelete_logs.clear()
+            self._undelete_all(self.__document_controller.document_model)
             self.__document_controller.workspace_controller.reconstruct(self.__old_workspace_layout)
 
         def _redo(self):
@@ -1827,7 +1976,7 @@ class DocumentController(Window.Window):
     def create_remove_graphics_command(self, display_item, graphics):
         return DocumentController.RemoveGraphicsCommand(self, display_item, graphics)
 
-    class RemoveDisplayItemsCommand(Undo.UndoableCommand):
+    class RemoveDisplayItemsCommand(Undo.UndeleteLogCommand):
 
         def __init__(self, document_controller: "DocumentController", display_items: typing.Sequence[DisplayItem.DisplayItem]):
             super().__init__(_("Remove Display Items"))
@@ -1835,7 +1984,6 @@ class DocumentController(Window.Window):
             self.__old_workspace_layout = self.__document_controller.workspace_controller.deconstruct()
             self.__new_workspace_layout = None
             self.__display_item_indexes = [document_controller.document_model.display_items.index(display_item) for display_item in display_items]
-            self.__undelete_logs = list()
             self.initialize()
 
         def close(self):
@@ -1843,9 +1991,6 @@ class DocumentController(Window.Window):
             self.__old_workspace_layout = None
             self.__new_workspace_layout = None
             self.__display_item_indexes = None
-            for undelete_log in self.__undelete_logs:
-                undelete_log.close()
-            self.__undelete_logs = None
             super().close()
 
         def perform(self):
@@ -1856,7 +2001,7 @@ class DocumentController(Window.Window):
                     selected_display_items = self.__document_controller.selected_display_items
                     if display_item in selected_display_items:
                         selected_display_items.remove(display_item)
-                    self.__undelete_logs.append(document_model.remove_display_item_with_log(display_item))
+                    self._undelete_logs.append(document_model.remove_display_item_with_log(display_item))
                     self.__document_controller.select_display_items_in_data_panel(selected_display_items)
 
         def _get_modified_state(self):
@@ -1867,10 +2012,7 @@ class DocumentController(Window.Window):
 
         def _undo(self):
             self.__new_workspace_layout = self.__document_controller.workspace_controller.deconstruct()
-            for undelete_log in reversed(self.__undelete_logs):
-                self.__document_controller.document_model.undelete_all(undelete_log)
-                undelete_log.close()
-            self.__undelete_logs.clear()
+            self._undelete_all(self.__document_controller.document_model)
             self.__document_controller.workspace_controller.reconstruct(self.__old_workspace_layout)
 
         def _redo(self):
@@ -1880,7 +2022,7 @@ class DocumentController(Window.Window):
     def create_remove_display_items_command(self, display_items: typing.Sequence[DisplayItem.DisplayItem]) -> Undo.UndoableCommand:
         return DocumentController.RemoveDisplayItemsCommand(self, display_items)
 
-    class RemoveDataItemsCommand(Undo.UndoableCommand):
+    class RemoveDataItemsCommand(Undo.UndeleteLogCommand):
 
         def __init__(self, document_controller: "DocumentController", data_items: typing.Sequence[DataItem.DataItem]):
             super().__init__(_("Remove Data Items"))
@@ -1888,7 +2030,6 @@ class DocumentController(Window.Window):
             self.__old_workspace_layout = self.__document_controller.workspace_controller.deconstruct()
             self.__new_workspace_layout = None
             self.__data_item_indexes = [document_controller.document_model.data_items.index(data_item) for data_item in data_items]
-            self.__undelete_logs = list()
             self.initialize()
 
         def close(self):
@@ -1896,9 +2037,6 @@ class DocumentController(Window.Window):
             self.__old_workspace_layout = None
             self.__new_workspace_layout = None
             self.__data_item_indexes = None
-            for undelete_log in self.__undelete_logs:
-                undelete_log.close()
-            self.__undelete_logs = None
             super().close()
 
         def perform(self):
@@ -1906,7 +2044,7 @@ class DocumentController(Window.Window):
             data_items = [document_model.data_items[index] for index in self.__data_item_indexes]
             for data_item in data_items:
                 if data_item in document_model.data_items:
-                    self.__undelete_logs.append(document_model.remove_data_item_with_log(data_item, safe=True))
+                    self._undelete_logs.append(document_model.remove_data_item_with_log(data_item, safe=True))
 
         def _get_modified_state(self):
             return self.__document_controller.document_model.modified_state
@@ -1916,10 +2054,7 @@ class DocumentController(Window.Window):
 
         def _undo(self):
             self.__new_workspace_layout = self.__document_controller.workspace_controller.deconstruct()
-            for undelete_log in reversed(self.__undelete_logs):
-                self.__document_controller.document_model.undelete_all(undelete_log)
-                undelete_log.close()
-            self.__undelete_logs.clear()
+            self._undelete_all(self.__document_controller.document_model)
             self.__document_controller.workspace_controller.reconstruct(self.__old_workspace_layout)
 
         def _redo(self):
@@ -2097,7 +2232,7 @@ class DocumentController(Window.Window):
     def processing_invert(self) -> DisplayItem.DisplayItem:
         return self.document_model.get_display_item_for_data_item(self.__processing_new(self.document_model.get_invert_new))
 
-    class InsertDataItemCommand(Undo.UndoableCommand):
+    class InsertDataItemCommand(Undo.UndeleteLogCommand):
 
         def __init__(self, document_controller: "DocumentController", data_item_fn: typing.Callable[[], DataItem.DataItem]):
             super().__init__(_("Insert Data Item"))
@@ -2106,7 +2241,6 @@ class DocumentController(Window.Window):
             self.__new_workspace_layout = None
             self.__data_item_proxy = None
             self.__data_item_fn = data_item_fn
-            self.__undelete_log = None
             self.initialize()
 
         def close(self):
@@ -2114,9 +2248,6 @@ class DocumentController(Window.Window):
             self.__data_item_fn = None
             self.__old_workspace_layout = None
             self.__new_workspace_layout = None
-            if self.__undelete_log:
-                self.__undelete_log.close()
-                self.__undelete_log = None
             if self.__data_item_proxy:
                 self.__data_item_proxy.close()
                 self.__data_item_proxy = None
@@ -2142,15 +2273,13 @@ class DocumentController(Window.Window):
             return True
 
         def _redo(self):
-            self.__document_controller.document_model.undelete_all(self.__undelete_log)
-            self.__undelete_log.close()
-            self.__undelete_log = None
+            self._undelete_all(self.__document_controller.document_model)
             self.__document_controller.workspace_controller.reconstruct(self.__new_workspace_layout)
 
         def _undo(self):
             data_item = self.data_item
             self.__new_workspace_layout = self.__document_controller.workspace_controller.deconstruct()
-            self.__undelete_log = self.__document_controller.document_model.remove_data_item_with_log(data_item, safe=True)
+            self._undelete_logs.append(self.__document_controller.document_model.remove_data_item_with_log(data_item, safe=True))
             self.__document_controller.workspace_controller.reconstruct(self.__old_workspace_layout)
 
     def create_insert_data_item_command(self, data_item_fn: typing.Callable[[], DataItem.DataItem]) -> Undo.UndoableCommand:
@@ -2179,7 +2308,7 @@ class DocumentController(Window.Window):
         if data_item:
             self._perform_duplicate(data_item)
 
-    class InsertDisplayItemCommand(Undo.UndoableCommand):
+    class InsertDisplayItemCommand(Undo.UndeleteLogCommand):
 
         def __init__(self, document_controller: "DocumentController", display_item: DisplayItem.DisplayItem, display_item_fn: typing.Callable[[], DisplayItem.DisplayItem]):
             super().__init__(_("Insert Display Item"))
@@ -2190,7 +2319,6 @@ class DocumentController(Window.Window):
             self.__display_item = display_item
             self.__display_item_fn = display_item_fn
             self.__display_item_index = None
-            self.__undelete_log = None
             self.initialize()
 
         def close(self):
@@ -2201,9 +2329,6 @@ class DocumentController(Window.Window):
             self.__display_item_index = None
             self.__old_workspace_layout = None
             self.__new_workspace_layout = None
-            if self.__undelete_log:
-                self.__undelete_log.close()
-                self.__undelete_log = None
             super().close()
 
         def perform(self):
@@ -2228,16 +2353,14 @@ class DocumentController(Window.Window):
             self.__document_controller.document_model.modified_state = modified_state
 
         def _redo(self):
-            self.__document_controller.document_model.undelete_all(self.__undelete_log)
-            self.__undelete_log.close()
-            self.__undelete_log = None
+            self._undelete_all(self.__document_controller.document_model)
             self.__document_controller.workspace_controller.reconstruct(self.__new_workspace_layout)
 
         def _undo(self):
             display_item = self.__display_item_proxy.item if self.__display_item_proxy else None
             self.__new_workspace_layout = self.__document_controller.workspace_controller.deconstruct()
             self.__display_item_index = self.__document_controller.document_model.display_items.index(display_item)
-            self.__undelete_log = self.__document_controller.document_model.remove_display_item_with_log(display_item)
+            self._undelete_logs.append(self.__document_controller.document_model.remove_display_item_with_log(display_item))
             self.__document_controller.workspace_controller.reconstruct(self.__old_workspace_layout)
 
     def _perform_display_item_snapshot(self, display_item: DisplayItem.DisplayItem) -> None:
@@ -2257,7 +2380,7 @@ class DocumentController(Window.Window):
             command.perform()
             self.push_undo_command(command)
 
-    class RemoveDisplayItemCommand(Undo.UndoableCommand):
+    class RemoveDisplayItemCommand(Undo.UndeleteLogCommand):
 
         def __init__(self, document_controller: "DocumentController", display_item: DisplayItem.DisplayItem):
             super().__init__(_("Remove Display Item"))
@@ -2265,7 +2388,6 @@ class DocumentController(Window.Window):
             self.__old_workspace_layout = self.__document_controller.workspace_controller.deconstruct()
             self.__new_workspace_layout = None
             self.__display_item_index = document_controller.document_model.display_items.index(display_item)
-            self.__undelete_logs = list()
             self.initialize()
 
         def close(self):
@@ -2273,15 +2395,12 @@ class DocumentController(Window.Window):
             self.__old_workspace_layout = None
             self.__new_workspace_layout = None
             self.__display_item_index = None
-            for undelete_log in self.__undelete_logs:
-                undelete_log.close()
-            self.__undelete_logs = None
             super().close()
 
         def perform(self):
             document_model = self.__document_controller.document_model
             display_item = document_model.display_items[self.__display_item_index]
-            self.__undelete_logs.append(document_model.remove_display_item_with_log(display_item))
+            self._undelete_logs.append(document_model.remove_display_item_with_log(display_item))
 
         def _get_modified_state(self):
             return self.__document_controller.document_model.modified_state
@@ -2291,10 +2410,7 @@ class DocumentController(Window.Window):
 
         def _undo(self):
             self.__new_workspace_layout = self.__document_controller.workspace_controller.deconstruct()
-            for undelete_log in reversed(self.__undelete_logs):
-                self.__document_controller.document_model.undelete_all(undelete_log)
-                undelete_log.close()
-            self.__undelete_logs.clear()
+            self._undelete_all(self.__document_controller.document_model)
             self.__document_controller.workspace_controller.reconstruct(self.__old_workspace_layout)
 
         def _redo(self):
@@ -2503,7 +2619,9 @@ class DocumentController(Window.Window):
     def create_empty_data_item(self):
         self._perform_create_empty_data_item()
 
-    class InsertDataItemsCommand(Undo.UndoableCommand):
+    class InsertDataItemsCommand(Undo.UndeleteLogCommand):
+
+        insert_batch_size = 100
 
         def __init__(self, document_controller: "DocumentController", data_items: typing.Sequence[DataItem.DataItem], index: int, display_panel: DisplayPanel.DisplayPanel=None, *, project: Project.Project = None):
             super().__init__(_("Insert Data Items"))
@@ -2515,7 +2633,6 @@ class DocumentController(Window.Window):
             self.__data_item_indexes = list()
             self.__display_panel = display_panel  # only used in perform
             self.__project = project
-            self.__undelete_logs = list()
             self.initialize()
 
         def close(self):
@@ -2524,19 +2641,20 @@ class DocumentController(Window.Window):
             self.__new_workspace_layout = None
             self.__data_items = None
             self.__data_item_index = None
-            for undelete_log in self.__undelete_logs:
-                undelete_log.close()
-            self.__undelete_logs = None
             super().close()
 
         def perform(self):
             document_model = self.__document_controller.document_model
             index = self.__data_item_index
-            for data_item in self.__data_items:
-                # insert will throw an exception if data item already exists in the project
-                document_model.insert_data_item(index, data_item, auto_display=True, project=self.__project)
-                self.__data_item_indexes.append(index)
-                index += 1
+            # insert in batches, each within a transaction so the project is written once per batch.
+            batch_size = self.insert_batch_size
+            for batch_start in range(0, len(self.__data_items), batch_size):
+                with document_model.transaction_context():
+                    for data_item in self.__data_items[batch_start:batch_start + batch_size]:
+                        # insert will throw an exception if data item already exists in the project
+                        document_model.insert_data_item(index, data_item, auto_display=True, project=self.__project)
+                        self.__data_item_indexes.append(index)
+                        index += 1
             if self.__display_panel and self.__data_items:
                 display_item = self.__document_controller.document_model.get_display_item_for_data_item(self.__data_items[-1])
                 if display_item:
@@ -2550,10 +2668,7 @@ class DocumentController(Window.Window):
             self.__document_controller.document_model.modified_state = modified_state
 
         def _redo(self):
-            for undelete_log in reversed(self.__undelete_logs):
-                self.__document_controller.document_model.undelete_all(undelete_log)
-                undelete_log.close()
-            self.__undelete_logs.clear()
+            self._undelete_all(self.__document_controller.document_model)
             self.__document_controller.workspace_controller.reconstruct(self.__new_workspace_layout)
 
         def _undo(self):
@@ -2562,7 +2677,7 @@ class DocumentController(Window.Window):
             data_items = [document_model.data_items[index] for index in self.__data_item_indexes]
             for data_item in data_items:
                 if data_item in document_model.data_items:
-                    self.__undelete_logs.append(document_model.remove_data_item_with_log(data_item, safe=True))
+                    self._undelete_logs.append(document_model.remove_data_item_with_log(data_item, safe=True))
             self.__document_controller.workspace_controller.reconstruct(self.__old_workspace_layout)
 
     def receive_project_files(self, file_paths: typing.Sequence[pathlib.Path], project: Project.Project, index: int = -1, threaded: bool = True) -> None:
@@ -2598,26 +2713,23 @@ class DocumentController(Window.Window):
         # this function will be called on a thread to receive files in the background.
         def receive_files_on_thread(file_paths: typing.Sequence[pathlib.Path], data_group: typing.Optional[DataGroup.DataGroup], index: int, completion_fn) -> typing.List[DataItem.DataItem]:
 
-            received_data_items = list()
+            cancel_event = threading.Event()
+            self.__file_task_cancel_events.add(cancel_event)
 
             with self.create_task_context_manager(_("Import Data Items"), "table", logging=threaded) as task:
                 task.update_progress(_("Starting import."), (0, len(file_paths)))
                 task_data = {"headers": ["Number", "File"]}
 
-                for file_index, file_path in enumerate(file_paths):
+                # files are read on a pool of worker threads; the data items are inserted together when all are read.
+                def file_read(file_path: str, file_count: int, count: int) -> None:
                     data = task_data.setdefault("data", list())
-                    file_name = file_path.name
-                    task_data_entry = [str(file_index + 1), file_name]
-                    data.append(task_data_entry)
-                    task.update_progress(_("Importing item {}.").format(file_index + 1), (file_index + 1, len(file_paths)), task_data)
-                    try:
-                        data_items = ImportExportManager.ImportExportManager().read_data_items(self.ui, str(file_path))
-                        if data_items:
-                            received_data_items.extend(data_items)
-                    except Exception as e:
-                        logging.debug(f"Could not read image {file_path} / {e}")
-                        traceback.print_exc()
-                        traceback.print_stack()
+                    data.append([str(file_count), pathlib.Path(file_path).name])
+                    task.update_progress(_("Importing item {}.").format(file_count), (file_count, count), task_data)
+
+                try:
+                    received_data_items = ImportExportManager.ImportExportManager().read_data_items_bulk(self.ui, [str(file_path) for file_path in file_paths], progress_fn=file_read, cancel_event=cancel_event)
+                finally:
+                    self.__file_task_cancel_events.discard(cancel_event)
 
                 task.update_progress(_("Finishing importing."), (len(file_paths), len(file_paths)))
 
@@ -19,9 +19,12 @@ _ = gettext.gettext
 
 
 class ExportDialog(Dialog.OkCancelDialog):
-    def __init__(self, ui):
+    def __init__(self, ui, document_controller=None):
         super(ExportDialog, self).__init__(ui, ok_title=_("Export"))
 
+        # if a document controller is passed, the export runs as one of its background tasks.
+        self.__document_controller = document_controller
+
         io_handler_id = self.ui.get_persistent_string("export_io_handler_id", "png-io-handler")
 
         self.directory = self.ui.get_persistent_string("export_directory", self.ui.get_document_location())
@@ -147,6 +150,7 @@ class ExportDialog(Dialog.OkCancelDialog):
         directory = self.directory
         writer = self.writer
         if directory:
+            display_items_and_paths = list()
             for index, display_item in enumerate(display_items):
                 data_item = display_item.data_item
                 try:
@@ -166,8 +170,18 @@ class ExportDialog(Dialog.OkCancelDialog):
                     filename = "_".join(components)
                     extension = writer.extensions[0]
                     path = os.path.join(directory, "{0}.{1}".format(filename, extension))
-                    ImportExportManager.ImportExportManager().write_display_item_with_writer(self.ui, writer, display_item, path)
+                    display_items_and_paths.append((display_item, path))
                 except Exception as e:
                     logging.debug("Could not export image %s / %s", str(data_item), str(e))
                     traceback.print_exc()
                     traceback.print_stack()
+            if self.__document_controller:
+                self.__document_controller.write_display_items(writer, display_items_and_paths)
+            else:
+                for display_item, path in display_items_and_paths:
+                    try:
+                        ImportExportManager.ImportExportManager().write_display_item_with_writer(self.ui, writer, display_item, path)
+                    except Exception as e:
+                        logging.debug("Could not export image %s / %s", str(display_item.data_item), str(e))
+                        traceback.print_exc()
+                        traceback.print_stack()
@@ -14,6 +14,7 @@ import weakref
 
 # local libraries
 from nion.swift import Panel
+from nion.swift.model import FilterIndex
 from nion.utils import ListModel
 
 _ = gettext.gettext
@@ -43,7 +44,7 @@ class FilterController:
 
     def __init__(self, document_controller):
         self.ui = document_controller.ui
-        self.__periodic_listener = document_controller.add_periodic(1.0, self.__periodic)
+        self.__periodic_listener = document_controller.add_periodic(1.0, self.__periodic, priority=-1)
         self.item_model_controller = self.ui.create_item_model_controller(["display"])
         self.__document_controller_weakref = weakref.ref(document_controller)
 
@@ -195,7 +196,7 @@ class FilterController:
         for index, parent_row, parent_id in selected_indexes:
             item_model_controller = self.item_model_controller
             tree_node = item_model_controller.item_value("tree_node", index, parent_id)
-            partial_date_filters.append(ListModel.PartialDateFilter("created_local", *tree_node.keys))
+            partial_date_filters.append(FilterIndex.PartialDateFilter(self.document_controller.document_model.display_item_filter_index, *tree_node.keys))
 
         if len(partial_date_filters) > 0:
             self.__date_filter = ListModel.OrFilter(partial_date_filters)
@@ -213,7 +214,7 @@ class FilterController:
         text = text.strip() if text else None
 
         if text is not None:
-            self.__text_filter = ListModel.TextFilter("text_for_filter", text)
+            self.__text_filter = FilterIndex.TextFilter(self.document_controller.document_model.display_item_filter_index, text)
         else:
             self.__text_filter = None
 
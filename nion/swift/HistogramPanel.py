@@ -562,15 +562,22 @@ class HistogramPanel(Panel.Panel):
 
         self._histogram_widget = HistogramWidget(document_controller, display_item_stream, self.__histogram_widget_data_model, self.__color_map_data_model, cursor_changed_fn)
 
-        def calculate_statistics(display_data_and_metadata_func, display_data_range, region, displayed_intensity_calibration):
+        def calculate_statistics(display_data_and_metadata_func, display_data_range, display_data_statistics, region, displayed_intensity_calibration):
             display_data_and_metadata = display_data_and_metadata_func()
             data = display_data_and_metadata.data if display_data_and_metadata else None
             data_range = display_data_range
             if data is not None and data.size > 0 and displayed_intensity_calibration:
-                mean = numpy.mean(data)
-                std = numpy.std(data)
-                rms = numpy.sqrt(numpy.mean(numpy.square(numpy.absolute(data))))
-                sum_data = mean * functools.reduce(operator.mul, Image.dimensional_shape_from_shape_and_dtype(data.shape, data.dtype))
+                if region is None and display_data_statistics:
+                    # use the incrementally maintained statistics for the full display data
+                    mean = display_data_statistics["mean"]
+                    std = display_data_statistics["std"]
+                    rms = display_data_statistics["rms"]
+                    sum_data = display_data_statistics["sum"]
+                else:
+                    mean = numpy.mean(data)
+                    std = numpy.std(data)
+                    rms = numpy.sqrt(numpy.mean(numpy.square(numpy.absolute(data))))
+                    sum_data = mean * functools.reduce(operator.mul, Image.dimensional_shape_from_shape_and_dtype(data.shape, data.dtype))
                 if region is None:
                     data_min, data_max = data_range if data_range is not None else (None, None)
                 else:
@@ -585,12 +592,13 @@ class HistogramPanel(Panel.Panel):
                 return { "mean": mean_str, "std": std_str, "min": data_min_str, "max": data_max_str, "rms": rms_str, "sum": sum_data_str }
             return dict()
 
-        def calculate_statistics_func(display_data_and_metadata_model_func, display_data_range, region, displayed_intensity_calibration):
-            return functools.partial(calculate_statistics, display_data_and_metadata_model_func, display_data_range, region, displayed_intensity_calibration)
+        def calculate_statistics_func(display_data_and_metadata_model_func, display_data_range, display_data_statistics, region, displayed_intensity_calibration):
+            return functools.partial(calculate_statistics, display_data_and_metadata_model_func, display_data_range, display_data_statistics, region, displayed_intensity_calibration)
 
         display_data_range_stream = DisplayDataChannelTransientsStream(display_data_channel_stream, "data_range")
+        display_data_statistics_stream = DisplayDataChannelTransientsStream(display_data_channel_stream, "data_statistics")
         displayed_intensity_calibration_stream = StreamPropertyStream(display_item_stream, 'displayed_intensity_calibration')
-        statistics_func_stream = Stream.CombineLatestStream((region_data_and_metadata_func_stream, display_data_range_stream, region_stream, displayed_intensity_calibration_stream), calculate_statistics_func)
+        statistics_func_stream = Stream.CombineLatestStream((region_data_and_metadata_func_stream, display_data_range_stream, display_data_statistics_stream, region_stream, displayed_intensity_calibration_stream), calculate_statistics_func)
         if debounce:
             statistics_func_stream = Stream.DebounceStream(statistics_func_stream, 0.05, document_controller.event_loop)
         if sample:
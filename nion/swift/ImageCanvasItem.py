@@ -13,6 +13,7 @@ import scipy.ndimage
 from nion.data import Calibration
 from nion.swift import Undo
 from nion.swift.model import Graphics
+from nion.swift.model import Tracing
 from nion.swift.model import Utility
 from nion.ui import CanvasItem
 from nion.utils import Geometry
@@ -171,6 +172,64 @@ class GraphicsCanvasItem(CanvasItem.AbstractCanvasItem):
                             traceback.print_stack()
 
 
+class TiledBitmapCanvasItem(CanvasItem.AbstractCanvasItem):
+    """A canvas item to paint a set of rgba tiles, each into its own rectangle within the canvas bounds.
+
+    Callers should call set_tiles with a list of (rgba_tile, rect) tuples, rect being in local canvas coordinates.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.__tiles_lock = threading.RLock()
+        self.__tiles = list()
+
+    @property
+    def tiles(self) -> typing.List[typing.Tuple[numpy.ndarray, Geometry.FloatRect]]:
+        with self.__tiles_lock:
+            return list(self.__tiles)
+
+    def set_tiles(self, tiles: typing.Sequence[typing.Tuple[numpy.ndarray, Geometry.FloatRect]], trigger_update: bool=True) -> None:
+        with self.__tiles_lock:
+            self.__tiles = list(tiles)
+        if trigger_update:
+            self.update()
+
+    def _repaint(self, drawing_context):
+        for tile_rgba, tile_rect in self.tiles:
+            drawing_context.draw_image(tile_rgba, tile_rect.left, tile_rect.top, tile_rect.width, tile_rect.height)
+
+
+def calculate_pyramid_tiles(data_shape, canvas_size: Geometry.IntSize, visible_rect: Geometry.FloatRect, level_count: int, tile_size: int) -> typing.Tuple[int, typing.List[typing.Tuple[int, int, Geometry.FloatRect]]]:
+    """Return the pyramid level and the (tile_row, tile_column, canvas rect) tiles covering the visible canvas rect.
+
+    The level is the coarsest one that still has at least one data pixel per canvas pixel. The data of size data_shape
+    is drawn to fill a canvas of size canvas_size.
+    """
+    height, width = data_shape
+    scale = min(canvas_size.height / height, canvas_size.width / width)
+    level = 0
+    while level + 1 < level_count and scale * (2 ** (level + 1)) <= 1.0:
+        level += 1
+    level_factor = 2 ** level
+    data_tile_size = tile_size * level_factor  # size of a tile in data pixels
+    y_scale = canvas_size.height / height
+    x_scale = canvas_size.width / width
+    first_row = max(int(visible_rect.top / y_scale) // data_tile_size, 0)
+    last_row = min(int(math.ceil(visible_rect.bottom / y_scale)), height - 1) // data_tile_size
+    first_column = max(int(visible_rect.left / x_scale) // data_tile_size, 0)
+    last_column = min(int(math.ceil(visible_rect.right / x_scale)), width - 1) // data_tile_size
+    tiles = list()
+    for tile_row in range(first_row, last_row + 1):
+        for tile_column in range(first_column, last_column + 1):
+            top = tile_row * data_tile_size
+            left = tile_column * data_tile_size
+            bottom = min(top + data_tile_size, height)
+            right = min(left + data_tile_size, width)
+            tile_rect = Geometry.FloatRect.from_tlbr(top * y_scale, left * x_scale, bottom * y_scale, right * x_scale)
+            tiles.append((tile_row, tile_column, tile_rect))
+    return level, tiles
+
+
 class InfoOverlayCanvasItem(CanvasItem.AbstractCanvasItem):
     """A canvas item to paint the scale marker as an overlay.
 
@@ -409,6 +468,9 @@ class ImageCanvasItem(CanvasItem.LayerCanvasItem):
         cursor_changed(pos)
     """
 
+    # images with more pixels than this are displayed using reduced resolution tiles covering the visible area.
+    pyramid_pixel_threshold = 4096 * 4096
+
     def __init__(self, get_font_metrics_fn, delegate: ImageCanvasItemDelegate, event_loop, draw_background: bool=True):
         super().__init__()
 
@@ -435,11 +497,13 @@ class ImageCanvasItem(CanvasItem.LayerCanvasItem):
         # the background
         # next the zoomable items
         self.__bitmap_canvas_item = CanvasItem.BitmapCanvasItem(background_color="#888" if draw_background else "transparent")
+        self.__tiled_bitmap_canvas_item = TiledBitmapCanvasItem()
         self.__graphics_canvas_item = GraphicsCanvasItem(get_font_metrics_fn)
         self.__timestamp_canvas_item = CanvasItem.TimestampCanvasItem()
         # put the zoomable items into a composition
         self.__composite_canvas_item = CanvasItem.CanvasItemComposition()
         self.__composite_canvas_item.add_canvas_item(self.__bitmap_canvas_item)
+        self.__composite_canvas_item.add_canvas_item(self.__tiled_bitmap_canvas_item)
         self.__composite_canvas_item.add_canvas_item(self.__graphics_canvas_item)
         self.__composite_canvas_item.add_canvas_item(self.__timestamp_canvas_item)
         # and put the composition into a scroll area
@@ -572,7 +636,7 @@ class ImageCanvasItem(CanvasItem.LayerCanvasItem):
                         with self.update_context():
                             self.__update_image_canvas_size()
                             # trigger updates
-                            self.__bitmap_canvas_item.update()
+                            self.__update_bitmap_canvas_items()
                             with self.__update_layout_handle_lock:
                                 self.__update_layout_handle = None
 
@@ -589,7 +653,7 @@ class ImageCanvasItem(CanvasItem.LayerCanvasItem):
                                     self.__update_layout_handle = self.__event_loop.call_soon_threadsafe(update_layout)
                                 else:
                                     # trigger updates
-                                    self.__bitmap_canvas_item.update()
+                                    self.__update_bitmap_canvas_items()
                                     with self.__update_layout_handle_lock:
                                         update_layout_handle = self.__update_layout_handle
                                         if update_layout_handle:
@@ -1201,7 +1265,9 @@ class ImageCanvasItem(CanvasItem.LayerCanvasItem):
         self.unregister_prepare_canvas_item(self)
 
     def prepare_render(self):
-        self.prepare_display()
+        display_values = self.__display_values
+        with Tracing.span("prepare display", "paint", frame=Tracing.frame_id(display_values.data_and_metadata if display_values else None)):
+            self.prepare_display()
 
     def _repaint(self, drawing_context):
         super()._repaint(drawing_context)
@@ -1243,7 +1309,11 @@ class ImageCanvasItem(CanvasItem.LayerCanvasItem):
             # configure the bitmap canvas item
             display_values = self.__display_values
             display_data = display_values.display_data_and_metadata
-            if display_data and display_data.data.dtype == numpy.float32:
+            if self.__prepare_pyramid_display(display_values):
+                display_values.finalize()
+                self.__bitmap_canvas_item.set_rgba_bitmap_data(None, trigger_update=False)
+            elif display_data and display_data.data.dtype == numpy.float32:
+                self.__tiled_bitmap_canvas_item.set_tiles(list(), trigger_update=False)
                 display_range = display_values.display_range
                 color_map_data = display_values.color_map_data
                 display_values.finalize()
@@ -1256,6 +1326,7 @@ class ImageCanvasItem(CanvasItem.LayerCanvasItem):
                     color_map_rgba = None
                 self.__bitmap_canvas_item.set_data(display_data.data, display_range, color_map_rgba, trigger_update=False)
             else:
+                self.__tiled_bitmap_canvas_item.set_tiles(list(), trigger_update=False)
                 data_rgba = display_values.display_rgba
                 display_values.finalize()
                 if False:
@@ -1276,6 +1347,37 @@ class ImageCanvasItem(CanvasItem.LayerCanvasItem):
                 self.__bitmap_canvas_item.set_rgba_bitmap_data(data_rgba, trigger_update=False)
             self.__timestamp_canvas_item.timestamp = display_values.display_rgba_timestamp if self.__display_latency else None
 
+    def __update_bitmap_canvas_items(self):
+        # only one of the bitmap or tiled bitmap canvas items is in use at a time.
+        if self.__tiled_bitmap_canvas_item.tiles:
+            self.__tiled_bitmap_canvas_item.update()
+        else:
+            self.__bitmap_canvas_item.update()
+
+    def __prepare_pyramid_display(self, display_values) -> bool:
+        # large images are drawn as the tiles of the reduced resolution pyramid level that cover the visible area.
+        # return whether the pyramid display is used.
+        display_data = display_values.display_data_and_metadata if display_values else None
+        if not display_data or len(display_data.dimensional_shape) != 2:
+            return False
+        data_shape = display_data.dimensional_shape
+        if data_shape[0] * data_shape[1] <= self.pyramid_pixel_threshold:
+            return False
+        canvas_size = self.__composite_canvas_item.canvas_size
+        scroll_area_canvas_size = self.scroll_area_canvas_item.canvas_size
+        if not canvas_size or not scroll_area_canvas_size or canvas_size.height <= 0 or canvas_size.width <= 0:
+            return False
+        canvas_origin = self.__composite_canvas_item.canvas_origin
+        visible_rect = Geometry.FloatRect(Geometry.FloatPoint(y=-canvas_origin.y, x=-canvas_origin.x), Geometry.FloatSize.make(scroll_area_canvas_size))
+        level, tile_specs = calculate_pyramid_tiles(data_shape, canvas_size, visible_rect, display_values.display_pyramid_level_count, display_values.pyramid_tile_size)
+        tiles = list()
+        for tile_row, tile_column, tile_rect in tile_specs:
+            tile_rgba = display_values.get_display_rgba_tile(level, tile_row, tile_column)
+            if tile_rgba is not None:
+                tiles.append((tile_rgba, tile_rect))
+        self.__tiled_bitmap_canvas_item.set_tiles(tiles, trigger_update=False)
+        return True
+
     @property
     def image_canvas_mode(self):
         return self.__image_canvas_mode
@@ -1284,6 +1386,10 @@ class ImageCanvasItem(CanvasItem.LayerCanvasItem):
     def _bitmap_canvas_item(self):
         return self.__bitmap_canvas_item
 
+    @property
+    def _tiled_bitmap_canvas_item(self):
+        return self.__tiled_bitmap_canvas_item
+
     @property
     def _display_values(self):
         return self.__display_values
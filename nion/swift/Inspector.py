@@ -115,11 +115,11 @@ class InspectorPanel(Panel.Panel):
         data_item = self.__display_item.data_item if self.__display_item else None
         display_data_channel = self.__display_item.display_data_channel if self.__display_item else None
 
-        def rebuild_display_inspector():
-            self.document_controller.add_task("update_display_inspector" + str(id(self)), self.__update_display_inspector)
+        def update_display_inspector_sections():
+            self.document_controller.add_task("update_display_inspector" + str(id(self)), self.__update_display_inspector_sections)
 
         self.__display_inspector = DisplayInspector(self.ui, self.document_controller, self.__display_item)
-        self.__display_inspector.on_rebuild = rebuild_display_inspector
+        self.__display_inspector.on_rebuild = update_display_inspector_sections
 
         new_data_shape = data_item.data_shape if data_item else ()
         new_display_data_shape = display_data_channel.display_data_shape if display_data_channel else ()
@@ -139,9 +139,8 @@ class InspectorPanel(Panel.Panel):
                 self.document_controller.clear_task("update_display_inspector" + str(id(self)))
 
             def display_graphic_selection_changed(graphic_selection):
-                # not really a recursive call; only delayed
                 # this may come in on a thread (superscan probe position connection closing). delay even more.
-                self.document_controller.add_task("update_display_inspector" + str(id(self)), self.__update_display_inspector)
+                self.document_controller.add_task("update_display_inspector" + str(id(self)), self.__update_display_inspector_sections)
 
             def display_changed():
                 # not really a recursive call; only delayed
@@ -152,7 +151,7 @@ class InspectorPanel(Panel.Panel):
                 new_display_data_shape = new_display_data_shape if new_display_data_shape is not None else ()
                 new_display_type = self.__display_item.display_type if self.__display_item else None
                 if self.__data_shape != new_data_shape or self.__display_type != new_display_type or self.__display_data_shape != new_display_data_shape:
-                    self.document_controller.add_task("update_display_inspector" + str(id(self)), self.__update_display_inspector)
+                    self.document_controller.add_task("update_display_inspector" + str(id(self)), self.__update_display_inspector_sections)
 
             self.__display_changed_listener = self.__display_item.display_changed_event.listen(display_changed)
             self.__display_graphic_selection_changed_event_listener = self.__display_item.graphic_selection_changed_event.listen(display_graphic_selection_changed)
@@ -163,6 +162,18 @@ class InspectorPanel(Panel.Panel):
         stretch_column.add_stretch()
         self.column.add(stretch_column)
 
+    # update the sections of the data item inspector for a change of structure of the same display item.
+    # not thread safe.
+    def __update_display_inspector_sections(self):
+        if self.__display_inspector:
+            data_item = self.__display_item.data_item if self.__display_item else None
+            display_data_channel = self.__display_item.display_data_channel if self.__display_item else None
+            new_display_data_shape = display_data_channel.display_data_shape if display_data_channel else ()
+            self.__data_shape = data_item.data_shape if data_item else ()
+            self.__display_type = self.__display_item.display_type if self.__display_item else None
+            self.__display_data_shape = new_display_data_shape if new_display_data_shape is not None else ()
+            self.__display_inspector.update_sections()
+
     # not thread safe
     def __set_display_item(self, display_item: typing.Optional[DisplayItem.DisplayItem]) -> None:
         if not self.document_controller.document_model.are_display_items_equal(self.__display_item, display_item):
@@ -2366,6 +2377,55 @@ def make_interval_type_inspector(document_controller, display_item: DisplayItem.
     return graphic_widget
 
 
+class SelectedGraphicsListBinding(Binding.Binding):
+    """One way list binding from the selected graphics of a display item to a target.
+
+    Calls the inserter and remover for the graphics added to and removed from the selection, so that a change of
+    selection only affects the widgets of those graphics.
+    """
+
+    def __init__(self, display_item: DisplayItem.DisplayItem):
+        super().__init__(display_item)
+        self.__display_item = display_item
+        self.__lock = threading.RLock()
+        self.__items = list(display_item.selected_graphics)
+        self.inserter: typing.Optional[typing.Callable[[typing.Any, int], None]] = None
+        self.remover: typing.Optional[typing.Callable[[int], None]] = None
+        self.__graphic_selection_changed_listener = display_item.graphic_selection_changed_event.listen(self.__graphic_selection_changed)
+
+    def close(self):
+        self.__graphic_selection_changed_listener.close()
+        self.__graphic_selection_changed_listener = None
+        super().close()
+
+    @property
+    def items(self) -> typing.Sequence:
+        with self.__lock:
+            return list(self.__items)
+
+    # thread safe
+    def __graphic_selection_changed(self, graphic_selection) -> None:
+        with self.__lock:
+            new_items = list(self.__display_item.selected_graphics)
+            items = self.__items
+            for index in reversed(range(len(items))):
+                if items[index] not in new_items:
+                    items.pop(index)
+                    if callable(self.remover):
+                        self.remover(index)
+            if items != [item for item in new_items if item in items]:
+                # the order of the remaining items changed; start over.
+                while items:
+                    items.pop()
+                    if callable(self.remover):
+                        self.remover(len(items))
+            for index, item in enumerate(new_items):
+                if index >= len(items) or items[index] is not item:
+                    items.insert(index, item)
+                    if callable(self.inserter):
+                        self.inserter(item, index)
+
+
 class GraphicsInspectorSection(InspectorSection):
 
     """
@@ -2384,7 +2444,7 @@ class GraphicsInspectorSection(InspectorSection):
         # create the widgets for each graphic
         # TODO: do not use dynamic list object in graphics inspector; the dynamic aspect is not utilized.
         list_widget = Widgets.TableWidget(ui, lambda item: self.__create_list_item_widget(item), header_widget, header_for_empty_list_widget)
-        list_widget.bind_items(Binding.ListBinding(display_item, "selected_graphics" if selected_only else "graphics"))
+        list_widget.bind_items(SelectedGraphicsListBinding(display_item) if selected_only else Binding.ListBinding(display_item, "graphics"))
         self.add_widget_to_content(list_widget)
         # create the display calibrations check box row
         display_calibrations_row = self.ui.create_row_widget()
@@ -3094,7 +3154,8 @@ class DisplayInspector(Widgets.CompositeWidgetBase):
     """A class to manage creation of a widget representing an inspector for a display item.
 
     A new data item inspector is created whenever the display item changes, but not when the content of the items
-    within the display item mutate.
+    within the display item mutate. When the structure of the display item changes (graphic selection, data shape,
+    display type), call update_sections to add and remove sections; sections which still apply are kept.
     """
 
     def __init__(self, ui, document_controller, display_item: DisplayItem.DisplayItem):
@@ -3102,6 +3163,8 @@ class DisplayInspector(Widgets.CompositeWidgetBase):
 
         self.ui = ui
         self.__unbinder = Unbinder()
+        self.__document_controller = document_controller
+        self.__display_item = display_item
 
         self.on_rebuild = None
 
@@ -3118,82 +3181,119 @@ class DisplayInspector(Widgets.CompositeWidgetBase):
             content_widget.add_spacing(4)
             self.__unbinder.add([display_item], [title_label_widget.unbind_text])
 
-        self.__focus_default = None
-        inspector_sections = list()
+        # the sections follow the title and are followed by the stretch.
+        self.__first_section_index = len(content_widget.children)
+        self.__sections = list()  # list of (key, section) tuples
+
+        content_widget.add_stretch()
+
+        self.update_sections()
+
+    def close(self) -> None:
+        self.__unbinder.close()
+        self.__unbinder = None
+        self.__sections = None
+        self.__document_controller = None
+        self.__display_item = None
+        super().close()
+
+    def __get_section_specs(self) -> typing.List[typing.Tuple[typing.Tuple, typing.Callable[[], Widgets.CompositeWidgetBase]]]:
+        # return a (key, constructor) for each section required by the display item. the key identifies the objects the
+        # section is bound to and the structure it was built for, so an existing section with an equal key still applies.
+        document_controller = self.__document_controller
+        display_item = self.__display_item
+        section_specs = list()
+
+        def rebuild():
+            if callable(self.on_rebuild):
+                self.on_rebuild()
+
+        def make_data_item_group_widget(index: int) -> DataItemGroupWidget:
+            data_item_group_widget = DataItemGroupWidget(self.ui, document_controller, display_item, index)
+            data_item_group_widget.on_rebuild_display_data_channels = rebuild
+            data_item_group_widget.on_rebuild_display_layers = rebuild
+            return data_item_group_widget
+
         if display_item and display_item.graphic_selection.has_selection:
-            inspector_sections.append(GraphicsInspectorSection(document_controller, display_item, selected_only=True))
-            def focus_default():
-                pass
-            self.__focus_default = focus_default
+            section_specs.append((("selected_graphics", display_item), functools.partial(GraphicsInspectorSection, document_controller, display_item, selected_only=True)))
         elif display_item and display_item.used_display_type == "line_plot":
-            inspector_sections.append(InfoInspectorSection(document_controller, display_item))
-            inspector_sections.append(LinePlotDisplayInspectorSection(document_controller, display_item))
+            section_specs.append((("info", display_item), functools.partial(InfoInspectorSection, document_controller, display_item)))
+            section_specs.append((("line_plot_display", display_item), functools.partial(LinePlotDisplayInspectorSection, document_controller, display_item)))
+            display_data_channel_count = len(display_item.display_data_channels)
             for index, display_data_channel in enumerate(display_item.display_data_channels):
-                data_item_group_widget = DataItemGroupWidget(self.ui, document_controller, display_item, index)
-                def rebuild():
-                    if callable(self.on_rebuild):
-                        self.on_rebuild()
-                data_item_group_widget.on_rebuild_display_data_channels = rebuild
-                data_item_group_widget.on_rebuild_display_layers = rebuild
-                inspector_sections.append(data_item_group_widget)
-            line_plot_display_layers_inspector_section = LinePlotDisplayLayersInspectorSection(document_controller, display_item)
-            inspector_sections.append(line_plot_display_layers_inspector_section)
+                data_item = display_data_channel.data_item
+                data_shape = data_item.data_shape if data_item else None
+                key = ("data_item_group", display_item, index, display_data_channel, display_data_channel_count > 1, data_shape)
+                section_specs.append((key, functools.partial(make_data_item_group_widget, index)))
+            section_specs.append((("line_plot_display_layers", display_item), functools.partial(LinePlotDisplayLayersInspectorSection, document_controller, display_item)))
             if len(display_item.graphics) > 0:
-                inspector_sections.append(GraphicsInspectorSection(document_controller, display_item))
-            def focus_default():
-                inspector_sections[0].info_title_label.focused = True
-                inspector_sections[0].info_title_label.request_refocus()
-            self.__focus_default = focus_default
+                section_specs.append((("graphics", display_item), functools.partial(GraphicsInspectorSection, document_controller, display_item)))
         elif display_item and display_item.used_display_type == "image":
-            inspector_sections.append(InfoInspectorSection(document_controller, display_item))
-            inspector_sections.append(ImageDisplayInspectorSection(document_controller, display_item))
+            section_specs.append((("info", display_item), functools.partial(InfoInspectorSection, document_controller, display_item)))
+            section_specs.append((("image_display", display_item), functools.partial(ImageDisplayInspectorSection, document_controller, display_item)))
             for display_data_channel in display_item.display_data_channels:
                 data_item = display_data_channel.data_item
-                inspector_sections.append(ImageDataInspectorSection(document_controller, display_data_channel, display_item))
-                inspector_sections.append(CalibrationsInspectorSection(document_controller, display_data_channel, display_item))
-                inspector_sections.append(SessionInspectorSection(document_controller, data_item))
+                data_shape = data_item.data_shape if data_item else None
+                section_specs.append((("image_data", display_data_channel), functools.partial(ImageDataInspectorSection, document_controller, display_data_channel, display_item)))
+                section_specs.append((("calibrations", display_data_channel), functools.partial(CalibrationsInspectorSection, document_controller, display_data_channel, display_item)))
+                section_specs.append((("session", display_data_channel, data_item), functools.partial(SessionInspectorSection, document_controller, data_item)))
                 if data_item and data_item.is_sequence:
-                    inspector_sections.append(SequenceInspectorSection(document_controller, display_data_channel))
+                    section_specs.append((("sequence", display_data_channel, data_shape), functools.partial(SequenceInspectorSection, document_controller, display_data_channel)))
                 if data_item and data_item.is_collection:
                     if data_item.collection_dimension_count == 2 and data_item.datum_dimension_count == 1:
-                        inspector_sections.append(SliceInspectorSection(document_controller, display_data_channel))
+                        section_specs.append((("slice", display_data_channel, data_shape), functools.partial(SliceInspectorSection, document_controller, display_data_channel)))
                     else:  # default, pick
-                        inspector_sections.append(CollectionIndexInspectorSection(document_controller, display_data_channel))
-                inspector_sections.append(ComputationInspectorSection(document_controller, data_item))
+                        section_specs.append((("collection_index", display_data_channel, data_shape), functools.partial(CollectionIndexInspectorSection, document_controller, display_data_channel)))
+                section_specs.append((("computation", display_data_channel, data_item), functools.partial(ComputationInspectorSection, document_controller, data_item)))
             if len(display_item.graphics) > 0:
-                inspector_sections.append(GraphicsInspectorSection(document_controller, display_item))
-            def focus_default():
-                inspector_sections[0].info_title_label.focused = True
-                inspector_sections[0].info_title_label.request_refocus()
-            self.__focus_default = focus_default
+                section_specs.append((("graphics", display_item), functools.partial(GraphicsInspectorSection, document_controller, display_item)))
         elif display_item:
-            inspector_sections.append(InfoInspectorSection(document_controller, display_item))
+            section_specs.append((("info", display_item), functools.partial(InfoInspectorSection, document_controller, display_item)))
             for display_data_channel in display_item.display_data_channels:
                 data_item = display_data_channel.data_item
-                inspector_sections.append(DataInfoInspectorSection(document_controller, display_data_channel))
-                inspector_sections.append(SessionInspectorSection(document_controller, data_item))
-            def focus_default():
-                inspector_sections[0].info_title_label.focused = True
-                inspector_sections[0].info_title_label.request_refocus()
-            self.__focus_default = focus_default
-
-        for inspector_section in inspector_sections:
-            content_widget.add(inspector_section)
+                section_specs.append((("data_info", display_data_channel), functools.partial(DataInfoInspectorSection, document_controller, display_data_channel)))
+                section_specs.append((("session", display_data_channel, data_item), functools.partial(SessionInspectorSection, document_controller, data_item)))
+        return section_specs
 
-        content_widget.add_stretch()
+    def update_sections(self) -> None:
+        """Update the sections to those required by the display item.
 
-    def close(self) -> None:
-        self.__unbinder.close()
-        self.__unbinder = None
-        super().close()
+        Existing sections which still apply are kept in place; other sections are closed and new sections constructed.
+        """
+        content_widget = self.content_widget
+        old_sections = self.__sections
+        new_sections = list()
+        kept_sections = list()
+        old_index = 0
+        for key, make_section in self.__get_section_specs():
+            # keep the old section with the same key if it is not out of order with respect to other kept sections.
+            index = next((i for i in range(old_index, len(old_sections)) if old_sections[i][0] == key), None)
+            if index is not None:
+                section = old_sections[index][1]
+                kept_sections.append(section)
+                old_index = index + 1
+            else:
+                section = None
+            new_sections.append((key, section, make_section))
+        for key, section in old_sections:
+            if section not in kept_sections:
+                content_widget.remove(section)
+        self.__sections = list()
+        for index, (key, section, make_section) in enumerate(new_sections):
+            if section is None:
+                section = make_section()
+                content_widget.insert(section, self.__first_section_index + index)
+            self.__sections.append((key, section))
 
     def _get_inspectors(self):
         """ Return a copy of the list of inspectors. """
         return copy.copy(self.content_widget.children[:-1])
 
     def focus_default(self):
-        if self.__focus_default:
-            self.__focus_default()
+        section = self.__sections[0][1] if self.__sections else None
+        if isinstance(section, InfoInspectorSection):
+            section.info_title_label.focused = True
+            section.info_title_label.request_refocus()
 
 
 class DeclarativeImageChooserConstructor:
@@ -42,39 +42,38 @@ def nice_label(value: float, precision: int) -> str:
         return (u"{0:0." + u"{0:d}".format(precision) + "f}").format(value)
 
 
-def calculate_y_axis(uncalibrated_data_list, data_min, data_max, y_calibration, data_style):
+def calculate_data_range(uncalibrated_data) -> typing.Optional[typing.Tuple[float, float]]:
+    """Return the (min, max) of the data, or None if there is no data."""
+    if uncalibrated_data is not None and uncalibrated_data.shape[-1] > 0:
+        return numpy.amin(uncalibrated_data), numpy.amax(uncalibrated_data)
+    return None
+
+
+def calculate_y_axis(uncalibrated_data_list, data_min, data_max, y_calibration, data_style, *, uncalibrated_data_ranges=None):
+    """Return the calibrated data min, max, and ticker for the data list.
+
+    The uncalibrated_data_ranges, if passed, are the ranges of the data (see calculate_data_range) and are used instead
+    of the data list, allowing the caller to avoid recalculating the range of data which has not changed.
+    """
     y_calibration = y_calibration if y_calibration else Calibration.Calibration()
 
     min_specified = data_min is not None
     max_specified = data_max is not None
 
+    if uncalibrated_data_ranges is None and not (min_specified and max_specified):
+        uncalibrated_data_ranges = [calculate_data_range(uncalibrated_data) for uncalibrated_data in uncalibrated_data_list]
+
     if min_specified:
         uncalibrated_data_min = data_min
     else:
-        uncalibrated_data_min = None
-        for uncalibrated_data in uncalibrated_data_list:
-            if uncalibrated_data is not None and uncalibrated_data.shape[-1] > 0:
-                partial_uncalibrated_data_min = numpy.amin(uncalibrated_data)
-                if uncalibrated_data_min is not None:
-                    uncalibrated_data_min = min(uncalibrated_data_min, partial_uncalibrated_data_min)
-                else:
-                    uncalibrated_data_min = partial_uncalibrated_data_min
-        if uncalibrated_data_min is None:
-            uncalibrated_data_min = 0.0
+        partial_uncalibrated_data_mins = [data_range[0] for data_range in uncalibrated_data_ranges if data_range is not None]
+        uncalibrated_data_min = min(partial_uncalibrated_data_mins) if partial_uncalibrated_data_mins else 0.0
 
     if max_specified:
         uncalibrated_data_max = data_max
     else:
-        uncalibrated_data_max = None
-        for uncalibrated_data in uncalibrated_data_list:
-            if uncalibrated_data is not None and uncalibrated_data.shape[-1] > 0:
-                partial_uncalibrated_data_max = numpy.amax(uncalibrated_data)
-                if uncalibrated_data_max is not None:
-                    uncalibrated_data_max = max(uncalibrated_data_max, partial_uncalibrated_data_max)
-                else:
-                    uncalibrated_data_max = partial_uncalibrated_data_max
-        if uncalibrated_data_max is None:
-            uncalibrated_data_max = 0.0
+        partial_uncalibrated_data_maxs = [data_range[1] for data_range in uncalibrated_data_ranges if data_range is not None]
+        uncalibrated_data_max = max(partial_uncalibrated_data_maxs) if partial_uncalibrated_data_maxs else 0.0
 
     calibrated_data_min = y_calibration.convert_to_calibrated_value(uncalibrated_data_min)
     calibrated_data_max = y_calibration.convert_to_calibrated_value(uncalibrated_data_max)
@@ -474,7 +473,7 @@ class LineGraphCanvasItem(CanvasItem.AbstractCanvasItem):
             self.update()
 
     def set_uncalibrated_xdata(self, uncalibrated_xdata):
-        if not DataAndMetadata.is_equal(uncalibrated_xdata, self.__uncalibrated_xdata):
+        if uncalibrated_xdata is not self.__uncalibrated_xdata and not DataAndMetadata.is_equal(uncalibrated_xdata, self.__uncalibrated_xdata):
             self.__uncalibrated_xdata = uncalibrated_xdata
             self.__calibrated_xdata = None
             self.update()
@@ -540,7 +539,7 @@ class LineGraphRegionsCanvasItem(CanvasItem.AbstractCanvasItem):
             self.update()
 
     def set_calibrated_data(self, calibrated_data):
-        if not numpy.array_equal(calibrated_data, self.__calibrated_data):
+        if calibrated_data is not self.__calibrated_data and not numpy.array_equal(calibrated_data, self.__calibrated_data):
             self.__calibrated_data = calibrated_data
             self.update()
 
@@ -18,6 +18,7 @@ from nion.swift import Undo
 from nion.swift.model import DisplayItem
 from nion.swift.model import DocumentModel
 from nion.swift.model import Graphics
+from nion.swift.model import Tracing
 from nion.swift.model import Utility
 from nion.ui import CanvasItem
 from nion.utils import Geometry
@@ -106,6 +107,11 @@ class LinePlotCanvasItem(CanvasItem.LayerCanvasItem):
     the data changes, however, the plot is always redrawn. Drawing is handled by the canvas item after `update` is
     called.
 
+    Each data layer, the axes, and the graphics are separate canvas items which keep their last drawing until they are
+    updated. To avoid updating layers whose data has not changed (for instance when only one of several overlaid data
+    items is live), the scalar data, data range, and layer data are cached by the identity of their inputs; the y axis
+    is recalculated only when the combined data range or the display properties change.
+
     axis_y = AxisYFunction(data)
     layout = LayoutFunction(axis_y)
     axis_x = AxesXFunction(layout, data)
@@ -223,6 +229,12 @@ class LinePlotCanvasItem(CanvasItem.LayerCanvasItem):
         self.__graphics = list()
         self.__graphic_selection = None
 
+        # caches used by prepare_display so that layers whose data has not changed are not recalculated.
+        self.__scalar_xdata_cache = dict()  # data index -> (xdata, calibration key, scalar xdata)
+        self.__data_range_cache = dict()  # data index -> (scalar data, data range)
+        self.__layer_xdata_cache = dict()  # layer index -> (scalar xdata, data row, layer xdata)
+        self.__y_axis_cache = None  # (y axis key, y axis)
+
     def close(self):
         # call super
         with self.__closing_lock:
@@ -446,24 +458,58 @@ class LinePlotCanvasItem(CanvasItem.LayerCanvasItem):
 
         scalar_xdata_list = None
 
-        def calculate_scalar_xdata(xdata_list):
+        calibration_key = (displayed_dimensional_calibration, intensity_calibration, type(calibration_style), getattr(calibration_style, "calibration_style_id", None))
+
+        def calculate_scalar_xdata(xdata):
+            scalar_data = Image.scalar_from_array(xdata.data)
+            scalar_data = Image.convert_to_grayscale(scalar_data)
+            scalar_intensity_calibration = calibration_style.get_intensity_calibration(xdata)
+            scalar_dimensional_calibrations = calibration_style.get_dimensional_calibrations(xdata.dimensional_shape, xdata.dimensional_calibrations)
+            if displayed_dimensional_calibration.units == scalar_dimensional_calibrations[-1].units and intensity_calibration.units == scalar_intensity_calibration.units:
+                # the data needs to have an intensity scale matching intensity_calibration. convert the data to use the common scale.
+                scale = scalar_intensity_calibration.scale / intensity_calibration.scale
+                offset = (scalar_intensity_calibration.offset - intensity_calibration.offset) / intensity_calibration.scale
+                scalar_data = scalar_data * scale + offset
+                return DataAndMetadata.new_data_and_metadata(scalar_data, scalar_intensity_calibration, scalar_dimensional_calibrations)
+            return None
+
+        def calculate_scalar_xdata_list(xdata_list):
+            # reuse the scalar xdata of unchanged data. data with incompatible units is left out of the list.
+            scalar_xdata_cache = self.__scalar_xdata_cache
             scalar_xdata_list = list()
-            for xdata in xdata_list:
+            for index, xdata in enumerate(xdata_list):
                 if xdata:
-                    scalar_data = Image.scalar_from_array(xdata.data)
-                    scalar_data = Image.convert_to_grayscale(scalar_data)
-                    scalar_intensity_calibration = calibration_style.get_intensity_calibration(xdata)
-                    scalar_dimensional_calibrations = calibration_style.get_dimensional_calibrations(xdata.dimensional_shape, xdata.dimensional_calibrations)
-                    if displayed_dimensional_calibration.units == scalar_dimensional_calibrations[-1].units and intensity_calibration.units == scalar_intensity_calibration.units:
-                        # the data needs to have an intensity scale matching intensity_calibration. convert the data to use the common scale.
-                        scale = scalar_intensity_calibration.scale / intensity_calibration.scale
-                        offset = (scalar_intensity_calibration.offset - intensity_calibration.offset) / intensity_calibration.scale
-                        scalar_data = scalar_data * scale + offset
-                        scalar_xdata_list.append(DataAndMetadata.new_data_and_metadata(scalar_data, scalar_intensity_calibration, scalar_dimensional_calibrations))
+                    cached_item = scalar_xdata_cache.get(index)
+                    if cached_item and cached_item[0] is xdata and cached_item[1] == calibration_key:
+                        scalar_xdata = cached_item[2]
+                    else:
+                        scalar_xdata = calculate_scalar_xdata(xdata)
+                        scalar_xdata_cache[index] = (xdata, calibration_key, scalar_xdata)
+                    if scalar_xdata:
+                        scalar_xdata_list.append(scalar_xdata)
                 else:
+                    scalar_xdata_cache.pop(index, None)
                     scalar_xdata_list.append(None)
+            for index in [index for index in scalar_xdata_cache.keys() if index >= len(xdata_list)]:
+                scalar_xdata_cache.pop(index)
             return scalar_xdata_list
 
+        def calculate_data_ranges(scalar_data_list):
+            # reuse the range of unchanged data.
+            data_range_cache = self.__data_range_cache
+            data_ranges = list()
+            for index, scalar_data in enumerate(scalar_data_list):
+                cached_item = data_range_cache.get(index)
+                if cached_item and cached_item[0] is scalar_data:
+                    data_range = cached_item[1]
+                else:
+                    data_range = LineGraphCanvasItem.calculate_data_range(scalar_data)
+                    data_range_cache[index] = (scalar_data, data_range)
+                data_ranges.append(data_range)
+            for index in [index for index in data_range_cache.keys() if index >= len(scalar_data_list)]:
+                data_range_cache.pop(index)
+            return data_ranges
+
         data_scale = self.__data_scale
         xdata_list = self.__xdata_list
 
@@ -473,16 +519,23 @@ class LinePlotCanvasItem(CanvasItem.LayerCanvasItem):
             right_channel = right_channel if right_channel is not None else data_scale
             left_channel, right_channel = min(left_channel, right_channel), max(left_channel, right_channel)
 
-            scalar_data_list = None
+            data_ranges = None
             if y_min is None or y_max is None and len(xdata_list) > 0:
-                scalar_xdata_list = calculate_scalar_xdata(xdata_list)
-                scalar_data_list = [xdata.data if xdata else None for xdata in scalar_xdata_list]
-            calibrated_data_min, calibrated_data_max, y_ticker = LineGraphCanvasItem.calculate_y_axis(scalar_data_list, y_min, y_max, intensity_calibration, y_style)
+                scalar_xdata_list = calculate_scalar_xdata_list(xdata_list)
+                data_ranges = calculate_data_ranges([xdata.data if xdata else None for xdata in scalar_xdata_list])
+            # the y axis only needs to be recalculated if the combined data range or the display properties change.
+            data_range_key = (min((data_range[0] for data_range in data_ranges if data_range), default=None), max((data_range[1] for data_range in data_ranges if data_range), default=None)) if data_ranges is not None else None
+            y_axis_key = (data_range_key, y_min, y_max, intensity_calibration, y_style)
+            if self.__y_axis_cache and self.__y_axis_cache[0] == y_axis_key:
+                calibrated_data_min, calibrated_data_max, y_ticker = self.__y_axis_cache[1]
+            else:
+                calibrated_data_min, calibrated_data_max, y_ticker = LineGraphCanvasItem.calculate_y_axis(None, y_min, y_max, intensity_calibration, y_style, uncalibrated_data_ranges=data_ranges or list())
+                self.__y_axis_cache = (y_axis_key, (calibrated_data_min, calibrated_data_max, y_ticker))
             axes = LineGraphCanvasItem.LineGraphAxes(data_scale, calibrated_data_min, calibrated_data_max, left_channel, right_channel, displayed_dimensional_calibration, intensity_calibration, y_style, y_ticker)
 
             if scalar_xdata_list is None:
                 if len(xdata_list) > 0:
-                    scalar_xdata_list = calculate_scalar_xdata(xdata_list)
+                    scalar_xdata_list = calculate_scalar_xdata_list(xdata_list)
                 else:
                     scalar_xdata_list = list()
 
@@ -523,8 +576,15 @@ class LinePlotCanvasItem(CanvasItem.LayerCanvasItem):
                             intensity_calibration = scalar_xdata.intensity_calibration
                             displayed_dimensional_calibration = scalar_xdata.dimensional_calibrations[-1]
                             if scalar_xdata.is_data_2d:
-                                scalar_data = scalar_xdata.data[data_row:data_row + 1, :].reshape((scalar_xdata.dimensional_shape[-1],))
-                                scalar_xdata = DataAndMetadata.new_data_and_metadata(scalar_data, intensity_calibration, [displayed_dimensional_calibration])
+                                # reuse the row of unchanged data so the layer sees the identical xdata and is not redrawn.
+                                cached_item = self.__layer_xdata_cache.get(index)
+                                if cached_item and cached_item[0] is scalar_xdata and cached_item[1] == data_row:
+                                    scalar_xdata = cached_item[2]
+                                else:
+                                    row_scalar_xdata = scalar_xdata
+                                    scalar_data = scalar_xdata.data[data_row:data_row + 1, :].reshape((scalar_xdata.dimensional_shape[-1],))
+                                    scalar_xdata = DataAndMetadata.new_data_and_metadata(scalar_data, intensity_calibration, [displayed_dimensional_calibration])
+                                    self.__layer_xdata_cache[index] = (row_scalar_xdata, data_row, scalar_xdata)
                         line_graph_canvas_item = self.__line_graph_stack.canvas_items[display_layer_count - (index + 1)]
                         line_graph_canvas_item.set_fill_color(fill_color)
                         line_graph_canvas_item.set_stroke_color(stroke_color)
@@ -572,7 +632,13 @@ class LinePlotCanvasItem(CanvasItem.LayerCanvasItem):
         self.unregister_prepare_canvas_item(self)
 
     def prepare_render(self):
-        self.prepare_display()
+        if Tracing.is_enabled():
+            # only look up the frame of the first layer when it is recorded.
+            display_values = next((display_values for display_values in self.__display_values_list if display_values), None) if self.__display_values_list else None
+            with Tracing.span("prepare display", "paint", frame=Tracing.frame_id(display_values.data_and_metadata if display_values else None)):
+                self.prepare_display()
+        else:
+            self.prepare_display()
 
     def _repaint(self, drawing_context):
         super()._repaint(drawing_context)
@@ -6,6 +6,8 @@ import typing
 
 _ = gettext.gettext
 
+_DEFAULT = object()
+
 
 class UndoableCommand(abc.ABC):
 
@@ -66,6 +68,15 @@ class UndoableCommand(abc.ABC):
         self._redo()
         self._set_modified_state(self.__new_modified_state)
 
+    @property
+    def memory_footprint(self) -> int:
+        """Return the approximate number of bytes held in memory by this command."""
+        return self._get_memory_footprint()
+
+    def _get_memory_footprint(self) -> int:
+        # override to report memory held for undo/redo, such as property snapshots of removed items.
+        return 0
+
     def can_merge(self, command: "UndoableCommand") -> bool:
         return False
 
@@ -96,6 +107,35 @@ class UndoableCommand(abc.ABC):
         self._undo()
 
 
+class UndeleteLogCommand(UndoableCommand):
+    """An undoable command which keeps undelete logs to restore the items it removes.
+
+    Subclasses append the undelete logs of removed items to _undelete_logs, whether the items are removed when the
+    command is performed or when it is undone, and call _undelete_all to restore them. The logs are closed with the
+    command and count toward its memory footprint.
+    """
+
+    def __init__(self, title: str, **kwargs):
+        super().__init__(title, **kwargs)
+        self._undelete_logs = list()
+
+    def close(self):
+        for undelete_log in self._undelete_logs:
+            undelete_log.close()
+        self._undelete_logs = None
+        super().close()
+
+    def _get_memory_footprint(self) -> int:
+        return sum(undelete_log.memory_footprint for undelete_log in self._undelete_logs)
+
+    def _undelete_all(self, document_model) -> None:
+        """Restore the removed items, most recently removed first, and close their logs."""
+        for undelete_log in reversed(self._undelete_logs):
+            document_model.undelete_all(undelete_log)
+            undelete_log.close()
+        self._undelete_logs.clear()
+
+
 class AggregateUndoableCommand(UndoableCommand):
 
     def __init__(self, title: str, children: typing.Sequence[UndoableCommand]=None):
@@ -119,6 +159,9 @@ class AggregateUndoableCommand(UndoableCommand):
     def _get_modified_state(self):
         return self.__commands[-1]._get_modified_state()
 
+    def _get_memory_footprint(self) -> int:
+        return sum(command.memory_footprint for command in self.__commands)
+
     def _set_modified_state(self, modified_state) -> None:
         self.__commands[-1]._set_modified_state(modified_state)
 
@@ -136,11 +179,43 @@ class AggregateUndoableCommand(UndoableCommand):
 
 
 class UndoStack:
+    """Undo and redo stacks of undoable commands.
+
+    The optional memory limit (bytes) bounds the memory held by the commands; the oldest undo commands are dropped when
+    a push exceeds it. The most recent command is always kept. New stacks use the class attribute default_memory_limit
+    unless a limit is passed; None for unlimited.
+    """
+
+    default_memory_limit = None
 
-    def __init__(self):
+    def __init__(self, memory_limit: typing.Optional[int] = _DEFAULT):
         # undo/redo stack. next item is at the end.
         self.__undo_stack = list()
         self.__redo_stack = list()
+        self.__memory_limit = self.default_memory_limit if memory_limit is _DEFAULT else memory_limit
+
+    @property
+    def memory_limit(self) -> typing.Optional[int]:
+        return self.__memory_limit
+
+    @memory_limit.setter
+    def memory_limit(self, value: typing.Optional[int]) -> None:
+        self.__memory_limit = value
+        self.__enforce_memory_limit()
+
+    @property
+    def memory_footprint(self) -> int:
+        """Return the approximate number of bytes held in memory by the undo and redo commands."""
+        return sum(command.memory_footprint for command in self.__undo_stack + self.__redo_stack)
+
+    def __enforce_memory_limit(self) -> None:
+        memory_limit = self.__memory_limit
+        if memory_limit is not None:
+            memory_footprint = self.memory_footprint
+            while len(self.__undo_stack) > 1 and memory_footprint > memory_limit:
+                undo_command = self.__undo_stack.pop(0)
+                memory_footprint -= undo_command.memory_footprint
+                undo_command.close()
 
     @property
     def can_redo(self) -> bool:
@@ -209,3 +284,4 @@ class UndoStack:
             self.__undo_stack.append(undo_command)
         while len(self.__redo_stack) > 0:
             self.__redo_stack.pop().close()
+        self.__enforce_memory_limit()
@@ -0,0 +1,298 @@
+"""
+Headless batch processing: apply a chain of registered processing descriptions to many inputs.
+
+Inputs are data files readable by the import/export handlers, directories of such files, and file based projects. Each
+input is processed on a worker thread in its own memory based document model, so inputs are processed in parallel and
+no user interface is required. Results are written to files in an output directory and/or added to a target project.
+"""
+
+# standard libraries
+import concurrent.futures
+import contextlib
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+import time
+import typing
+import uuid
+
+# third party libraries
+# None
+
+# local libraries
+from nion.data import DataAndMetadata
+from nion.swift import Facade
+from nion.swift.model import Cache
+from nion.swift.model import DataItem
+from nion.swift.model import DocumentModel
+from nion.swift.model import FileStorageSystem
+from nion.swift.model import ImportExportManager
+from nion.swift.model import PlugInManager
+from nion.swift.model import Profile
+
+
+Facade.initialize()
+
+PROJECT_EXTENSION = ".nsproj"
+
+__plug_ins_loaded = False
+
+
+class BatchError(Exception):
+    pass
+
+
+class BatchInput:
+    """An input of the batch. The load function returns a list of (name, xdata) tuples, one for each data set."""
+
+    def __init__(self, name: str, load_fn: typing.Callable[[], typing.List[typing.Tuple[str, DataAndMetadata.DataAndMetadata]]]):
+        self.name = name
+        self.load_fn = load_fn
+
+
+class BatchItemResult:
+    """The result of processing one data set of an input."""
+
+    def __init__(self, name: str, elapsed: float, nbytes: int = 0, *, error: str = None, output_path: pathlib.Path = None,
+                 xdata: DataAndMetadata.DataAndMetadata = None):
+        self.name = name
+        self.elapsed = elapsed
+        self.nbytes = nbytes
+        self.error = error
+        self.output_path = output_path
+        self.xdata = xdata
+
+    @property
+    def is_ok(self) -> bool:
+        return self.error is None
+
+    def __str__(self):
+        if not self.is_ok:
+            return f"{self.name}: FAILED {self.error}"
+        data_rate = self.nbytes / self.elapsed / 1E6 if self.elapsed > 0 else 0.0
+        return f"{self.name}: {self.elapsed * 1000:.0f} ms, {data_rate:.1f} MB/s"
+
+
+class BatchReport:
+    """The results of a batch, in the order they were completed, and the elapsed wall clock time."""
+
+    def __init__(self, results: typing.Sequence[BatchItemResult], elapsed: float):
+        self.results = list(results)
+        self.elapsed = elapsed
+
+    @property
+    def failed_count(self) -> int:
+        return len([result for result in self.results if not result.is_ok])
+
+    @property
+    def throughput(self) -> float:
+        """Return the number of data sets processed per second of wall clock time."""
+        return len(self.results) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        nbytes = sum(result.nbytes for result in self.results if result.is_ok)
+        data_rate = nbytes / self.elapsed / 1E6 if self.elapsed > 0 else 0.0
+        return "{} items in {:.2f} s ({:.2f} items/s, {:.1f} MB/s); {} failed.".format(
+            len(self.results), self.elapsed, self.throughput, data_rate, self.failed_count)
+
+
+def load_plug_ins() -> None:
+    """Load the installed plug-in packages, which may add readers, writers and processing, once.
+
+    There is no user interface, so plug-ins in the PlugIns directories of the data and document locations are not
+    loaded.
+    """
+    global __plug_ins_loaded
+    if not __plug_ins_loaded:
+        PlugInManager.load_plug_ins(None, None)
+        __plug_ins_loaded = True
+
+
+@contextlib.contextmanager
+def open_project(project_path: pathlib.Path, *, create: bool = False) -> typing.Iterator[DocumentModel.DocumentModel]:
+    """Open a file based project in a document model using a temporary profile, creating the project if requested."""
+    project_path = pathlib.Path(project_path)
+    if not project_path.exists():
+        if not create:
+            raise BatchError(f"Project {project_path} does not exist.")
+        project_path.parent.mkdir(parents=True, exist_ok=True)
+        project_path.write_text(json.dumps({"version": FileStorageSystem.PROJECT_VERSION, "uuid": str(uuid.uuid4()), "project_data_folders": [project_path.stem + " Data"]}), "utf-8")
+    profile_directory = pathlib.Path(tempfile.mkdtemp(prefix="nionswift-batch-"))
+    try:
+        profile_path = profile_directory / "Profile.nsprof"
+        profile_path.write_text(json.dumps({"version": FileStorageSystem.PROFILE_VERSION, "uuid": str(uuid.uuid4())}), "utf-8")
+        storage_cache = Cache.DbStorageCache(profile_directory / "ProfileCache.cache")
+        storage_system = FileStorageSystem.FilePersistentStorageSystem(profile_path)
+        storage_system.load_properties()
+        profile = Profile.Profile(storage_system=storage_system, storage_cache=storage_cache, auto_project=False)
+        project_reference = profile.add_project_index(project_path)
+        profile.work_project_reference_uuid = uuid.UUID(project_reference["uuid"])
+        profile.storage_cache = storage_cache
+        profile.storage_system = storage_system
+        document_model = DocumentModel.DocumentModel(profile=profile)
+        try:
+            yield document_model
+        finally:
+            document_model.close()  # also closes the storage cache
+    finally:
+        shutil.rmtree(profile_directory, ignore_errors=True)
+
+
+def get_file_inputs(path: pathlib.Path) -> typing.List[BatchInput]:
+    """Return the inputs for a data file or for the readable data files in a directory, sorted by name."""
+    path = pathlib.Path(path)
+    if path.is_dir():
+        # the standard image readers (png, jpg, etc.) load the file using the user interface.
+        readers = ImportExportManager.ImportExportManager().get_readers()
+        extensions = {extension for reader in readers if not isinstance(reader, ImportExportManager.StandardImportExportHandler) for extension in reader.extensions}
+        file_paths = sorted(file_path for file_path in path.iterdir() if file_path.is_file() and file_path.suffix[1:].lower() in extensions)
+    elif path.is_file():
+        file_paths = [path]
+    else:
+        raise BatchError(f"Input {path} does not exist.")
+
+    def load(file_path: pathlib.Path) -> typing.List[typing.Tuple[str, DataAndMetadata.DataAndMetadata]]:
+        data_items = ImportExportManager.ImportExportManager().read_data_items(None, str(file_path))
+        if data_items is None:
+            raise BatchError(f"No reader for {file_path.name}.")
+        names = [file_path.stem] if len(data_items) == 1 else [f"{file_path.stem}-{index}" for index in range(len(data_items))]
+        return [(name, data_item.xdata) for name, data_item in zip(names, data_items)]
+
+    return [BatchInput(file_path.stem, (lambda file_path=file_path: load(file_path))) for file_path in file_paths]
+
+
+def get_project_inputs(document_model: DocumentModel.DocumentModel) -> typing.List[BatchInput]:
+    """Return an input for each data item of an open project. The data is loaded one item at a time."""
+    lock = threading.RLock()
+
+    def load(data_item: DataItem.DataItem, name: str) -> typing.List[typing.Tuple[str, DataAndMetadata.DataAndMetadata]]:
+        with lock:
+            with data_item.data_ref() as data_ref:
+                # keep the data independently of the data item, which unloads it when no longer referenced.
+                xdata = data_item.xdata.clone_with_data(data_ref.data) if data_ref.data is not None else None
+        return [(name, xdata)] if xdata is not None else list()
+
+    inputs = list()
+    for index, data_item in enumerate(document_model.data_items):
+        name = f"{index:04d} {data_item.title}" if data_item.title else f"{index:04d}"
+        inputs.append(BatchInput(name, (lambda data_item=data_item, name=name: load(data_item, name))))
+    return inputs
+
+
+def make_processing(document_model: DocumentModel.DocumentModel, processing_id: str, display_item) -> typing.Optional[DataItem.DataItem]:
+    """Apply the processing to the display item, using the specific document model method when there is one.
+
+    The specific methods (get_crop_new, get_line_profile_new, etc.) create the regions the processing requires.
+    """
+    if processing_id not in DocumentModel.DocumentModel._processing_descriptions:
+        raise BatchError(f"Unknown processing '{processing_id}'.")
+    make_fn = getattr(document_model, "get_" + processing_id.replace("-", "_") + "_new", None)
+    if callable(make_fn):
+        return make_fn(display_item)
+    return document_model.get_processing_new(processing_id, display_item)
+
+
+def process_xdata(xdata: DataAndMetadata.DataAndMetadata, processing_ids: typing.Sequence[str], output_path: pathlib.Path = None) -> DataAndMetadata.DataAndMetadata:
+    """Apply the processing chain to the data in a new memory based document model and return the result.
+
+    If output_path is passed, also write the result using the writer for its extension.
+    """
+    document_model = DocumentModel.DocumentModel()
+    with contextlib.closing(document_model):
+        data_item = DataItem.new_data_item(xdata)
+        document_model.append_data_item(data_item)
+        for processing_id in processing_ids:
+            display_item = document_model.get_display_item_for_data_item(data_item)
+            data_item = make_processing(document_model, processing_id, display_item)
+            if not data_item:
+                raise BatchError(f"Processing '{processing_id}' cannot be applied to {xdata.data_shape} data.")
+            # the dispatcher is not started, so the computations run on this thread.
+            document_model.recompute_all()
+            computation = document_model.get_data_item_computation(data_item)
+            if computation and computation.error_text:
+                raise BatchError(f"Processing '{processing_id}' failed: {computation.error_text}")
+            if not data_item.has_data:
+                raise BatchError(f"Processing '{processing_id}' produced no data.")
+        if output_path:
+            ImportExportManager.ImportExportManager().write_display_item(None, document_model.get_display_item_for_data_item(data_item), str(output_path))
+        # keep the result independently of the document model, which unloads the data when closed.
+        with data_item.data_ref() as data_ref:
+            return data_item.xdata.clone_with_data(data_ref.data)
+
+
+def get_output_extensions() -> typing.List[str]:
+    """Return the extensions of the writers usable without a user interface.
+
+    The standard image writers (png, jpg, etc.) are excluded since they render the display using the user interface.
+    """
+    writers = ImportExportManager.ImportExportManager().get_writers()
+    return sorted({extension for writer in writers if not isinstance(writer, ImportExportManager.StandardImportExportHandler) for extension in writer.extensions})
+
+
+def run_batch(input_paths: typing.Sequence[pathlib.Path], processing_ids: typing.Sequence[str], *,
+              output_directory: pathlib.Path = None, output_extension: str = "ndata1", project_path: pathlib.Path = None,
+              max_workers: int = None, log_fn: typing.Callable[[str], None] = None) -> BatchReport:
+    """Apply the processing chain to each data set of the inputs on a pool of worker threads.
+
+    Inputs ending with the project extension are opened as projects; other inputs are data files or directories. The
+    results are written to the output directory with the output extension and/or added to the project at project_path,
+    which is created if needed. log_fn is called on the calling thread with each result as it completes.
+    """
+    for processing_id in processing_ids:
+        if processing_id not in DocumentModel.DocumentModel._processing_descriptions:
+            raise BatchError(f"Unknown processing '{processing_id}'.")
+    if output_directory and output_extension not in get_output_extensions():
+        raise BatchError(f"No writer for '{output_extension}' without a user interface; use one of {', '.join(get_output_extensions())}.")
+
+    with contextlib.ExitStack() as exit_stack:
+        inputs = list()
+        for input_path in input_paths:
+            input_path = pathlib.Path(input_path)
+            if input_path.suffix == PROJECT_EXTENSION:
+                inputs.extend(get_project_inputs(exit_stack.enter_context(open_project(input_path))))
+            else:
+                inputs.extend(get_file_inputs(input_path))
+
+        target_document_model = exit_stack.enter_context(open_project(project_path, create=True)) if project_path else None
+
+        if output_directory:
+            pathlib.Path(output_directory).mkdir(parents=True, exist_ok=True)
+
+        def process_input(batch_input: BatchInput) -> typing.List[BatchItemResult]:
+            start_time = time.perf_counter()
+            try:
+                named_xdata_list = batch_input.load_fn()
+            except Exception as e:
+                return [BatchItemResult(batch_input.name, time.perf_counter() - start_time, error=str(e) or type(e).__name__)]
+            results = list()
+            for name, xdata in named_xdata_list:
+                output_path = pathlib.Path(output_directory) / f"{name}.{output_extension}" if output_directory else None
+                try:
+                    result_xdata = process_xdata(xdata, processing_ids, output_path)
+                    results.append(BatchItemResult(name, time.perf_counter() - start_time, xdata.data.nbytes, output_path=output_path,
+                                                   xdata=result_xdata if target_document_model else None))
+                except Exception as e:
+                    results.append(BatchItemResult(name, time.perf_counter() - start_time, error=str(e) or type(e).__name__))
+                start_time = time.perf_counter()
+            return results
+
+        results = list()
+        start_time = time.perf_counter()
+        max_workers = max_workers or min(os.cpu_count() or 1, 8)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch") as executor:
+            futures = [executor.submit(process_input, batch_input) for batch_input in inputs]
+            for future in concurrent.futures.as_completed(futures):
+                for result in future.result():
+                    # the target project is only changed from the calling thread.
+                    if target_document_model and result.xdata is not None:
+                        data_item = DataItem.new_data_item(result.xdata)
+                        data_item.title = f"{result.name} ({', '.join(processing_ids)})"
+                        target_document_model.append_data_item(data_item)
+                        result.xdata = None
+                    results.append(result)
+                    if callable(log_fn):
+                        log_fn(str(result))
+        return BatchReport(results, time.perf_counter() - start_time)
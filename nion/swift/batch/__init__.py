@@ -0,0 +1,4 @@
+"""Headless batch processing of data files and projects.
+
+Run a processing chain with ``python -m nion.swift.batch``; see ``--help`` for inputs, outputs and parallelism.
+"""
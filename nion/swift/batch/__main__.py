@@ -0,0 +1,66 @@
+"""
+Apply a processing chain to data files or projects from the command line, without a user interface.
+
+    python -m nion.swift.batch crop fft line-profile --input acquired/ --output-dir results/
+    python -m nion.swift.batch sequence-align --input session.nsproj --project results.nsproj --workers 16
+
+The exit status is 1 if any item fails. Installed plug-in packages are loaded unless --no-plug-ins is passed; plug-ins in
+the PlugIns directories of the user interface data and document locations are not loaded.
+"""
+
+# standard libraries
+import argparse
+import pathlib
+import sys
+
+# third party libraries
+# None
+
+# local libraries
+from nion.swift.batch import Batch
+from nion.swift.model import DocumentModel
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m nion.swift.batch", description="Apply a processing chain to data files or projects.",
+                                     epilog="Installed plug-in packages (e.g. nionswift-io for DM and TIFF files) are loaded; plug-ins in "
+                                            "PlugIns directories are not, since there is no user interface. Image formats (png, jpg, etc.) "
+                                            "cannot be written, since they are rendered by the user interface.")
+    parser.add_argument("processing", nargs="*", help="processing ids to apply in order, e.g. crop fft line-profile")
+    parser.add_argument("--list", action="store_true", help="list the processing ids and exit")
+    parser.add_argument("--input", type=pathlib.Path, action="append", default=list(), help="data file, directory of data files, or project (repeatable)")
+    parser.add_argument("--output-dir", type=pathlib.Path, help="write the results to files in this directory")
+    parser.add_argument("--format", default="ndata1", help="extension of the result files (default ndata1; see --list for the available formats)")
+    parser.add_argument("--project", type=pathlib.Path, help="add the results to this project, creating it if needed")
+    parser.add_argument("--workers", type=int, help="number of inputs processed in parallel (default number of cpus, up to 8)")
+    parser.add_argument("--no-plug-ins", action="store_true", help="do not load the installed plug-in packages")
+    args = parser.parse_args(argv)
+
+    if not args.no_plug_ins:
+        Batch.load_plug_ins()
+
+    if args.list:
+        for processing_id, processing_description in sorted(DocumentModel.DocumentModel._processing_descriptions.items()):
+            print(f"{processing_id:24} {processing_description.get('title', str())}")
+        print(f"Formats: {', '.join(Batch.get_output_extensions())}")
+        return 0
+
+    if not args.processing or not args.input:
+        parser.error("at least one processing id and one --input are required")
+
+    if not args.output_dir and not args.project:
+        parser.error("one of --output-dir or --project is required")
+
+    try:
+        report = Batch.run_batch(args.input, args.processing, output_directory=args.output_dir, output_extension=args.format,
+                                 project_path=args.project, max_workers=args.workers, log_fn=print)
+    except Batch.BatchError as e:
+        print(f"Error: {e}")
+        return 1
+
+    print(report.summary())
+    return 1 if report.failed_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""
+Benchmark harness: configuration, timing and memory measurement, and baseline comparison.
+
+A benchmark is a subclass of Benchmark registered with the register decorator. The harness calls setup once, then
+times run repeatedly, then measures the peak memory of one additional run, then calls teardown. Only run is measured.
+"""
+
+# standard libraries
+import gc
+import json
+import pathlib
+import platform
+import statistics
+import time
+import tracemalloc
+import typing
+
+# third party libraries
+# None
+
+# local libraries
+# None
+
+
+RESULTS_VERSION = 1
+
+
+class BenchmarkConfiguration:
+    """Describe the size of the synthetic projects and data used by the benchmarks.
+
+    Sizes are chosen from the named presets and may be overridden individually.
+    """
+
+    presets = {
+        "tiny": {"item_count": 4, "image_size": 64, "line_plot_length": 1024, "frame_count": 4, "repeat": 1},
+        "small": {"item_count": 20, "image_size": 512, "line_plot_length": 16384, "frame_count": 20, "repeat": 5},
+        "medium": {"item_count": 100, "image_size": 1024, "line_plot_length": 262144, "frame_count": 50, "repeat": 5},
+        "large": {"item_count": 500, "image_size": 2048, "line_plot_length": 1048576, "frame_count": 100, "repeat": 3},
+    }
+
+    def __init__(self, size: str = "small", **kwargs):
+        if size not in self.presets:
+            raise ValueError(f"Unknown benchmark size '{size}'; expected one of {', '.join(self.presets.keys())}.")
+        self.size = size
+        values = dict(self.presets[size])
+        for key, value in kwargs.items():
+            if key not in values:
+                raise ValueError(f"Unknown benchmark configuration key '{key}'.")
+            if value is not None:
+                values[key] = int(value)
+        self.item_count = values["item_count"]
+        self.image_size = values["image_size"]
+        self.line_plot_length = values["line_plot_length"]
+        self.frame_count = values["frame_count"]
+        self.repeat = values["repeat"]
+
+    def to_dict(self) -> typing.Dict:
+        return {"size": self.size, "item_count": self.item_count, "image_size": self.image_size,
+                "line_plot_length": self.line_plot_length, "frame_count": self.frame_count, "repeat": self.repeat}
+
+
+class Benchmark:
+    """Base class for benchmarks. Subclasses define name and override setup, run, and teardown."""
+
+    name = None
+
+    def __init__(self, configuration: BenchmarkConfiguration):
+        self.configuration = configuration
+
+    def setup(self) -> None:
+        pass
+
+    def run(self) -> None:
+        raise NotImplementedError()
+
+    def teardown(self) -> None:
+        pass
+
+
+benchmark_classes = dict()  # type: typing.Dict[str, typing.Type[Benchmark]]
+
+
+def register(benchmark_class: typing.Type[Benchmark]) -> typing.Type[Benchmark]:
+    """Register the benchmark class under its name. Usable as a class decorator."""
+    assert benchmark_class.name and benchmark_class.name not in benchmark_classes
+    benchmark_classes[benchmark_class.name] = benchmark_class
+    return benchmark_class
+
+
+class BenchmarkResult:
+    """The timings (seconds) and peak traced memory (bytes) of one benchmark."""
+
+    def __init__(self, name: str, times: typing.Sequence[float], peak_memory: int):
+        self.name = name
+        self.times = list(times)
+        self.peak_memory = peak_memory
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    @property
+    def minimum(self) -> float:
+        return min(self.times)
+
+    def to_dict(self) -> typing.Dict:
+        return {"times": self.times, "median": self.median, "min": self.minimum, "peak_memory": self.peak_memory}
+
+    @classmethod
+    def from_dict(cls, name: str, d: typing.Mapping) -> "BenchmarkResult":
+        return cls(name, d.get("times", [d.get("median", 0.0)]), d.get("peak_memory", 0))
+
+
+def run_benchmark(benchmark_class: typing.Type[Benchmark], configuration: BenchmarkConfiguration) -> BenchmarkResult:
+    """Run the benchmark class with the configuration and return its result.
+
+    Timings are taken without memory tracing since tracing slows allocation heavy code considerably. The memory peak is
+    measured during one extra, traced run.
+    """
+    benchmark = benchmark_class(configuration)
+    benchmark.setup()
+    try:
+        times = list()
+        for i in range(max(configuration.repeat, 1)):
+            gc.collect()
+            start = time.perf_counter()
+            benchmark.run()
+            times.append(time.perf_counter() - start)
+        gc.collect()
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        if hasattr(tracemalloc, "reset_peak"):  # python 3.9
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.clear_traces()
+        base_memory = tracemalloc.get_traced_memory()[0]
+        benchmark.run()
+        peak_memory = max(tracemalloc.get_traced_memory()[1] - base_memory, 0)
+        if not was_tracing:
+            tracemalloc.stop()
+        return BenchmarkResult(benchmark_class.name, times, peak_memory)
+    finally:
+        benchmark.teardown()
+
+
+def run_benchmarks(configuration: BenchmarkConfiguration, names: typing.Sequence[str] = None, log_fn: typing.Callable[[str], None] = None) -> typing.Dict[str, BenchmarkResult]:
+    """Run the named benchmarks (all registered benchmarks if names is None) and return results keyed by name."""
+    results = dict()
+    for name in names if names is not None else sorted(benchmark_classes.keys()):
+        if name not in benchmark_classes:
+            raise ValueError(f"Unknown benchmark '{name}'.")
+        result = run_benchmark(benchmark_classes[name], configuration)
+        results[name] = result
+        if log_fn:
+            log_fn(f"{name:32} median {result.median * 1000:10.2f} ms  min {result.minimum * 1000:10.2f} ms  peak {result.peak_memory / 1024 / 1024:8.1f} MB")
+    return results
+
+
+def results_to_dict(results: typing.Mapping[str, BenchmarkResult], configuration: BenchmarkConfiguration) -> typing.Dict:
+    return {
+        "version": RESULTS_VERSION,
+        "configuration": configuration.to_dict(),
+        "platform": {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()},
+        "results": {name: result.to_dict() for name, result in results.items()},
+    }
+
+
+def write_results(path: pathlib.Path, results: typing.Mapping[str, BenchmarkResult], configuration: BenchmarkConfiguration) -> None:
+    with path.open("w") as fp:
+        json.dump(results_to_dict(results, configuration), fp, indent=2)
+
+
+def read_results(path: pathlib.Path) -> typing.Tuple[typing.Dict[str, BenchmarkResult], typing.Dict]:
+    """Return the results and the configuration dict stored in the results file."""
+    with path.open("r") as fp:
+        d = json.load(fp)
+    if d.get("version", 0) > RESULTS_VERSION:
+        raise ValueError(f"Benchmark results version {d.get('version')} is newer than supported ({RESULTS_VERSION}).")
+    results = {name: BenchmarkResult.from_dict(name, result_d) for name, result_d in d.get("results", dict()).items()}
+    return results, d.get("configuration", dict())
+
+
+class Regression:
+    """A measurement that exceeds its baseline by more than the tolerance."""
+
+    def __init__(self, name: str, measurement: str, baseline_value: float, value: float):
+        self.name = name
+        self.measurement = measurement
+        self.baseline_value = baseline_value
+        self.value = value
+
+    @property
+    def ratio(self) -> float:
+        return self.value / self.baseline_value if self.baseline_value else float("inf")
+
+    def __str__(self):
+        return f"{self.name}: {self.measurement} {self.value:.6g} vs baseline {self.baseline_value:.6g} ({self.ratio:.2f}x)"
+
+
+def compare_results(results: typing.Mapping[str, BenchmarkResult], baseline: typing.Mapping[str, BenchmarkResult], tolerance: float = 0.2, memory_tolerance: float = None) -> typing.List[Regression]:
+    """Compare results against the baseline and return the regressions.
+
+    A timing regresses when its median exceeds the baseline median by more than the tolerance fraction; the memory peak
+    likewise with memory_tolerance (defaulting to tolerance). Benchmarks missing from either side are ignored.
+    """
+    memory_tolerance = tolerance if memory_tolerance is None else memory_tolerance
+    regressions = list()
+    for name, result in results.items():
+        baseline_result = baseline.get(name)
+        if baseline_result is None:
+            continue
+        if result.median > baseline_result.median * (1.0 + tolerance):
+            regressions.append(Regression(name, "median time", baseline_result.median, result.median))
+        if baseline_result.peak_memory and result.peak_memory > baseline_result.peak_memory * (1.0 + memory_tolerance):
+            regressions.append(Regression(name, "peak memory", baseline_result.peak_memory, result.peak_memory))
+    return regressions
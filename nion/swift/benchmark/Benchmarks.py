@@ -0,0 +1,324 @@
+"""
+Benchmarks for the core hot paths, run headless against synthetic projects and data.
+
+Importing this module registers the benchmarks with the harness in Benchmark.
+"""
+
+# standard libraries
+import contextlib
+import datetime
+import json
+import pathlib
+import shutil
+import tempfile
+import uuid
+
+# third party libraries
+import numpy
+
+# local libraries
+from nion.data import Calibration
+from nion.data import DataAndMetadata
+from nion.swift import Facade
+from nion.swift import LineGraphCanvasItem
+from nion.swift.benchmark import Benchmark
+from nion.swift.model import Cache
+from nion.swift.model import DataItem
+from nion.swift.model import DocumentModel
+from nion.swift.model import FileStorageSystem
+from nion.swift.model import HardwareSource
+from nion.swift.model import HDF5Handler
+from nion.swift.model import NDataHandler
+from nion.swift.model import Profile
+from nion.ui import DrawingContext
+
+
+Facade.initialize()
+
+
+class FileProfileContext:
+    """Manage a profile and a single file based project in a temporary directory."""
+
+    def __init__(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp(prefix="nionswift-benchmark-"))
+        self.profile_path = self.directory / "Profile.nsprof"
+        self.project_path = self.directory / "Project.nsproj"
+        self.cache_path = self.directory / "ProfileCache.cache"
+        self.profile_path.write_text(json.dumps({"version": FileStorageSystem.PROFILE_VERSION, "uuid": str(uuid.uuid4())}), "utf-8")
+        self.project_path.write_text(json.dumps({"version": FileStorageSystem.PROJECT_VERSION, "uuid": str(uuid.uuid4()), "project_data_folders": ["Data"]}), "utf-8")
+        self.__is_project_added = False
+
+    def create_profile(self) -> Profile.Profile:
+        storage_cache = Cache.DbStorageCache(self.cache_path)
+        storage_system = FileStorageSystem.FilePersistentStorageSystem(self.profile_path)
+        storage_system.load_properties()
+        profile = Profile.Profile(storage_system=storage_system, storage_cache=storage_cache, auto_project=False)
+        if not self.__is_project_added:
+            profile.add_project_index(self.project_path)
+            profile.work_project_reference_uuid = uuid.UUID(profile.project_references[0].get("uuid"))
+            self.__is_project_added = True
+        profile.storage_cache = storage_cache
+        profile.storage_system = storage_system
+        return profile
+
+    def close(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+@Benchmark.register
+class ProjectLoadBenchmark(Benchmark.Benchmark):
+    """Load a file based project of item_count data items, including the data of each item."""
+
+    name = "project_load"
+
+    def setup(self):
+        self.__profile_context = FileProfileContext()
+        document_model = DocumentModel.DocumentModel(profile=self.__profile_context.create_profile())
+        with contextlib.closing(document_model):
+            for i in range(self.configuration.item_count):
+                data_item = DataItem.DataItem(numpy.random.randn(64, 64).astype(numpy.float32))
+                data_item.title = f"Item {i}"
+                document_model.append_data_item(data_item)
+
+    def run(self):
+        document_model = DocumentModel.DocumentModel(profile=self.__profile_context.create_profile())
+        with contextlib.closing(document_model):
+            assert len(document_model.data_items) == self.configuration.item_count
+            for data_item in document_model.data_items:
+                with data_item.data_ref() as data_ref:
+                    assert data_ref.data is not None
+
+    def teardown(self):
+        self.__profile_context.close()
+
+
+class HandlerBenchmark(Benchmark.Benchmark):
+    """Base class for storage handler benchmarks; subclasses define the handler class and the data shape."""
+
+    handler_class = None
+
+    def _make_data(self) -> numpy.ndarray:
+        raise NotImplementedError()
+
+    def setup(self):
+        self._directory = pathlib.Path(tempfile.mkdtemp(prefix="nionswift-benchmark-"))
+        self._data = self._make_data()
+        self._count = 0
+
+    def _write(self):
+        self._count += 1
+        handler = self.handler_class.make(self._directory / f"data_{self._count}")
+        try:
+            handler.write_properties({"uuid": str(uuid.uuid4()), "title": "Benchmark"}, datetime.datetime.utcnow())
+            handler.write_data(self._data, datetime.datetime.utcnow())
+        finally:
+            handler.close()
+        return handler.reference
+
+    def teardown(self):
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+
+class NDataHandlerBenchmark(HandlerBenchmark):
+
+    handler_class = NDataHandler.NDataHandler
+
+    def _make_data(self):
+        return numpy.random.randn(self.configuration.image_size, self.configuration.image_size).astype(numpy.float32)
+
+
+class HDF5HandlerBenchmark(HandlerBenchmark):
+
+    handler_class = HDF5Handler.HDF5Handler
+
+    def _make_data(self):
+        size = max(self.configuration.image_size // 2, 1)
+        return numpy.random.randn(self.configuration.frame_count, size, size).astype(numpy.float32)
+
+
+@Benchmark.register
+class NDataWriteBenchmark(NDataHandlerBenchmark):
+    """Write an image_size square image to a new ndata file."""
+
+    name = "ndata_write"
+
+    def run(self):
+        self._write()
+
+
+@Benchmark.register
+class NDataReadBenchmark(NDataHandlerBenchmark):
+    """Read the properties and data of an image_size square ndata file."""
+
+    name = "ndata_read"
+
+    def setup(self):
+        super().setup()
+        self.__path = self._write()
+
+    def run(self):
+        handler = self.handler_class(self.__path)
+        try:
+            handler.read_properties()
+            assert handler.read_data() is not None
+        finally:
+            handler.close()
+
+
+@Benchmark.register
+class HDF5WriteBenchmark(HDF5HandlerBenchmark):
+    """Write a frame_count sequence of half image_size square frames to a new HDF5 file."""
+
+    name = "hdf5_write"
+
+    def run(self):
+        self._write()
+
+
+@Benchmark.register
+class HDF5ReadBenchmark(HDF5HandlerBenchmark):
+    """Read the properties and all of the data of a frame_count sequence HDF5 file."""
+
+    name = "hdf5_read"
+
+    def setup(self):
+        super().setup()
+        self.__path = self._write()
+
+    def run(self):
+        handler = self.handler_class(self.__path)
+        try:
+            handler.read_properties()
+            assert numpy.asarray(handler.read_data()).shape == self._data.shape
+        finally:
+            handler.close()
+
+
+@Benchmark.register
+class DisplayValuesBenchmark(Benchmark.Benchmark):
+    """Set new image_size square data and prepare the display values for painting."""
+
+    name = "display_values"
+
+    def setup(self):
+        self.__document_model = DocumentModel.DocumentModel()
+        size = self.configuration.image_size
+        self.__frames = [numpy.random.randn(size, size).astype(numpy.float32) for i in range(2)]
+        self.__data_item = DataItem.DataItem(self.__frames[0])
+        self.__document_model.append_data_item(self.__data_item)
+        self.__display_data_channel = self.__document_model.get_display_item_for_data_item(self.__data_item).display_data_channels[0]
+        self.__index = 0
+
+    def run(self):
+        self.__index += 1
+        self.__data_item.set_data(self.__frames[self.__index % 2])
+        display_values = self.__display_data_channel.get_calculated_display_values(True)
+        display_values.prepare()
+        assert display_values.display_rgba is not None
+
+    def teardown(self):
+        self.__document_model.close()
+
+
+@Benchmark.register
+class ComputationBenchmark(Benchmark.Benchmark):
+    """Change the sources of item_count computations (gaussian blur and invert) and recompute them all."""
+
+    name = "computation"
+
+    def setup(self):
+        self.__document_model = DocumentModel.DocumentModel()
+        self.__data_items = list()
+        for i in range(self.configuration.item_count):
+            data_item = DataItem.DataItem(numpy.random.randn(128, 128).astype(numpy.float32))
+            self.__document_model.append_data_item(data_item)
+            display_item = self.__document_model.get_display_item_for_data_item(data_item)
+            if i % 2:
+                self.__document_model.get_invert_new(display_item)
+            else:
+                self.__document_model.get_gaussian_blur_new(display_item)
+            self.__data_items.append(data_item)
+        self.__document_model.recompute_all()
+
+    def run(self):
+        for data_item in self.__data_items:
+            data_item.set_data(numpy.random.randn(128, 128).astype(numpy.float32))
+        self.__document_model.recompute_all()
+
+    def teardown(self):
+        self.__document_model.close()
+
+
+class SimulatedAcquisitionTask(HardwareSource.AcquisitionTask):
+
+    def __init__(self, is_continuous, image):
+        super().__init__(is_continuous)
+        self.__image = image
+
+    def _acquire_data_elements(self):
+        self.__image += 1.0
+        return [{"version": 1, "data": self.__image, "properties": {"hardware_source_id": "benchmark_hardware_source"}}]
+
+
+class SimulatedHardwareSource(HardwareSource.HardwareSource):
+    """A hardware source producing image_size square frames as fast as they are consumed."""
+
+    def __init__(self, size):
+        super().__init__("benchmark_hardware_source", "BenchmarkHardwareSource")
+        self.add_data_channel()
+        self.image = numpy.zeros((size, size), numpy.float32)
+
+    def _create_acquisition_view_task(self):
+        return SimulatedAcquisitionTask(True, self.image)
+
+    def _create_acquisition_record_task(self):
+        return SimulatedAcquisitionTask(False, self.image)
+
+
+@Benchmark.register
+class AcquisitionBenchmark(Benchmark.Benchmark):
+    """Acquire frame_count image_size square frames from a simulated source into the document."""
+
+    name = "acquisition"
+
+    def setup(self):
+        self.__document_model = DocumentModel.DocumentModel()
+        self.__hardware_source = SimulatedHardwareSource(self.configuration.image_size)
+        HardwareSource.HardwareSourceManager().register_hardware_source(self.__hardware_source)
+
+    def run(self):
+        hardware_source = self.__hardware_source
+        hardware_source.start_playing(sync_timeout=3.0)
+        try:
+            for i in range(self.configuration.frame_count):
+                hardware_source.get_next_xdatas_to_finish(timeout=10.0)
+                self.__document_model.perform_data_item_updates()
+        finally:
+            hardware_source.abort_playing(sync_timeout=3.0)
+        self.__document_model.perform_data_item_updates()
+
+    def teardown(self):
+        HardwareSource.HardwareSourceManager().unregister_hardware_source(self.__hardware_source)
+        self.__hardware_source.close()
+        self.__document_model.close()
+
+
+@Benchmark.register
+class LineGraphPaintBenchmark(Benchmark.Benchmark):
+    """Paint a line_plot_length line graph into an 800 x 400 plot, without the rebin cache."""
+
+    name = "line_graph_paint"
+
+    def setup(self):
+        length = self.configuration.line_plot_length
+        data = numpy.cumsum(numpy.random.randn(length)).astype(numpy.float32)
+        calibration = Calibration.Calibration(units="eV")
+        self.__xdata = DataAndMetadata.new_data_and_metadata(data, dimensional_calibrations=[calibration])
+        self.__data_min = float(numpy.amin(data))
+        self.__data_range = float(numpy.amax(data)) - self.__data_min
+        self.__calibration = calibration
+
+    def run(self):
+        drawing_context = DrawingContext.DrawingContext()
+        length = self.configuration.line_plot_length
+        LineGraphCanvasItem.draw_line_graph(drawing_context, 400, 800, 0, 0, self.__xdata, self.__data_min, self.__data_range, 0, length, self.__calibration, "#F00", "#00F", dict())
@@ -0,0 +1,4 @@
+"""Headless performance benchmarks for the core hot paths.
+
+Run the suite with ``python -m nion.swift.benchmark``; see ``--help`` for sizes, output and baseline comparison.
+"""
@@ -0,0 +1,68 @@
+"""
+Run the benchmark suite from the command line.
+
+    python -m nion.swift.benchmark --size small --output results.json
+    python -m nion.swift.benchmark --size small --baseline results.json --tolerance 0.25
+
+The exit status is 1 if any benchmark regresses against the baseline.
+"""
+
+# standard libraries
+import argparse
+import pathlib
+import sys
+
+# third party libraries
+# None
+
+# local libraries
+from nion.swift.benchmark import Benchmark
+from nion.swift.benchmark import Benchmarks  # registers the benchmarks
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m nion.swift.benchmark", description="Run the Nion Swift performance benchmarks.")
+    parser.add_argument("benchmarks", nargs="*", help="names of benchmarks to run (default all)")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    parser.add_argument("--size", default="small", choices=list(Benchmark.BenchmarkConfiguration.presets.keys()), help="size preset (default small)")
+    parser.add_argument("--item-count", type=int, help="override the number of data items")
+    parser.add_argument("--image-size", type=int, help="override the image edge length")
+    parser.add_argument("--line-plot-length", type=int, help="override the line plot length")
+    parser.add_argument("--frame-count", type=int, help="override the number of frames")
+    parser.add_argument("--repeat", type=int, help="override the number of timed runs")
+    parser.add_argument("--output", type=pathlib.Path, help="write the results as json to this path")
+    parser.add_argument("--baseline", type=pathlib.Path, help="compare the results against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed fractional slowdown against the baseline (default 0.2)")
+    parser.add_argument("--memory-tolerance", type=float, help="allowed fractional memory increase (default tolerance)")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, benchmark_class in sorted(Benchmark.benchmark_classes.items()):
+            print(f"{name:24} {(benchmark_class.__doc__ or '').strip()}")
+        return 0
+
+    configuration = Benchmark.BenchmarkConfiguration(args.size, item_count=args.item_count, image_size=args.image_size,
+                                                     line_plot_length=args.line_plot_length, frame_count=args.frame_count,
+                                                     repeat=args.repeat)
+
+    results = Benchmark.run_benchmarks(configuration, args.benchmarks or None, print)
+
+    if args.output:
+        Benchmark.write_results(args.output, results, configuration)
+
+    if args.baseline:
+        baseline, baseline_configuration = Benchmark.read_results(args.baseline)
+        if baseline_configuration and baseline_configuration != configuration.to_dict():
+            print(f"Warning: baseline configuration {baseline_configuration} differs from {configuration.to_dict()}.")
+        regressions = Benchmark.compare_results(results, baseline, args.tolerance, args.memory_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
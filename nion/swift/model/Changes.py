@@ -1,4 +1,25 @@
 import abc
+import pickle
+import typing
+import zlib
+
+
+class PackedDict:
+    """An immutable, compressed snapshot of a properties dict.
+
+    Undo records keep item properties in this form since they are rarely used. unpack returns a new dict each time, so
+    the snapshot can be shared and a copy is only made when the undo record is actually used.
+    """
+
+    def __init__(self, d: typing.Dict):
+        self.__packed = zlib.compress(pickle.dumps(d, pickle.HIGHEST_PROTOCOL), 1)
+
+    def unpack(self) -> typing.Dict:
+        return pickle.loads(zlib.decompress(self.__packed))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.__packed)
 
 
 class UndeleteBase(abc.ABC):
@@ -9,6 +30,11 @@ class UndeleteBase(abc.ABC):
     @abc.abstractmethod
     def undelete(self, document_model) -> None: ...
 
+    @property
+    def memory_footprint(self) -> int:
+        """Return the approximate number of bytes held in memory by this entry."""
+        return 0
+
 
 class UndeleteLog:
 
@@ -26,3 +52,7 @@ class UndeleteLog:
     def undelete_all(self, document_model) -> None:
         for entry in reversed(self.__items):
             entry.undelete(document_model)
+
+    @property
+    def memory_footprint(self) -> int:
+        return sum(item.memory_footprint for item in self.__items) if self.__items else 0
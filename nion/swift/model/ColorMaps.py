@@ -7,6 +7,7 @@ See color maps:
 
 import collections
 import colorsys
+import concurrent.futures
 import gettext
 import json
 import numpy
@@ -14,6 +15,7 @@ import math
 import os
 import pkgutil
 import re
+import threading
 import typing
 import xml.etree.ElementTree as ET
 
@@ -184,3 +186,87 @@ load_color_map_resource("resources/color_maps/kindlmann.json")
 
 def get_color_map_data_by_id(color_map_id: str) -> numpy.ndarray:
     return color_maps.get(color_map_id, color_maps["grayscale"]).data
+
+
+def get_rgba_lookup(lookup: typing.Optional[numpy.ndarray]) -> numpy.ndarray:
+    """Return the (256, 3) bgr lookup (grayscale if None) as a (256, ) uint32 array of packed, opaque bgra values."""
+    if lookup is None:
+        lookup = color_maps["grayscale"].data
+    lookup = numpy.clip(lookup, 0, 255).astype(numpy.uint32)
+    return lookup[..., 0] | (lookup[..., 1] << 8) | (lookup[..., 2] << 16) | numpy.uint32(0xFF000000)
+
+
+# bands of roughly this many elements keep the scratch buffers cache sized and give the threads enough work each
+_band_element_count = 512 * 1024
+_band_executor = None
+_band_executor_lock = threading.RLock()
+_band_scratch = threading.local()
+
+
+def _get_band_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _band_executor
+    with _band_executor_lock:
+        if _band_executor is None:
+            _band_executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, 8), thread_name_prefix="color-map")
+        return _band_executor
+
+
+def _get_band_scratch(name: str, shape: typing.Tuple[int, ...], dtype) -> numpy.ndarray:
+    # scratch buffers are reused per thread and only reallocated when they are too small
+    buffer = getattr(_band_scratch, name, None)
+    size = int(numpy.prod(shape, dtype=numpy.uint64))
+    if buffer is None or buffer.dtype != dtype or buffer.size < size:
+        buffer = numpy.empty((size, ), dtype=dtype)
+        setattr(_band_scratch, name, buffer)
+    return buffer[:size].reshape(shape)
+
+
+def _apply_color_map_band(data: numpy.ndarray, display_limits: typing.Tuple[float, float], m: float, clip_to_limits: bool, rgba_lookup: numpy.ndarray, out: numpy.ndarray) -> None:
+    # scale, clip, and index the lookup using per thread scratch buffers. numpy releases the gil during these
+    # operations, so bands can run in parallel.
+    scratch = _get_band_scratch("scale", data.shape, numpy.float32 if data.dtype == numpy.float32 else numpy.float64)
+    indexes = _get_band_scratch("indexes", data.shape, numpy.uint8)
+    if clip_to_limits:
+        numpy.clip(data, display_limits[0], display_limits[1], out=scratch)
+        numpy.subtract(scratch, display_limits[0], out=scratch)
+    else:
+        numpy.subtract(data, display_limits[0], out=scratch)
+    numpy.multiply(scratch, m, out=scratch)
+    if data.dtype.kind == "f":
+        # create_rgba_image_from_array maps non-finite values to the first entry (infinities are already clipped to the
+        # limits when there is no lookup).
+        numpy.nan_to_num(scratch, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    numpy.clip(scratch, 0, 255, out=scratch)
+    numpy.copyto(indexes, scratch, casting="unsafe")  # truncates
+    numpy.take(rgba_lookup, indexes, out=out)
+
+
+def apply_color_map(data: numpy.ndarray, display_limits: typing.Tuple[float, float], lookup: typing.Optional[numpy.ndarray], out: numpy.ndarray = None, band_row_count: int = None) -> numpy.ndarray:
+    """Map scalar 1d or 2d data through the display limits and lookup into packed bgra uint32 values.
+
+    The result matches nion.data.Image.create_rgba_image_from_array but is computed in a single fused pass per band of
+    rows, writing directly into out (allocated if None). Large data is split into bands processed on parallel threads.
+    """
+    if data.ndim == 1:
+        data = data.reshape((1, ) + data.shape)
+    assert data.ndim == 2
+    if out is None:
+        out = numpy.empty(data.shape, dtype=numpy.uint32)
+    assert out.shape == data.shape and out.dtype == numpy.uint32
+    low, high = display_limits
+    m = 255.0 / (high - low) if high != low else 1.0
+    # create_rgba_image_from_array clips to the display limits before scaling when there is no lookup; do the same so
+    # that values at or beyond the high limit map identically.
+    clip_to_limits = lookup is None
+    rgba_lookup = get_rgba_lookup(lookup)
+    rows = data.shape[0]
+    if band_row_count is None:
+        band_row_count = max(1, _band_element_count // max(data.shape[1], 1))
+    if rows <= band_row_count:
+        _apply_color_map_band(data, display_limits, m, clip_to_limits, rgba_lookup, out)
+    else:
+        executor = _get_band_executor()
+        futures = [executor.submit(_apply_color_map_band, data[r:r + band_row_count], display_limits, m, clip_to_limits, rgba_lookup, out[r:r + band_row_count]) for r in range(0, rows, band_row_count)]
+        for future in futures:
+            future.result()
+    return out
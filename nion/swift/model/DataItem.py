@@ -24,6 +24,7 @@ from nion.swift.model import Changes
 from nion.swift.model import Graphics
 from nion.swift.model import Metadata
 from nion.swift.model import Persistence
+from nion.swift.model import Tracing
 from nion.swift.model import Utility
 from nion.utils import Event
 from nion.utils import Geometry
@@ -213,6 +214,7 @@ class DataItem(Observable.Observable, Persistence.PersistentObject):
         self.__metadata = dict()
         self.__data_ref_count = 0
         self.__data_ref_count_mutex = threading.RLock()
+        self.__data_evicted = False
         self.__pending_write = True
         self.__in_transaction_state = False
         self.__write_delay_modified_count = 0
@@ -220,6 +222,7 @@ class DataItem(Observable.Observable, Persistence.PersistentObject):
         self.__source_file_path = None
         self.__is_live = False
         self.__session_manager = None
+        self.__memory_manager = None
         self.__source_proxy = self.create_item_proxy()
         self.description_changed_event = Event.Event()
         self.item_changed_event = Event.Event()
@@ -237,6 +240,8 @@ class DataItem(Observable.Observable, Persistence.PersistentObject):
         self.__change_data_changed = False
         self.__pending_xdata_lock = threading.RLock()
         self.__pending_xdata = None
+        self.__pending_xdata_sub_area = None
+        self.__data_sub_area = None
         self.__content_changed = False
         self.__suspendable_storage_cache = None
         self.r_var = None
@@ -478,6 +483,7 @@ class DataItem(Observable.Observable, Persistence.PersistentObject):
                                                                            data_descriptor=data_descriptor, timezone=self.timezone, timezone_offset=self.timezone_offset)
                 with self.__data_ref_count_mutex:
                     self.__data_and_metadata._add_data_ref_count(self.__data_ref_count)
+                    self.__data_evicted = False
                 self.__data_and_metadata.unloadable = self.persistent_object_context is not None
             else:
                 metadata = self._get_persistent_property_value("metadata")
@@ -651,6 +657,9 @@ class DataItem(Observable.Observable, Persistence.PersistentObject):
     def set_session_manager(self, session_manager: SessionManager) -> None:
         self.__session_manager = session_manager
 
+    def set_memory_manager(self, memory_manager) -> None:
+        self.__memory_manager = memory_manager
+
     # override from storage to watch for changes to this library item. notify observers.
     def notify_property_changed(self, key):
         super().notify_property_changed(key)
@@ -718,7 +727,12 @@ class DataItem(Observable.Observable, Persistence.PersistentObject):
             initial_count = self.__data_ref_count
             self.__data_ref_count += 1
             if self.__data_and_metadata:
-                self.__data_and_metadata.increment_data_ref_count()
+                if self.__data_evicted:
+                    self.__restore_evicted_data()
+                else:
+                    self.__data_and_metadata.increment_data_ref_count()
+        if self.__memory_manager:
+            self.__memory_manager.data_item_accessed(self)
         return initial_count+1
 
     def decrement_data_ref_count(self):
@@ -726,22 +740,99 @@ class DataItem(Observable.Observable, Persistence.PersistentObject):
             assert self.__data_ref_count > 0
             self.__data_ref_count -= 1
             final_count = self.__data_ref_count
-            if self.__data_and_metadata:
+            if self.__data_and_metadata and not self.__data_evicted:
                 self.__data_and_metadata.decrement_data_ref_count()
         return final_count
 
-    def set_pending_xdata(self, xd: DataAndMetadata.DataAndMetadata) -> None:
+    @property
+    def resident_data_nbytes(self) -> int:
+        """Return the number of bytes of data currently loaded in memory."""
+        data_and_metadata = self.__data_and_metadata
+        if data_and_metadata and data_and_metadata.is_data_valid and data_and_metadata.data_shape_and_dtype:
+            data_shape, data_dtype = data_and_metadata.data_shape_and_dtype
+            return int(numpy.prod(data_shape, dtype=numpy.uint64)) * numpy.dtype(data_dtype).itemsize
+        return 0
+
+    @property
+    def is_data_evicted(self) -> bool:
+        return self.__data_evicted
+
+    def evict_data(self) -> int:
+        """Unload the data even though it is referenced, if it can be reloaded from storage. Return bytes freed.
+
+        The data is reloaded when it is next accessed through this data item. Data that is not backed by storage, has
+        pending writes, or is in a transaction is not evicted.
+
+        The data item switches to a new, unloaded data and metadata object; existing holders of the previous object keep
+        its data, which is freed when they release it.
+        """
+        with self.__data_ref_count_mutex:
+            data_and_metadata = self.__data_and_metadata
+            if self.__data_evicted or not data_and_metadata or not data_and_metadata.unloadable:
+                return 0
+            if self.__in_transaction_state or self.is_write_delayed or self.__pending_write or self.__data_ref_count == 0:
+                return 0
+            # only the references held through this data item can be released; others are in use right now.
+            if data_and_metadata._data_ref_count != self.__data_ref_count:
+                return 0
+            nbytes = self.resident_data_nbytes
+            # release the references held through this data item without unloading the data for other holders.
+            data_and_metadata.unloadable = False
+            data_and_metadata._subtract_data_ref_count(self.__data_ref_count)
+            evicted_data_and_metadata = DataAndMetadata.DataAndMetadata(self.__load_data, data_and_metadata.data_shape_and_dtype, data_and_metadata.intensity_calibration,
+                                                                        data_and_metadata.dimensional_calibrations, data_and_metadata.metadata, data_and_metadata.timestamp,
+                                                                        data_descriptor=data_and_metadata.data_descriptor, timezone=data_and_metadata.timezone,
+                                                                        timezone_offset=data_and_metadata.timezone_offset)
+            evicted_data_and_metadata.unloadable = True
+            self.__data_and_metadata = evicted_data_and_metadata
+            self.__data_evicted = True
+            return nbytes
+
+    def __restore_evicted_data(self) -> None:
+        # reload the data by taking the first reference, then restore the references held through this data item.
+        with self.__data_ref_count_mutex:
+            if self.__data_evicted:
+                self.__data_and_metadata.increment_data_ref_count()
+                self.__data_and_metadata._add_data_ref_count(self.__data_ref_count - 1)
+                self.__data_evicted = False
+
+    def set_pending_xdata(self, xd: DataAndMetadata.DataAndMetadata, sub_area=None) -> None:
+        """Set the pending xdata, to be applied on the main thread.
+
+        The optional sub_area ((top, left), (height, width)) describes the only part of the data that changed since
+        the previous update. Sub areas of updates that get coalesced before being applied are combined.
+        """
         with self.__pending_xdata_lock:
+            if self.__pending_xdata is not None:
+                sub_area = union_sub_areas(self.__pending_xdata_sub_area, sub_area)
             self.__pending_xdata = xd
+            self.__pending_xdata_sub_area = sub_area
 
     def update_to_pending_xdata(self):
         with self.__pending_xdata_lock:
             pending_xdata = self.__pending_xdata
+            pending_xdata_sub_area = self.__pending_xdata_sub_area
             self.__pending_xdata = None
+            self.__pending_xdata_sub_area = None
         if pending_xdata:
             assert threading.current_thread() == threading.main_thread()
-            with self.data_item_changes():
-                self.set_xdata(pending_xdata)
+            with Tracing.span("data item update", "data item", data_item=self.uuid, frame=Tracing.frame_id(pending_xdata)) as span:
+                with self.data_item_changes():
+                    self.__data_sub_area = pending_xdata_sub_area
+                    try:
+                        self.set_xdata(pending_xdata)
+                    finally:
+                        self.__data_sub_area = None
+                # the data item assigns a new timestamp to the data; follow the frame by that timestamp from here on.
+                span.set(next_frame=Tracing.frame_id(self.xdata))
+
+    @property
+    def data_sub_area(self):
+        """Return the sub area changed by the data change in progress, or None if all of the data changed.
+
+        Only valid while handling the data changed event.
+        """
+        return self.__data_sub_area
 
     @property
     def xdata(self) -> DataAndMetadata.DataAndMetadata:
@@ -826,6 +917,12 @@ class DataItem(Observable.Observable, Persistence.PersistentObject):
         return DataAccessor(self)
 
     def __get_data(self):
+        if self.__data_evicted:
+            with self.__data_ref_count_mutex:
+                if self.__data_ref_count > 0:
+                    self.__restore_evicted_data()
+        if self.__memory_manager:
+            self.__memory_manager.data_item_accessed(self)
         return self.__data_and_metadata.data if self.__data_and_metadata else None
 
     def __set_data(self, data, data_modified=None):
@@ -945,14 +1042,19 @@ class DataItem(Observable.Observable, Persistence.PersistentObject):
 
     def __load_data(self):
         if self.persistent_object_context:
-            return self.read_external_data("data")
+            start = time.perf_counter()
+            data = self.read_external_data("data")
+            if self.__memory_manager:
+                self.__memory_manager.data_item_loaded(self, time.perf_counter() - start, self.__data_evicted)
+            return data
         return None
 
     def __set_data_metadata_direct(self, data_and_metadata, data_modified=None):
         with self.__data_ref_count_mutex:
-            if self.__data_and_metadata:
+            if self.__data_and_metadata and not self.__data_evicted:
                 self.__data_and_metadata._subtract_data_ref_count(self.__data_ref_count)
             self.__data_and_metadata = data_and_metadata
+            self.__data_evicted = False
             if self.__data_and_metadata:
                 self.__data_and_metadata._add_data_ref_count(self.__data_ref_count)
         if self.__data_and_metadata:
@@ -1131,6 +1233,17 @@ def sort_by_date_key(data_item):
     return data_item.title + str(data_item.uuid) if data_item.is_live else str(), data_item.date_for_sorting, str(data_item.uuid)
 
 
+def union_sub_areas(sub_area1, sub_area2):
+    """Return the bounding sub area of the two sub areas. None represents the entire data and absorbs the other."""
+    if sub_area1 is None or sub_area2 is None:
+        return None
+    top = min(sub_area1[0][0], sub_area2[0][0])
+    left = min(sub_area1[0][1], sub_area2[0][1])
+    bottom = max(sub_area1[0][0] + sub_area1[1][0], sub_area2[0][0] + sub_area2[1][0])
+    right = max(sub_area1[0][1] + sub_area1[1][1], sub_area2[0][1] + sub_area2[1][1])
+    return (top, left), (bottom - top, right - left)
+
+
 def new_data_item(data_and_metadata: DataAndMetadata.DataAndMetadata=None) -> DataItem:
     data_item = DataItem(large_format=data_and_metadata and len(data_and_metadata.dimensional_shape) > 2)
     data_item.ensure_data_source()
@@ -24,6 +24,7 @@ from nion.swift.model import ColorMaps
 from nion.swift.model import DataItem
 from nion.swift.model import Graphics
 from nion.swift.model import Persistence
+from nion.swift.model import Tracing
 from nion.swift.model import Utility
 from nion.utils import Event
 from nion.utils import Observable
@@ -226,10 +227,159 @@ class CalibrationStyleFractionalCenter(CalibrationStyle):
         return [Calibration.Calibration(scale=2.0/display_dimension, offset=-1.0) for display_dimension in dimensional_shape]
 
 
+class DisplayDataSummary:
+    """Summary statistics of 2d display data maintained per band of rows during partial updates.
+
+    Partial updates (for instance, a scan updating one line at a time) mark the affected bands as dirty so that only
+    those bands get reduced again. Full updates mark everything dirty and end the partial updates; the summary is not
+    used until the next partial update, since reducing the whole frame band by band is slower than a plain reduction.
+
+    The summary is only used while the display data has the same shape as the data, and it is rebuilt from scratch when
+    the shape or dtype changes. Each mark increments the generation; display values only use the summary if they were
+    made for the current generation, so that display values made for older data do not consume the dirty bands. The
+    sums used for the statistics are only reduced when requested.
+    """
+
+    band_count = 128
+    sample_count = 200
+
+    def __init__(self):
+        self.__lock = threading.RLock()
+        self.__shape_and_dtype = None
+        self.__band_height = 0
+        self.__generation = 0
+        self.__is_partial = False
+        self.__dirty_bands = None  # None indicates all bands are dirty
+        self.__statistics_dirty_bands = None  # None indicates all bands are dirty
+        self.__mins = None
+        self.__maxs = None
+        self.__sums = None
+        self.__square_sums = None
+        self.__samples = None
+        self._reduced_band_count = 0  # for testing
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    def is_active(self, generation: int) -> bool:
+        """Return whether a partial update is in progress and generation is the current generation."""
+        with self.__lock:
+            return self.__is_partial and generation == self.__generation
+
+    def invalidate(self) -> None:
+        with self.__lock:
+            self.__generation += 1
+            self.__dirty_bands = None
+
+    def mark_dirty(self, sub_area) -> None:
+        """Mark the bands intersecting sub_area ((top, left), (height, width)) as dirty. None marks everything dirty."""
+        with self.__lock:
+            self.__generation += 1
+            self.__is_partial = sub_area is not None
+            if sub_area is None or not self.__band_height:
+                self.__dirty_bands = None
+            elif self.__dirty_bands is not None:
+                top = max(sub_area[0][0], 0)
+                bottom = sub_area[0][0] + sub_area[1][0]
+                self.__dirty_bands.update(range(top // self.__band_height, (bottom + self.__band_height - 1) // self.__band_height))
+
+    @staticmethod
+    def is_applicable(data: numpy.ndarray, display_data: numpy.ndarray) -> bool:
+        return data is not None and display_data is not None and display_data.ndim == 2 and display_data.size > 0 and display_data.shape == data.shape
+
+    def update(self, display_data: numpy.ndarray, with_sample: bool, generation: int) -> bool:
+        """Reduce the dirty bands of display_data, or all bands if its shape or dtype changed.
+
+        Return False, without reducing anything, if the summary is not active for generation.
+        """
+        with self.__lock:
+            if not self.is_active(generation):
+                return False
+            shape_and_dtype = display_data.shape, display_data.dtype
+            if self.__shape_and_dtype != shape_and_dtype or (with_sample and self.__samples is None):
+                self.__shape_and_dtype = shape_and_dtype
+                rows = display_data.shape[0]
+                self.__band_height = max((rows + self.band_count - 1) // self.band_count, 1)
+                band_count = (rows + self.__band_height - 1) // self.__band_height
+                self.__mins = numpy.empty((band_count, ), dtype=display_data.dtype)
+                self.__maxs = numpy.empty((band_count, ), dtype=display_data.dtype)
+                self.__sums = numpy.empty((band_count, ), dtype=numpy.float64)
+                self.__square_sums = numpy.empty((band_count, ), dtype=numpy.float64)
+                self.__samples = [None] * band_count if with_sample else None
+                self.__dirty_bands = None
+            dirty_bands = range(self.__mins.shape[0]) if self.__dirty_bands is None else sorted(self.__dirty_bands)
+            band_sample_count = (self.sample_count + len(self.__mins) - 1) // len(self.__mins)
+            for band in dirty_bands:
+                if band < self.__mins.shape[0]:
+                    band_data = display_data[band * self.__band_height:(band + 1) * self.__band_height]
+                    self.__mins[band] = numpy.amin(band_data)
+                    self.__maxs[band] = numpy.amax(band_data)
+                    if self.__samples is not None:
+                        self.__samples[band] = numpy.random.choice(band_data.reshape(-1), band_sample_count)
+                    self._reduced_band_count += 1
+            if self.__dirty_bands is None:
+                self.__statistics_dirty_bands = None
+            elif self.__statistics_dirty_bands is not None:
+                self.__statistics_dirty_bands.update(self.__dirty_bands)
+            self.__dirty_bands = set()
+            return True
+
+    @property
+    def data_range(self) -> typing.Tuple[typing.Any, typing.Any]:
+        with self.__lock:
+            return numpy.amin(self.__mins), numpy.amax(self.__maxs)
+
+    @property
+    def data_sample(self) -> typing.Optional[numpy.ndarray]:
+        with self.__lock:
+            if self.__samples is None:
+                return None
+            return numpy.sort(numpy.random.choice(numpy.concatenate(self.__samples), self.sample_count))
+
+    def get_data_statistics(self, display_data: numpy.ndarray) -> typing.Dict[str, float]:
+        """Return the statistics of display_data, which must be the display data of the last update."""
+        with self.__lock:
+            dirty_bands = range(self.__sums.shape[0]) if self.__statistics_dirty_bands is None else sorted(self.__statistics_dirty_bands)
+            for band in dirty_bands:
+                band_data = display_data[band * self.__band_height:(band + 1) * self.__band_height]
+                self.__sums[band] = numpy.sum(band_data, dtype=numpy.float64)
+                self.__square_sums[band] = numpy.sum(numpy.square(band_data, dtype=numpy.float64))
+            self.__statistics_dirty_bands = set()
+            count = float(numpy.product(self.__shape_and_dtype[0], dtype=numpy.uint64))
+            data_sum = float(numpy.sum(self.__sums))
+            mean = data_sum / count
+            mean_square = float(numpy.sum(self.__square_sums)) / count
+            return {"mean": mean, "std": math.sqrt(max(mean_square - mean * mean, 0.0)), "rms": math.sqrt(mean_square), "sum": data_sum}
+
+
+def is_color_mappable(data: numpy.ndarray) -> bool:
+    """Return whether the data is 1d or 2d real numeric data that can be mapped with ColorMaps.apply_color_map."""
+    return data is not None and data.ndim in (1, 2) and data.dtype.kind in "iuf"
+
+
+def reduce_display_data(data: numpy.ndarray) -> numpy.ndarray:
+    """Return the 2d (scalar or rgb) data reduced by a factor of two in each dimension by averaging 2x2 blocks.
+
+    Odd sizes are handled by repeating the last row or column so that the reduced data covers the entire source.
+    """
+    if data.shape[0] % 2:
+        data = numpy.concatenate((data, data[-1:]), axis=0)
+    if data.shape[1] % 2:
+        data = numpy.concatenate((data, data[:, -1:]), axis=1)
+    reduced_shape = (data.shape[0] // 2, 2, data.shape[1] // 2, 2) + data.shape[2:]
+    reduced = numpy.mean(data.reshape(reduced_shape), axis=(1, 3))
+    if data.dtype == numpy.uint8:  # rgb
+        return numpy.around(reduced).astype(numpy.uint8)
+    return reduced.astype(data.dtype) if data.dtype in (numpy.float32, numpy.float64) else reduced
+
+
 class DisplayValues:
     """Display data used to render the display."""
 
-    def __init__(self, data_and_metadata, sequence_index, collection_index, slice_center, slice_width, display_limits, complex_display_type, color_map_data):
+    pyramid_tile_size = 512
+
+    def __init__(self, data_and_metadata, sequence_index, collection_index, slice_center, slice_width, display_limits, complex_display_type, color_map_data, display_data_summary: DisplayDataSummary = None):
         self.__lock = threading.RLock()
         self.__data_and_metadata = data_and_metadata
         self.__sequence_index = sequence_index
@@ -239,6 +389,9 @@ class DisplayValues:
         self.__display_limits = display_limits
         self.__complex_display_type = complex_display_type
         self.__color_map_data = color_map_data
+        self.__display_data_summary = display_data_summary
+        self.__display_data_summary_generation = display_data_summary.generation if display_data_summary else 0
+        self.__display_data_summary_dirty = True
         self.__display_data_and_metadata_dirty = True
         self.__display_data_and_metadata = None
         self.__data_range_dirty = True
@@ -250,6 +403,9 @@ class DisplayValues:
         self.__display_rgba_dirty = True
         self.__display_rgba = None
         self.__display_rgba_timestamp = data_and_metadata.timestamp if data_and_metadata else None
+        self.__pyramid_levels = dict()
+        self.__pyramid_tiles = dict()
+        self.__prepared = False
         self.__finalized = False
         self.on_finalize = None
 
@@ -263,6 +419,26 @@ class DisplayValues:
     def color_map_data(self):
         return self.__color_map_data
 
+    def prepare(self) -> None:
+        """Calculate the values used to paint the display so that painting does not need to calculate them.
+
+        This may take a long time and is typically called on a worker thread.
+        """
+        with Tracing.span("display values", "display", frame=Tracing.frame_id(self.__data_and_metadata)):
+            display_data_and_metadata = self.display_data_and_metadata
+            if display_data_and_metadata is not None:
+                if self.data_range is not None:
+                    self.display_range
+                    if len(display_data_and_metadata.dimensional_shape) == 2 and display_data_and_metadata.data_dtype != numpy.float32:
+                        self.display_rgba
+        with self.__lock:
+            self.__prepared = True
+
+    @property
+    def is_prepared(self) -> bool:
+        with self.__lock:
+            return self.__prepared
+
     @property
     def data_and_metadata(self) -> DataAndMetadata.DataAndMetadata:
         return self.__data_and_metadata
@@ -281,6 +457,22 @@ class DisplayValues:
                     self.__display_data_and_metadata = data_and_metadata
             return self.__display_data_and_metadata
 
+    def __get_display_data_summary(self) -> typing.Optional[DisplayDataSummary]:
+        # bring the display data summary up to date, if it applies to this display data. not valid for rgb data.
+        with self.__lock:
+            if self.__display_data_summary_dirty:
+                self.__display_data_summary_dirty = False
+                display_data_and_metadata = self.display_data_and_metadata
+                display_data = display_data_and_metadata.data if display_data_and_metadata else None
+                data = self.__data_and_metadata.data if self.__data_and_metadata else None
+                summary = self.__display_data_summary
+                if not summary or not DisplayDataSummary.is_applicable(data, display_data) or Image.is_shape_and_dtype_rgb_type(data.shape, data.dtype):
+                    self.__display_data_summary = None
+                elif not summary.update(display_data, Image.is_shape_and_dtype_complex_type(data.shape, data.dtype), self.__display_data_summary_generation):
+                    # not a partial update, or these display values are out of date; reduce the display data directly.
+                    self.__display_data_summary = None
+            return self.__display_data_summary
+
     @property
     def data_range(self):
         with self.__lock:
@@ -291,8 +483,11 @@ class DisplayValues:
                 if display_data is not None and display_data.size and self.__data_and_metadata:
                     data_shape = self.__data_and_metadata.data_shape
                     data_dtype = self.__data_and_metadata.data_dtype
+                    display_data_summary = self.__get_display_data_summary()
                     if Image.is_shape_and_dtype_rgb_type(data_shape, data_dtype):
                         self.__data_range = (0, 255)
+                    elif display_data_summary:
+                        self.__data_range = display_data_summary.data_range
                     elif Image.is_shape_and_dtype_complex_type(data_shape, data_dtype):
                         self.__data_range = (numpy.amin(display_data), numpy.amax(display_data))
                     else:
@@ -329,13 +524,24 @@ class DisplayValues:
                     if Image.is_shape_and_dtype_rgb_type(data_shape, data_dtype):
                         self.__data_sample = None
                     elif Image.is_shape_and_dtype_complex_type(data_shape, data_dtype):
-                        self.__data_sample = numpy.sort(numpy.random.choice(display_data.reshape(numpy.product(display_data.shape, dtype=numpy.uint64)), 200))
+                        display_data_summary = self.__get_display_data_summary()
+                        if display_data_summary:
+                            self.__data_sample = display_data_summary.data_sample
+                        else:
+                            self.__data_sample = numpy.sort(numpy.random.choice(display_data.reshape(numpy.product(display_data.shape, dtype=numpy.uint64)), 200))
                     else:
                         self.__data_sample = None
                 else:
                     self.__data_sample = None
             return self.__data_sample
 
+    @property
+    def data_statistics(self) -> typing.Optional[typing.Dict[str, float]]:
+        """Return mean, std, rms, and sum of the display data if they can be maintained incrementally, else None."""
+        with self.__lock:
+            display_data_summary = self.__get_display_data_summary()
+            return display_data_summary.get_data_statistics(self.display_data_and_metadata.data) if display_data_summary else None
+
     @property
     def display_rgba(self):
         with self.__lock:
@@ -346,13 +552,65 @@ class DisplayValues:
                     if self.data_range is not None:  # workaround until validating and retrieving data stats is an atomic operation
                         # display_range is just display_limits but calculated if display_limits is None
                         display_range = self.display_range
-                        self.__display_rgba = Core.function_display_rgba(display_data_and_metadata, display_range, self.__color_map_data).data
+                        display_data = display_data_and_metadata.data
+                        if is_color_mappable(display_data):
+                            self.__display_rgba = ColorMaps.apply_color_map(display_data, display_range, self.__color_map_data)
+                        else:
+                            self.__display_rgba = Core.function_display_rgba(display_data_and_metadata, display_range, self.__color_map_data).data
             return self.__display_rgba
 
     @property
     def display_rgba_timestamp(self):
         return self.__display_rgba_timestamp
 
+    @property
+    def display_pyramid_level_count(self) -> int:
+        """Return the number of levels in the display pyramid; the last level fits within a single tile."""
+        display_data_and_metadata = self.display_data_and_metadata
+        if display_data_and_metadata is None or len(display_data_and_metadata.dimensional_shape) != 2:
+            return 0
+        level_count = 1
+        height, width = display_data_and_metadata.dimensional_shape
+        while max(height, width) > self.pyramid_tile_size:
+            height, width = (height + 1) // 2, (width + 1) // 2
+            level_count += 1
+        return level_count
+
+    def get_display_pyramid_level_data(self, level: int) -> typing.Optional[numpy.ndarray]:
+        """Return the display data reduced by a factor of 2**level, calculating and caching it on demand."""
+        with self.__lock:
+            level_data = self.__pyramid_levels.get(level)
+            if level_data is None:
+                if level == 0:
+                    display_data_and_metadata = self.display_data_and_metadata
+                    level_data = display_data_and_metadata.data if display_data_and_metadata else None
+                else:
+                    previous_level_data = self.get_display_pyramid_level_data(level - 1)
+                    level_data = reduce_display_data(previous_level_data) if previous_level_data is not None else None
+                self.__pyramid_levels[level] = level_data
+            return level_data
+
+    def get_display_rgba_tile(self, level: int, tile_row: int, tile_column: int) -> typing.Optional[numpy.ndarray]:
+        """Return the rgba tile at the tile row and column of the pyramid level, calculating and caching it on demand.
+
+        Tiles are pyramid_tile_size square, except at the bottom and right edges.
+        """
+        with self.__lock:
+            tile_key = level, tile_row, tile_column
+            tile_rgba = self.__pyramid_tiles.get(tile_key)
+            if tile_rgba is None:
+                level_data = self.get_display_pyramid_level_data(level)
+                if level_data is not None and self.data_range is not None:
+                    tile_size = self.pyramid_tile_size
+                    tile_data = level_data[tile_row * tile_size:(tile_row + 1) * tile_size, tile_column * tile_size:(tile_column + 1) * tile_size]
+                    if tile_data.size > 0:
+                        if is_color_mappable(tile_data):
+                            tile_rgba = ColorMaps.apply_color_map(tile_data, self.display_range, self.__color_map_data)
+                        else:
+                            tile_rgba = Image.create_rgba_image_from_array(tile_data, display_limits=self.display_range, lookup=self.__color_map_data)
+                        self.__pyramid_tiles[tile_key] = tile_rgba
+            return tile_rgba
+
 
 class DisplayDataChannel(Observable.Observable, Persistence.PersistentObject):
     def __init__(self, data_item: DataItem.DataItem = None):
@@ -381,6 +639,8 @@ class DisplayDataChannel(Observable.Observable, Persistence.PersistentObject):
 
         self.__slice_interval = None
 
+        self.__display_data_summary = DisplayDataSummary()
+
         data_item_specifier = Persistence.PersistentObjectSpecifier.read(self.data_item_reference) if self.data_item_reference else None
         self.__data_item_proxy = self.create_item_proxy(item_specifier=data_item_specifier, item=data_item)
 
@@ -513,6 +773,7 @@ class DisplayDataChannel(Observable.Observable, Persistence.PersistentObject):
             if new_data_shape != self.__old_data_shape:
                 self.__validate_slice_indexes()
             self.__old_data_shape = new_data_shape
+            self.__display_data_summary.mark_dirty(self.__data_item.data_sub_area if self.__data_item else None)
             self.data_item_changed_event.fire()
 
         if self.__data_item:
@@ -710,9 +971,15 @@ class DisplayDataChannel(Observable.Observable, Persistence.PersistentObject):
         else:
             return self.__color_map_data if self.__color_map_data is not None else ColorMaps.get_color_map_data_by_id("grayscale")
 
+    @property
+    def _display_data_summary(self) -> DisplayDataSummary:
+        return self.__display_data_summary
+
     def __property_changed(self, property_name, value):
         # when one of the defined properties changes, this gets called
         self.notify_property_changed(property_name)
+        if property_name in ("sequence_index", "collection_index", "slice_center", "slice_width", "complex_display_type"):
+            self.__display_data_summary.invalidate()
         if property_name in ("sequence_index", "collection_index", "slice_center", "slice_width", "complex_display_type", "display_limits", "color_map_data"):
             self.display_data_will_change_event.fire()
             self.__send_next_calculated_display_values()
@@ -761,7 +1028,7 @@ class DisplayDataChannel(Observable.Observable, Persistence.PersistentObject):
         """
         if not immediate or not self.__is_master or not self.__last_display_values:
             if not self.__current_display_values and self.__data_item:
-                self.__current_display_values = DisplayValues(self.__data_item.xdata, self.sequence_index, self.collection_index, self.slice_center, self.slice_width, self.display_limits, self.complex_display_type, self.__color_map_data)
+                self.__current_display_values = DisplayValues(self.__data_item.xdata, self.sequence_index, self.collection_index, self.slice_center, self.slice_width, self.display_limits, self.complex_display_type, self.__color_map_data, self.__display_data_summary)
 
                 def finalize(display_values):
                     self.__last_display_values = display_values
@@ -8,6 +8,7 @@ import datetime
 import functools
 import gettext
 import logging
+import math
 import threading
 import time
 import typing
@@ -23,14 +24,17 @@ from nion.swift.model import DataGroup
 from nion.swift.model import DataItem
 from nion.swift.model import DataStructure
 from nion.swift.model import DisplayItem
+from nion.swift.model import FilterIndex
 from nion.swift.model import Graphics
 from nion.swift.model import HardwareSource
+from nion.swift.model import MemoryManager
 from nion.swift.model import PlugInManager
 from nion.swift.model import Persistence
 from nion.swift.model import Processing
 from nion.swift.model import Profile
 from nion.swift.model import Project
 from nion.swift.model import Symbolic
+from nion.swift.model import Tracing
 from nion.swift.model import WorkspaceLayout
 from nion.utils import Event
 from nion.utils import Geometry
@@ -43,6 +47,8 @@ from nion.utils import ThreadPool
 
 _ = gettext.gettext
 
+_DEFAULT = object()
+
 Processing.init()
 
 
@@ -257,6 +263,33 @@ class TransactionManager:
             self.__close_transaction_items(old_items)
 
 
+class DragSession:
+    """An interactive drag (of graphics, for instance) on a display item.
+
+    The drag session holds a transaction on the display item so that its changes are written once when the drag ends.
+    While the drag session is active, computations with inputs from the display item (its graphics, display data
+    channels, or data items) are evaluated at most once per drag_preview_period; intermediate triggers are coalesced.
+    The deferred computations are evaluated when the drag session closes.
+    """
+
+    def __init__(self, document_model: "DocumentModel", display_item):
+        self.__document_model = document_model
+        self.display_item = display_item
+        self.__transaction = document_model.begin_display_item_transaction(display_item)
+
+    def close(self) -> None:
+        self.__transaction.close()
+        self.__transaction = None
+        self.__document_model._end_drag_session(self)
+        self.__document_model = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
 class UndeleteObjectSpecifiers(Changes.UndeleteBase):
 
     def __init__(self, document_model: "DocumentModel", computation: Symbolic.Computation, index: int, variable_index: int, object_specifier: typing.Dict):
@@ -324,7 +357,7 @@ class UndeleteDisplayItem(Changes.UndeleteBase):
         index = container.display_items.index(display_item)
         uuid_order = save_item_order(document_model.display_items)
         self.project_item_proxy = project.create_proxy()
-        self.item_dict = display_item.write_to_dict()
+        self.item_dict = Changes.PackedDict(display_item.write_to_dict())
         self.index = index
         self.order = uuid_order
 
@@ -336,11 +369,15 @@ class UndeleteDisplayItem(Changes.UndeleteBase):
         project = self.project_item_proxy.item
         display_item = DisplayItem.DisplayItem()
         display_item.begin_reading()
-        display_item.read_from_dict(self.item_dict)
+        display_item.read_from_dict(self.item_dict.unpack())
         display_item.finish_reading()
         document_model.insert_display_item(self.index, display_item, update_session=False, project=project)
         document_model.restore_items_order("display_items", self.order)
 
+    @property
+    def memory_footprint(self) -> int:
+        return self.item_dict.nbytes
+
 
 class ItemsController(abc.ABC):
 
@@ -497,7 +534,7 @@ class UndeleteItem(Changes.UndeleteBase):
         self.project_item_proxy = project.create_proxy()
         self.container_item_proxy = container.create_proxy() if container else None
         self.container_properties = container.save_properties() if hasattr(container, "save_properties") else dict()
-        self.item_dict = self.__items_controller.write_to_dict(item)
+        self.item_dict = Changes.PackedDict(self.__items_controller.write_to_dict(item))
         self.index = index
         self.order = self.__items_controller.save_item_order()
 
@@ -512,7 +549,11 @@ class UndeleteItem(Changes.UndeleteBase):
         project = typing.cast(Project.Project, self.project_item_proxy.item)
         container = typing.cast(Persistence.PersistentObject, self.container_item_proxy.item) if self.container_item_proxy else None
         container_properties = self.container_properties
-        self.__items_controller.restore_from_dict(self.item_dict, self.index, project, container, container_properties, self.order)
+        self.__items_controller.restore_from_dict(self.item_dict.unpack(), self.index, project, container, container_properties, self.order)
+
+    @property
+    def memory_footprint(self) -> int:
+        return self.item_dict.nbytes
 
 
 class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, DataItem.SessionManager):
@@ -523,6 +564,8 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
 
     computation_min_period = 0.0
     computation_min_factor = 0.0
+    data_item_updates_time_budget = None  # seconds per call to perform_data_item_updates; None for unlimited
+    drag_preview_period = 0.1  # minimum seconds between evaluations of a computation during a drag session
 
     def __init__(self, *, profile: Profile.Profile = None):
         super().__init__()
@@ -542,6 +585,11 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
         self.computation_updated_event = Event.Event()
 
         self.__computation_thread_pool = ThreadPool.ThreadPool()
+        self.__display_values_thread_pool = ThreadPool.ThreadPool()
+        self.__display_values_dispatcher_started = False
+
+        self.__memory_manager = MemoryManager.MemoryManager()
+        self.__display_item_filter_index = FilterIndex.DisplayItemFilterIndex()
 
         self.__profile = profile if profile else Profile.Profile(auto_project=True)
         self.__profile.about_to_be_inserted(self)
@@ -573,6 +621,9 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
         self.__computation_queue_lock = threading.RLock()
         self.__computation_pending_queue = list()  # type: typing.List[ComputationQueueItem]
         self.__computation_active_item = None  # type: typing.Optional[ComputationQueueItem]
+        self.__drag_sessions = list()  # type: typing.List[DragSession]
+        self.__drag_preview_times = dict()  # computation -> time of last evaluation during drag sessions
+        self.__drag_deferred_computations = collections.OrderedDict()  # computations waiting for the next preview
         self.__data_items = list()
         self.__display_items = list()
         self.__data_structures = list()
@@ -615,7 +666,7 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
         self.__hardware_source_call_soon_event_listeners = dict()
 
         self.__pending_data_item_updates_lock = threading.RLock()
-        self.__pending_data_item_updates = list()
+        self.__pending_data_item_updates = collections.OrderedDict()  # data items with pending xdata, in arrival order
 
         self.__pending_data_item_merge_lock = threading.RLock()
         self.__pending_data_item_merge = None
@@ -673,6 +724,7 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
         self.__data_channel_stop_listeners = None
 
         self.__computation_thread_pool.close()
+        self.__display_values_thread_pool.close()
         self.storage_cache.close()
         self.__transaction_manager.close()
         self.__transaction_manager = None
@@ -694,6 +746,8 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
         self.__profile.close()
         self.__profile = None
 
+        self.__display_item_filter_index.close()
+
     def __call_soon(self, fn):
         self.call_soon_event.fire_any(fn)
 
@@ -824,6 +878,8 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
         self.__data_items.append(data_item)
         data_item._document_model = self
         data_item.set_session_manager(self)
+        data_item.set_memory_manager(self.__memory_manager)
+        self.__memory_manager.add_data_item(data_item)
         self.notify_insert_item("data_items", data_item, before_index)
         self.__rebind_computations()  # rebind any unresolved that may now be resolved
         self.__transaction_manager._add_item(data_item)
@@ -852,6 +908,8 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
             self.__profile.data_item_variables = data_item_variables
             data_item.r_var = None
         self.__data_items.remove(data_item)
+        self.__memory_manager.remove_data_item(data_item)
+        data_item.set_memory_manager(None)
         self.notify_remove_item("data_items", data_item, index)
 
     def append_data_item(self, data_item: DataItem.DataItem, auto_display: bool = True, *, project: Project.Project = None) -> None:
@@ -943,6 +1001,8 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
         # insert in internal list
         before_index = len(self.__display_items)
         self.__display_items.append(display_item)
+        # index before notifying so that the index is up to date when filters are evaluated.
+        self.__display_item_filter_index.add_display_item(display_item)
         # send notifications
         self.display_item_inserted_event.fire(self, display_item, before_index, False)
         self.notify_insert_item("display_items", display_item, before_index)
@@ -956,6 +1016,7 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
         self.display_item_removed_event.fire(self, display_item, index, False)
         self.notify_remove_item("display_items", display_item, index)
         self.__display_items.remove(display_item)
+        self.__display_item_filter_index.remove_display_item(display_item)
 
     def insert_model_item(self, container, name, before_index, item):
         container.insert_item(name, before_index, item)
@@ -1259,6 +1320,14 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
             for computation_queue_item in self.__computation_pending_queue:
                 if computation and computation_queue_item.computation == computation:
                     return
+            if self.__drag_sessions and computation and self.__is_drag_computation(computation):
+                # during a drag, limit the rate of evaluation; perform_data_item_updates evaluates deferred computations.
+                current_time = time.perf_counter()
+                if current_time - self.__drag_preview_times.get(computation, -math.inf) < self.drag_preview_period:
+                    self.__drag_deferred_computations[computation] = None
+                    return
+                self.__drag_preview_times[computation] = current_time
+                self.__drag_deferred_computations.pop(computation, None)
             computation_queue_item = ComputationQueueItem(computation=computation)
             self.__computation_pending_queue.append(computation_queue_item)
         self.dispatch_task(self.__recompute)
@@ -1365,6 +1434,54 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
     def transaction_count(self):
         return self.__transaction_manager.transaction_count
 
+    def begin_drag_session(self, display_item: DisplayItem.DisplayItem) -> DragSession:
+        """Begin a drag session on the display item. Close the returned session when the drag ends."""
+        drag_session = DragSession(self, display_item)
+        with self.__computation_queue_lock:
+            self.__drag_sessions.append(drag_session)
+        return drag_session
+
+    def _end_drag_session(self, drag_session: DragSession) -> None:
+        with self.__computation_queue_lock:
+            self.__drag_sessions.remove(drag_session)
+            # computations still dragged by another session remain deferred.
+            deferred_computations = [computation for computation in self.__drag_deferred_computations.keys() if not self.__is_drag_computation(computation)]
+            for computation in deferred_computations:
+                self.__drag_deferred_computations.pop(computation)
+                self.__drag_preview_times.pop(computation, None)
+            if not self.__drag_sessions:
+                self.__drag_preview_times.clear()
+        # the final evaluation reflects the state at the end of the drag.
+        for computation in deferred_computations:
+            if computation in self.__computations:
+                self.__computation_needs_update(computation)
+
+    def __is_drag_computation(self, computation: Symbolic.Computation) -> bool:
+        # whether the computation has inputs from a display item being dragged: the display item itself, its graphics
+        # and display data channels (contained in the display item), or its data items.
+        for drag_session in self.__drag_sessions:
+            display_item = drag_session.display_item
+            if not display_item:
+                continue
+            for input_item in computation._inputs:
+                if input_item is display_item or getattr(input_item, "container", None) is display_item or input_item in display_item.data_items:
+                    return True
+        return False
+
+    def __update_drag_deferred_computations(self) -> None:
+        # evaluate the computations deferred during a drag session once their preview period has passed.
+        with self.__computation_queue_lock:
+            if not self.__drag_deferred_computations:
+                return
+            current_time = time.perf_counter()
+            due_computations = [computation for computation in self.__drag_deferred_computations.keys() if current_time - self.__drag_preview_times.get(computation, -math.inf) >= self.drag_preview_period]
+        for computation in due_computations:
+            if computation in self.__computations:
+                self.__computation_needs_update(computation)
+            else:
+                with self.__computation_queue_lock:
+                    self.__drag_deferred_computations.pop(computation, None)
+
     def begin_display_item_transaction(self, display_item: DisplayItem.DisplayItem) -> Transaction:
         if display_item:
             return self.item_transaction(display_item)
@@ -1501,6 +1618,28 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
 
     def start_dispatcher(self):
         self.__computation_thread_pool.start(1)
+        self.__display_values_thread_pool.start(4)
+        self.__display_values_dispatcher_started = True
+
+    def prepare_display_values(self, display_values_list: typing.Sequence[DisplayItem.DisplayValues], prepared_fn: typing.Callable[[], None], is_stale_fn: typing.Callable[[], bool] = None) -> None:
+        """Prepare the display values on a worker thread, then call prepared_fn from that thread.
+
+        The preparation is skipped if is_stale_fn returns True by the time it is started. If the dispatcher has not been
+        started (during testing, for instance), prepared_fn is called immediately and the values are calculated lazily.
+        """
+        if not self.__display_values_dispatcher_started:
+            prepared_fn()
+            return
+
+        def prepare_display_values():
+            if is_stale_fn and is_stale_fn():
+                return
+            for display_values in display_values_list:
+                if display_values:
+                    display_values.prepare()
+            prepared_fn()
+
+        self.__display_values_thread_pool.queue_fn(prepare_display_values, "prepare display values")
 
     def __recompute(self):
         while True:
@@ -1512,7 +1651,9 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
 
             if computation_queue_item:
                 # an item was put into the active queue, so compute it, then merge
-                pending_data_item_merge = computation_queue_item.recompute()
+                computation = computation_queue_item.computation
+                with Tracing.span("compute", "computation", computation=computation.processing_id or str(computation.uuid)):
+                    pending_data_item_merge = computation_queue_item.recompute()
                 if pending_data_item_merge is not None:
                     with self.__pending_data_item_merge_lock:
                         self.__pending_data_item_merge = pending_data_item_merge
@@ -1531,7 +1672,8 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
             self.__current_computation = computation
             try:
                 if callable(pending_data_item_merge_fn):
-                    pending_data_item_merge_fn()
+                    with Tracing.span("merge", "computation", computation=computation.processing_id or str(computation.uuid)):
+                        pending_data_item_merge_fn()
             finally:
                 self.__current_computation = None
                 with self.__computation_queue_lock:
@@ -1669,40 +1811,55 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
                                 self.__item_inserted_listener = None
                         self.__item_inserted_listener = self.__document_model.item_inserted_event.listen(item_inserted)
 
-    def __queue_data_item_update(self, data_item, data_and_metadata):
+    def __queue_data_item_update(self, data_item, data_and_metadata, sub_area=None):
         # put the data update to data_item into the pending_data_item_updates list.
         # the pending_data_item_updates will be serviced when the main thread calls
         # perform_data_item_updates.
+        # a data item that is already pending keeps its place; its pending data is replaced by the new data.
         if data_item:
             with self.__pending_data_item_updates_lock:
-                found = False
-                pending_data_item_updates = list()
-                for data_item_ in self.__pending_data_item_updates:
-                    # does it match? if so and not yet found, put the new data into the matching
-                    # slot; but then filter the rest of the matches.
-                    if data_item_ == data_item:
-                        if not found:
-                            data_item.set_pending_xdata(data_and_metadata)
-                            pending_data_item_updates.append(data_item)
-                            found = True
-                    else:
-                        pending_data_item_updates.append(data_item_)
-                if not found:  # if not added yet, add it
-                    data_item.set_pending_xdata(data_and_metadata)
-                    pending_data_item_updates.append(data_item)
-                self.__pending_data_item_updates = pending_data_item_updates
+                data_item.set_pending_xdata(data_and_metadata, sub_area)
+                self.__pending_data_item_updates[data_item] = None
+
+    def perform_data_item_updates(self, time_budget: typing.Optional[float] = _DEFAULT):
+        """Apply pending data item updates in arrival order.
 
-    def perform_data_item_updates(self):
+        Stops once time_budget seconds have passed (at least one update is always applied), leaving the remaining
+        updates for the next call. time_budget defaults to data_item_updates_time_budget; None is unlimited.
+        """
         assert threading.current_thread() == threading.main_thread()
-        with self.__pending_data_item_updates_lock:
-            pending_data_item_updates = self.__pending_data_item_updates
-            self.__pending_data_item_updates = list()
-        for data_item in pending_data_item_updates:
+        time_budget = self.data_item_updates_time_budget if time_budget is _DEFAULT else time_budget
+        start_time = time.perf_counter()
+        while True:
+            with self.__pending_data_item_updates_lock:
+                if not self.__pending_data_item_updates:
+                    break
+                data_item = self.__pending_data_item_updates.popitem(last=False)[0]
             data_item.update_to_pending_xdata()
+            if time_budget is not None and time.perf_counter() - start_time >= time_budget:
+                break
+        self.__update_drag_deferred_computations()
+        self.__memory_manager.periodic()
+
+    @property
+    def pending_data_item_updates_count(self) -> int:
+        """Return the number of data items with updates waiting for perform_data_item_updates."""
+        with self.__pending_data_item_updates_lock:
+            return len(self.__pending_data_item_updates)
+
+    @property
+    def display_item_filter_index(self) -> FilterIndex.DisplayItemFilterIndex:
+        """Return the index used to filter display items by text and date."""
+        return self.__display_item_filter_index
+
+    @property
+    def memory_manager(self) -> MemoryManager.MemoryManager:
+        """Return the memory manager tracking resident data; set its budget to limit resident data."""
+        return self.__memory_manager
 
     # for testing
     def _get_pending_data_item_updates_count(self):
-        return len(self.__pending_data_item_updates)
+        return self.pending_data_item_updates_count
 
     @property
     def workspace_uuid(self) -> uuid.UUID:
@@ -1801,7 +1958,7 @@ class DocumentModel(Observable.Observable, ReferenceCounting.ReferenceCounted, D
 
     def __data_channel_updated(self, hardware_source, data_channel, data_and_metadata):
         data_item_reference = self.__construct_data_item_reference(hardware_source, data_channel)
-        self.__queue_data_item_update(data_item_reference.data_item, data_and_metadata)
+        self.__queue_data_item_update(data_item_reference.data_item, data_and_metadata, data_channel.updated_sub_area)
 
     def __data_channel_states_updated(self, hardware_source, data_channels):
         data_item_states = list()
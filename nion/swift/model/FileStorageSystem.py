@@ -2,6 +2,7 @@ import abc
 import collections
 import copy
 import datetime
+import functools
 import json
 import logging
 import os.path
@@ -11,11 +12,14 @@ import threading
 import typing
 import uuid
 
+import numpy
+
 from nion.swift.model import DataItem
 from nion.swift.model import HDF5Handler
 from nion.swift.model import Migration
 from nion.swift.model import NDataHandler
 from nion.swift.model import Persistence
+from nion.swift.model import Tracing
 from nion.swift.model import Utility
 from nion.utils import Event
 
@@ -50,23 +54,81 @@ class DataItemStorageAdapter:
 
     def rewrite_item(self, item) -> None:
         file_datetime = item.created_local
-        self.__storage_handler.write_properties(Migration.transform_from_latest(copy.deepcopy(self.__properties)), file_datetime)
+        with Tracing.span("write properties", "persistence", data_item=item.uuid):
+            self.__storage_handler.write_properties(Migration.transform_from_latest(copy.deepcopy(self.__properties)), file_datetime)
 
     def update_data(self, item, data):
         file_datetime = item.created_local
         if data is not None:
-            self.__storage_handler.write_data(data, file_datetime)
+            with Tracing.span("write data", "persistence", data_item=item.uuid, frame=Tracing.frame_id(item.data_metadata)):
+                self.__storage_handler.write_data(data, file_datetime)
 
     def load_data(self, item) -> None:
         assert item.has_data
         return self.__storage_handler.read_data()
 
 
+def _read_migration_stage(source_project_storage_system: "ProjectStorageSystem", storage_handlers: typing.List) -> typing.List[ReaderInfo]:
+    # construct a list of ReaderInfo objects. ReaderInfo stores the properties portion of the data item, whether it has
+    # been changed during migration, whether it is a large format file, its storage handler, and an identifier key.
+    # this skips files that cannot be read but prints an error message.
+    preliminary_reader_info_list = list()
+    for storage_handler in storage_handlers:
+        try:
+            large_format = source_project_storage_system._is_storage_handler_large_format(storage_handler)
+            properties = Migration.transform_to_latest(storage_handler.read_properties())
+            reader_info = ReaderInfo(properties, [False], large_format, storage_handler, storage_handler.reference)
+            preliminary_reader_info_list.append(reader_info)
+        except Exception as e:
+            logging.debug("Error reading %s", storage_handler.reference)
+            import traceback
+            traceback.print_exc()
+            traceback.print_stack()
+    return preliminary_reader_info_list
+
+
+def _is_migration_needed(header: typing.Mapping, data_item_uuids: typing.Set[uuid.UUID], deletions: typing.List[str]) -> bool:
+    try:
+        data_item_uuid = uuid.UUID(header["uuid"])
+        return data_item_uuid not in data_item_uuids and str(data_item_uuid) not in deletions
+    except Exception as e:
+        return False
+
+
+def read_migration_headers(source_project_storage_system: "ProjectStorageSystem") -> typing.List[typing.Dict]:
+    """Return the headers of the data items a migration of source would copy, without migrating them.
+
+    Each header is a dict with the uuid, version, title, created date, and data shape of the data item.
+    """
+    headers = list()
+    data_item_uuids = set()
+    deletions = list()
+    for migration_stage in source_project_storage_system._get_migration_stages():
+        storage_handlers = source_project_storage_system._find_data_items(migration_stage)
+        library_properties = source_project_storage_system._read_library_properties(migration_stage)
+        for deletion in library_properties.get("data_item_deletions", list()):
+            if not deletion in deletions:
+                deletions.append(deletion)
+        for reader_info in _read_migration_stage(source_project_storage_system, storage_handlers):
+            header = Migration.read_header(reader_info.properties)
+            if _is_migration_needed(header, data_item_uuids, deletions):
+                data_item_uuids.add(uuid.UUID(header["uuid"]))
+                headers.append(header)
+        for storage_handler in storage_handlers:
+            storage_handler.close()
+    return headers
+
+
 def migrate_to_latest(source_project_storage_system: "ProjectStorageSystem",
-                      target_project_storage_system: "ProjectStorageSystem" = None) -> None:
+                      target_project_storage_system: "ProjectStorageSystem" = None,
+                      progress_fn: typing.Callable[[int, int], None] = None) -> None:
     """Migrate the library data in source to target, upgrading them in the process.
 
     If target is None, then migration is done in place.
+
+    Each migration stage is first read at the header level; stages with no data items that still need to be copied
+    (all already copied from a newer stage or deleted) are not migrated at all. If progress_fn is passed, it is called
+    with the number of data items processed and the total number of data items in all stages.
     """
     library_properties = None
     data_item_uuids = set()
@@ -76,31 +138,21 @@ def migrate_to_latest(source_project_storage_system: "ProjectStorageSystem",
 
     target_project_storage_system = target_project_storage_system or source_project_storage_system
 
+    # find all data items for each migration stage and make a list of storage handlers for each stage. examples of
+    # storage handlers are NDataHandler and HDF5Handler. these give low level access to the file.
+    migration_stages = source_project_storage_system._get_migration_stages()
+    stage_storage_handlers = [source_project_storage_system._find_data_items(migration_stage) for migration_stage in migration_stages]
+    progress_count = sum(len(storage_handlers) for storage_handlers in stage_storage_handlers)
+    progress_index = 0
+
     # iterate through migration stages from newest to oldest, reading data items, updating them to the latest
     # version, and copying them to the new library. migration stages are the high level directories representing
     # different library versions up to 13. after version 13, files are stored in project files which have their own
     # versioning.
-    for migration_stage in source_project_storage_system._get_migration_stages():
+    for migration_stage, storage_handlers in zip(migration_stages, stage_storage_handlers):
 
-        # find all data items for the given migration stage and return a list of storage handlers.
-        # examples of storage handlers are NDataHandler and HDF5Handler. these give low level access to the file.
-        storage_handlers = source_project_storage_system._find_data_items(migration_stage)
-
-        # next, construct a list of ReaderInfo objects. ReaderInfo stores the properties portion of the data item,
-        # whether it has been changed during migration, whether it is a large format file, its storage handler,
-        # and an identifier key. this loop skips files that cannot be read but prints an error message.
-        preliminary_reader_info_list = list()
-        for storage_handler in storage_handlers:
-            try:
-                large_format = source_project_storage_system._is_storage_handler_large_format(storage_handler)
-                properties = Migration.transform_to_latest(storage_handler.read_properties())
-                reader_info = ReaderInfo(properties, [False], large_format, storage_handler, storage_handler.reference)
-                preliminary_reader_info_list.append(reader_info)
-            except Exception as e:
-                logging.debug("Error reading %s", storage_handler.reference)
-                import traceback
-                traceback.print_exc()
-                traceback.print_stack()
+        # read the properties of each data item without migrating them.
+        preliminary_reader_info_list = _read_migration_stage(source_project_storage_system, storage_handlers)
 
         # now read the library properties which contains the data item deletions. data item deletions exist to
         # facilitate switching between library versions. if the user deletes an item in a newer library, that item
@@ -114,6 +166,15 @@ def migrate_to_latest(source_project_storage_system: "ProjectStorageSystem",
         if library_properties is None:
             library_properties = copy.deepcopy(new_library_properties)
 
+        # the full migration of a stage may need all of its data items together (later items can refer to earlier
+        # ones). so migrate the whole stage, but only if the headers show that at least one item will be copied.
+        if not any(_is_migration_needed(Migration.read_header(reader_info.properties), data_item_uuids, deletions) for reader_info in preliminary_reader_info_list):
+            logging.getLogger("migration").info(f"Skipping migration of {migration_stage[1]}; no new data items.")
+            progress_index += len(storage_handlers)
+            if callable(progress_fn):
+                progress_fn(progress_index, progress_count)
+            continue
+
         # next, for each item in the list of ReaderInfo objects, migrate it to the latest version. doing this may
         # produce additional library updates in preliminary_library_updates. these are changes to the library that
         # must be made in order to move information that at one point was stored in the data item files into the
@@ -146,6 +207,10 @@ def migrate_to_latest(source_project_storage_system: "ProjectStorageSystem",
                 import traceback
                 traceback.print_exc()
                 traceback.print_stack()
+            progress_index += 1
+            if callable(progress_fn):
+                progress_fn(progress_index, progress_count)
+        progress_index += len(storage_handlers) - count
 
     assert len(reader_info_list) == len(data_item_uuids)
 
@@ -184,6 +249,126 @@ def migrate_to_latest(source_project_storage_system: "ProjectStorageSystem",
     target_project_storage_system._migrate_library_properties(library_properties, reader_info_list)
 
 
+class DataWriter:
+    """Write data item data on a background thread, keeping only the last of repeated writes to the same item.
+
+    queue_write copies the data, so callers may continue to modify their array (acquisition updates partial frames in
+    place, for instance). The thread runs only while writes are pending.
+
+    A failed write is retried once. If it fails again, the data is kept as if still pending (so it is returned by
+    get_pending_data rather than the stale stored data) until a newer write for the item succeeds; flush and flush_key
+    write it again on the calling thread and raise the error if it still fails.
+    """
+
+    def __init__(self, name: str):
+        self.__name = name
+        self.__condition = threading.Condition()
+        self.__pending = collections.OrderedDict()  # key -> (data, write_fn)
+        self.__failed = collections.OrderedDict()  # key -> (data, write_fn) of writes which failed
+        self.__active_key = None
+        self.__thread = None
+
+    def queue_write(self, key, data, write_fn: typing.Callable[[typing.Any], None]) -> None:
+        data = numpy.copy(data)
+        with self.__condition:
+            self.__pending[key] = (data, write_fn)
+            self.__failed.pop(key, None)
+            if not self.__thread:
+                self.__thread = threading.Thread(target=self.__run, name=self.__name, daemon=True)
+                self.__thread.start()
+
+    def get_pending_data(self, key) -> typing.Tuple[bool, typing.Any]:
+        """Return whether a write is pending for the key and, if so, its data."""
+        with self.__condition:
+            pending = self.__pending.get(key) or self.__failed.get(key)
+            return (True, pending[0]) if pending else (False, None)
+
+    def cancel(self, key) -> None:
+        """Discard the pending write for the key and wait for any write of it in progress to finish."""
+        with self.__condition:
+            self.__pending.pop(key, None)
+            self.__failed.pop(key, None)
+            while self.__active_key == key:
+                self.__condition.wait()
+
+    def flush_key(self, key) -> None:
+        """Write the pending or failed data for the key on the calling thread, after any write of it in progress finishes.
+
+        Raise the error if the write fails.
+        """
+        with self.__condition:
+            while self.__active_key == key:
+                self.__condition.wait()
+            pending = self.__pending.pop(key, None) or self.__failed.get(key)
+        if pending:
+            self.__write_again(key, pending)
+
+    def flush(self) -> None:
+        """Wait until all pending writes have been written, then write failed writes again on the calling thread.
+
+        Raise the error of the first write which still fails.
+        """
+        with self.__condition:
+            while self.__pending or self.__active_key is not None:
+                self.__condition.wait()
+            failed_items = list(self.__failed.items())
+        error = None
+        for key, failed in failed_items:
+            try:
+                self.__write_again(key, failed)
+            except Exception as e:
+                error = error or e
+        if error:
+            raise error
+
+    def __write_again(self, key, pending: typing.Tuple[typing.Any, typing.Callable[[typing.Any], None]]) -> None:
+        data, write_fn = pending
+        try:
+            write_fn(data)
+        except Exception:
+            with self.__condition:
+                if key not in self.__pending:
+                    self.__failed.setdefault(key, pending)
+            raise
+        with self.__condition:
+            if self.__failed.get(key) is pending:
+                self.__failed.pop(key)
+
+    @property
+    def pending_count(self) -> int:
+        with self.__condition:
+            return len(self.__pending)
+
+    def __run(self) -> None:
+        while True:
+            with self.__condition:
+                if not self.__pending:
+                    self.__thread = None
+                    self.__condition.notify_all()
+                    return
+                key, (data, write_fn) = self.__pending.popitem(last=False)
+                self.__active_key = key
+            try:
+                try:
+                    write_fn(data)
+                except Exception:
+                    write_fn(data)  # retry once
+                with self.__condition:
+                    self.__failed.pop(key, None)
+            except Exception as e:
+                logging.error("Error writing data for %s", key)
+                import traceback
+                traceback.print_exc()
+                with self.__condition:
+                    # keep the data unless a newer write for the key has been queued.
+                    if key not in self.__pending:
+                        self.__failed[key] = (data, write_fn)
+            finally:
+                with self.__condition:
+                    self.__active_key = None
+                    self.__condition.notify_all()
+
+
 class PersistentStorageSystem(Persistence.PersistentStorageInterface):
     """Abstract base class for persistent storage which implements the persistent storage interface.
 
@@ -198,6 +383,7 @@ class PersistentStorageSystem(Persistence.PersistentStorageInterface):
         self.__properties_lock = threading.RLock()
         self.__write_delay_counts = dict()
         self.__write_delay_count = 0
+        self.__json_cache = Utility.CleanJSONCache()
 
     @abc.abstractmethod
     def _write_properties(self) -> None:
@@ -213,11 +399,20 @@ class PersistentStorageSystem(Persistence.PersistentStorageInterface):
         """Read properties and store them in internal storage. Should be called immediately after instantiation."""
         with self.__properties_lock:
             self.__properties = self._read_properties()
+            self.__json_cache.clear()
 
     def get_storage_properties(self) -> typing.Dict:
         """Return the internal properties. Callers should not modify and it is ok to not return a copy."""
         return self.__properties
 
+    def _dumps_properties(self, properties: typing.Dict) -> str:
+        """Return the JSON text of the json-clean version of properties.
+
+        The text of the item dicts within the internal properties is cached until the items change.
+        """
+        with self.__properties_lock:
+            return self.__json_cache.dumps(properties)
+
     def __write_properties_if_not_delayed(self, item) -> None:
         if self.__write_delay_counts.get(item, 0) == 0:
             self._write_item_properties(item)
@@ -238,6 +433,7 @@ class PersistentStorageSystem(Persistence.PersistentStorageInterface):
         storage_dict = item.persistent_dict
         with self.__properties_lock:
             storage_dict["modified"] = item.modified.isoformat()
+            self.__json_cache.invalidate(storage_dict)
         persistent_object_parent = item.persistent_object_parent
         parent = persistent_object_parent.parent if persistent_object_parent else None
         if parent:
@@ -291,6 +487,7 @@ class PersistentStorageSystem(Persistence.PersistentStorageInterface):
         storage_dict = self.__update_modified_and_get_storage_dict(object)
         with self.__properties_lock:
             storage_dict[name] = value
+            self.__json_cache.invalidate_nested(value)
         self.__write_properties_if_not_delayed(object)
 
     def clear_property(self, object, name: str) -> None:
@@ -365,8 +562,7 @@ class FilePersistentStorageSystem(PersistentStorageSystem):
             # atomically overwrite
             temp_filepath = self.__path.with_suffix(".temp")
             with temp_filepath.open("w") as fp:
-                properties = Utility.clean_dict(self.get_storage_properties())
-                json.dump(properties, fp)
+                fp.write(self._dumps_properties(self.get_storage_properties()))
             os.replace(temp_filepath, self.__path)
 
 
@@ -391,11 +587,18 @@ class MemoryPersistentStorageSystem(PersistentStorageSystem):
 
 
 class ProjectStorageSystem(PersistentStorageSystem):
-    """Persistent storage system to provide special handling of data items."""
+    """Persistent storage system to provide special handling of data items.
+
+    If _uses_data_writer is True, data item data is written on a per project background thread (see DataWriter) and
+    the calling thread does not wait for the write. Call flush_data to wait for pending writes to finish.
+    """
+
+    _uses_data_writer = False
 
     def __init__(self):
         super().__init__()
         self.__storage_adapter_map = dict()
+        self.__data_writer = DataWriter("data-writer")
 
     @abc.abstractmethod
     def _get_identifier(self) -> str: ...
@@ -441,8 +644,13 @@ class ProjectStorageSystem(PersistentStorageSystem):
         return self.__storage_adapter_map
 
     def reset(self) -> None:
+        self.__data_writer.flush()
         self.__storage_adapter_map = dict()
 
+    def flush_data(self) -> None:
+        """Wait for pending data writes to be written to storage. Raise the error of a write which fails."""
+        self.__data_writer.flush()
+
     def get_persistent_dict(self, name: str, item_uuid: uuid.UUID) -> typing.Dict:
         if name == "data_items":
             return self._data_properties_map[item_uuid].properties
@@ -526,6 +734,8 @@ class ProjectStorageSystem(PersistentStorageSystem):
     def _remove_item(self, parent, name: str, index: int, item) -> None:
         if isinstance(item, DataItem.DataItem):
             assert item.uuid in self.__storage_adapter_map
+            # the removed item's file is kept in the trash for undo; it must hold the latest data.
+            self.__data_writer.flush_key(item.uuid)
             storage = self.__storage_adapter_map.get(item.uuid)
             self._remove_storage_handler(storage.storage_handler, safe=True)
             self.__storage_adapter_map.pop(item.uuid).close()
@@ -567,8 +777,11 @@ class ProjectStorageSystem(PersistentStorageSystem):
     def find_data_items(self) -> typing.List:
         return self._find_storage_handlers()
 
-    def migrate_to_latest(self) -> None:
-        migrate_to_latest(self)
+    def migrate_to_latest(self, progress_fn: typing.Callable[[int, int], None] = None) -> None:
+        migrate_to_latest(self, progress_fn=progress_fn)
+
+    def read_migration_headers(self) -> typing.List[typing.Dict]:
+        return read_migration_headers(self)
 
     def __get_data_item_properties(self, data_item: DataItem.DataItem) -> typing.Dict:
         return self.__storage_adapter_map.get(data_item.uuid).properties
@@ -580,13 +793,21 @@ class ProjectStorageSystem(PersistentStorageSystem):
         return None
 
     def __read_data_item_data(self, data_item: DataItem.DataItem):
+        is_pending, data = self.__data_writer.get_pending_data(data_item.uuid)
+        if is_pending:
+            return data
         storage = self.__storage_adapter_map.get(data_item.uuid)
         return storage.load_data(data_item)
 
     def __write_data_item_data(self, data_item: DataItem.DataItem, data) -> None:
         storage = self.__storage_adapter_map.get(data_item.uuid)
         if not self.is_write_delayed(data_item):
-            storage.update_data(data_item, data)
+            # only in memory arrays are written behind; other data (hdf5 datasets) may refer back to the storage itself.
+            if self._uses_data_writer and isinstance(data, numpy.ndarray):
+                self.__data_writer.queue_write(data_item.uuid, data, functools.partial(storage.update_data, data_item))
+            else:
+                self.__data_writer.cancel(data_item.uuid)
+                storage.update_data(data_item, data)
 
     def __rewrite_data_item_properties(self, data_item: DataItem.DataItem) -> None:
         if not self.is_write_delayed(data_item):
@@ -600,6 +821,8 @@ class FileProjectStorageSystem(ProjectStorageSystem):
 
     _file_handlers = [NDataHandler.NDataHandler, HDF5Handler.HDF5Handler]
 
+    _uses_data_writer = True
+
     def __init__(self, project_path: pathlib.Path, project_data_path: pathlib.Path = None):
         super().__init__()
         self.__project_path = project_path
@@ -637,7 +860,7 @@ class FileProjectStorageSystem(ProjectStorageSystem):
             # atomically overwrite
             temp_filepath = self.__project_path.with_suffix(".temp")
             with temp_filepath.open("w") as fp:
-                properties = Utility.clean_dict(properties)
+                properties = dict(properties)
                 project_data_paths = list()
                 for project_data_path in [self.__project_data_path] if self.__project_data_path else []:
                     if project_data_path.parent == self.__project_path.parent:
@@ -646,7 +869,7 @@ class FileProjectStorageSystem(ProjectStorageSystem):
                 project_uuid = uuid.uuid4()
                 properties.setdefault("uuid", str(project_uuid))
                 properties["project_data_folders"] = [str(project_data_path) for project_data_path in project_data_paths]
-                json.dump(properties, fp)
+                fp.write(self._dumps_properties(properties))
             os.replace(temp_filepath, self.__project_path)
 
     def _get_identifier(self) -> str:
@@ -674,9 +897,17 @@ class FileProjectStorageSystem(ProjectStorageSystem):
         # TODO: move this functionality to the storage handler.
         if safe and not os.path.exists(new_file_path):
             trash_dir.mkdir(exist_ok=True)
-            shutil.move(file_path, new_file_path)
+            self.__move_storage_files(storage_handler, file_path, new_file_path)
         storage_handler.remove()
 
+    def __move_storage_files(self, storage_handler, old_file_path, new_file_path) -> None:
+        shutil.move(old_file_path, new_file_path)
+        # large format properties may be stored in a sidecar file which moves with the data file.
+        if isinstance(storage_handler, HDF5Handler.HDF5Handler):
+            old_properties_path = storage_handler.get_properties_path(old_file_path)
+            if old_properties_path.exists():
+                shutil.move(old_properties_path, storage_handler.get_properties_path(new_file_path))
+
     def _restore_item(self, data_item_uuid: uuid.UUID) -> typing.Optional[dict]:
         data_item_uuid_str = str(data_item_uuid)
         trash_dir = self.__project_data_path / "trash"
@@ -692,7 +923,7 @@ class FileProjectStorageSystem(ProjectStorageSystem):
                 new_file_path = storage_handler.make_path(self.__project_data_path / self.__get_base_path(data_item))
                 if not os.path.exists(new_file_path):
                     os.makedirs(os.path.dirname(new_file_path), exist_ok=True)
-                    shutil.move(old_file_path, new_file_path)
+                    self.__move_storage_files(storage_handler, old_file_path, new_file_path)
                 self._make_storage_handler(data_item, file_handler=None)
                 properties["__large_format"] = isinstance(storage_handler, HDF5Handler.HDF5Handler)
                 return properties
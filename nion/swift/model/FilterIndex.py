@@ -0,0 +1,251 @@
+"""
+An incrementally maintained index of display items for text and date filtering.
+
+The index keeps the lower case filter text of each display item, a map from text tokens to display items, and a list of
+display items sorted by local creation date. Display items are re-indexed lazily after their description or data
+changes. Query results are cached and updated as display items change; a text query that refines a cached query (by
+containing it) only checks the cached results of that query.
+
+The TextFilter and PartialDateFilter classes are drop-in replacements for the list model filters of the same names
+which query the index instead of evaluating each display item.
+"""
+
+# standard libraries
+import bisect
+import collections
+import datetime
+import threading
+import typing
+
+# third party libraries
+# None
+
+# local libraries
+from nion.utils import ListModel
+
+
+class DisplayItemFilterIndex:
+    """Index display items by filter text tokens and local creation date.
+
+    Display items are added and removed by the document model. Call close to stop listening to the display items.
+    """
+
+    max_cached_query_count = 16
+
+    def __init__(self):
+        self.__lock = threading.RLock()
+        self.__texts = dict()  # display item -> lower case filter text
+        self.__token_items = dict()  # token -> set of display items
+        self.__dates = dict()  # display item -> local creation date
+        self.__date_keys = list()  # sorted (local creation date, id) tuples
+        self.__date_items = dict()  # id -> display item
+        self.__dirty_items = set()
+        self.__listeners = dict()  # display item -> listeners
+        self.__text_results = collections.OrderedDict()  # lower case text -> set of display items; least recent first
+        self.__date_results = collections.OrderedDict()  # (year, month, day) -> set of display items
+
+    def close(self) -> None:
+        for listeners in self.__listeners.values():
+            for listener in listeners:
+                listener.close()
+        self.__listeners = dict()
+
+    def add_display_item(self, display_item) -> None:
+        def property_changed(property_name: str) -> None:
+            if property_name in ("title", "caption", "description", "displayed_title"):
+                self.__mark_dirty(display_item)
+
+        def item_changed(*args) -> None:
+            self.__mark_dirty(display_item)
+
+        # the filter text depends on the description and on the data items and their data.
+        with self.__lock:
+            self.__listeners[display_item] = (display_item.property_changed_event.listen(property_changed),
+                                              display_item.item_changed_event.listen(item_changed),
+                                              display_item.display_changed_event.listen(item_changed),
+                                              display_item.item_inserted_event.listen(item_changed),
+                                              display_item.item_removed_event.listen(item_changed))
+            self.__index_display_item(display_item)
+
+    def remove_display_item(self, display_item) -> None:
+        with self.__lock:
+            for listener in self.__listeners.pop(display_item, tuple()):
+                listener.close()
+            self.__dirty_items.discard(display_item)
+            self.__unindex_display_item(display_item)
+
+    @property
+    def display_item_count(self) -> int:
+        return len(self.__texts)
+
+    def __mark_dirty(self, display_item) -> None:
+        with self.__lock:
+            if display_item in self.__texts:
+                self.__dirty_items.add(display_item)
+
+    def __update_dirty_items(self) -> None:
+        # re-index the display items changed since the last query; this also updates the cached query results.
+        while self.__dirty_items:
+            display_item = self.__dirty_items.pop()
+            self.__unindex_display_item(display_item)
+            self.__index_display_item(display_item)
+
+    def __index_display_item(self, display_item) -> None:
+        text = str(display_item.text_for_filter).lower()
+        self.__texts[display_item] = text
+        for token in set(text.split()):
+            self.__token_items.setdefault(token, set()).add(display_item)
+        date = display_item.created_local
+        self.__dates[display_item] = date
+        bisect.insort(self.__date_keys, (date, id(display_item)))
+        self.__date_items[id(display_item)] = display_item
+        for query, results in self.__text_results.items():
+            if query in text:
+                results.add(display_item)
+        for date_keys, results in self.__date_results.items():
+            if self.__date_matches(date, *date_keys):
+                results.add(display_item)
+
+    def __unindex_display_item(self, display_item) -> None:
+        text = self.__texts.pop(display_item, None)
+        if text is not None:
+            for token in set(text.split()):
+                token_items = self.__token_items.get(token)
+                if token_items is not None:
+                    token_items.discard(display_item)
+                    if not token_items:
+                        self.__token_items.pop(token)
+        date = self.__dates.pop(display_item, None)
+        if date is not None:
+            date_key = (date, id(display_item))
+            index = bisect.bisect_left(self.__date_keys, date_key)
+            if index < len(self.__date_keys) and self.__date_keys[index] == date_key:
+                del self.__date_keys[index]
+            self.__date_items.pop(id(display_item), None)
+        for results in self.__text_results.values():
+            results.discard(display_item)
+        for results in self.__date_results.values():
+            results.discard(display_item)
+
+    def __cache_result(self, cache: collections.OrderedDict, key, results: typing.Set) -> typing.Set:
+        cache[key] = results
+        while len(cache) > self.max_cached_query_count:
+            cache.popitem(last=False)
+        return results
+
+    def find_text(self, text: str) -> typing.Set:
+        """Return the set of display items whose filter text contains text, ignoring case. Do not modify the result."""
+        query = text.lower()
+        with self.__lock:
+            self.__update_dirty_items()
+            results = self.__text_results.get(query)
+            if results is not None:
+                self.__text_results.move_to_end(query)
+                return results
+            candidates = None
+            # refining a previous query only needs to check the results of the previous query.
+            for previous_query, previous_results in reversed(self.__text_results.items()):
+                if previous_query in query:
+                    candidates = previous_results
+                    break
+            if candidates is None:
+                # any whitespace free part of the query must be contained in a single token of matching text.
+                parts = query.split()
+                if parts:
+                    part = max(parts, key=len)
+                    candidates = set()
+                    for token, token_items in self.__token_items.items():
+                        if part in token:
+                            candidates.update(token_items)
+                else:
+                    candidates = self.__texts.keys()
+            texts = self.__texts
+            return self.__cache_result(self.__text_results, query, {display_item for display_item in candidates if query in texts[display_item]})
+
+    @staticmethod
+    def __date_matches(date: datetime.datetime, year: typing.Optional[int], month: typing.Optional[int], day: typing.Optional[int]) -> bool:
+        if year and date.year != year:
+            return False
+        if month and date.month != month:
+            return False
+        if day and date.day != day:
+            return False
+        return True
+
+    def find_date(self, year: int = None, month: int = None, day: int = None) -> typing.Set:
+        """Return the set of display items created (local time) in the year, month, and day, each optional."""
+        date_keys = (year, month, day)
+        with self.__lock:
+            self.__update_dirty_items()
+            results = self.__date_results.get(date_keys)
+            if results is not None:
+                self.__date_results.move_to_end(date_keys)
+                return results
+            if year and (month or not day):
+                # a year, year and month, or full date is a contiguous range of the sorted dates.
+                if not month:
+                    start, end = datetime.datetime(year, 1, 1), datetime.datetime(year + 1, 1, 1)
+                elif not day:
+                    start = datetime.datetime(year, month, 1)
+                    end = datetime.datetime(year + month // 12, month % 12 + 1, 1)
+                else:
+                    start = datetime.datetime(year, month, day)
+                    end = start + datetime.timedelta(days=1)
+                lo = bisect.bisect_left(self.__date_keys, (start, ))
+                hi = bisect.bisect_left(self.__date_keys, (end, ))
+                results = {self.__date_items[date_key[1]] for date_key in self.__date_keys[lo:hi]}
+            else:
+                results = {display_item for display_item, date in self.__dates.items() if self.__date_matches(date, year, month, day)}
+            return self.__cache_result(self.__date_results, date_keys, results)
+
+    def matches_text(self, display_item, text: str) -> bool:
+        with self.__lock:
+            if display_item in self.__texts:
+                return display_item in self.find_text(text)
+        return str(display_item.text_for_filter).lower().find(text.lower()) >= 0
+
+    def matches_date(self, display_item, year: int = None, month: int = None, day: int = None) -> bool:
+        with self.__lock:
+            if display_item in self.__dates:
+                return display_item in self.find_date(year, month, day)
+        return self.__date_matches(display_item.created_local, year, month, day)
+
+
+class TextFilter(ListModel.Filter):
+    """Match display items whose filter text contains the text, ignoring case, using the filter index."""
+
+    def __init__(self, filter_index: DisplayItemFilterIndex, text: str):
+        super().__init__()
+        self.__filter_index = filter_index
+        self.__text = text
+
+    def __deepcopy__(self, memo):
+        result = super().__deepcopy__(memo)
+        result.__filter_index = self.__filter_index
+        result.__text = self.__text
+        return result
+
+    def matches(self, d) -> bool:
+        return self.__filter_index.matches_text(d, self.__text)
+
+
+class PartialDateFilter(ListModel.Filter):
+    """Match display items created (local time) in the year, month, and day, each optional, using the filter index."""
+
+    def __init__(self, filter_index: DisplayItemFilterIndex, year: int = None, month: int = None, day: int = None):
+        super().__init__()
+        self.__filter_index = filter_index
+        self.__year = year
+        self.__month = month
+        self.__day = day
+
+    def __deepcopy__(self, memo):
+        result = super().__deepcopy__(memo)
+        result.__filter_index = self.__filter_index
+        result.__year = self.__year
+        result.__month = self.__month
+        result.__day = self.__day
+        return result
+
+    def matches(self, d) -> bool:
+        return self.__filter_index.matches_date(d, self.__year, self.__month, self.__day)
@@ -2,11 +2,15 @@
     A module for handle .h5 files for Swift.
 """
 
+import collections
+import contextlib
 import io
 import json
 import os
 import pathlib
 import threading
+import typing
+import weakref
 
 import h5py
 import numpy
@@ -26,18 +30,145 @@ def make_directory_if_needed(directory_path):
         os.makedirs(directory_path)
 
 
+def make_chunk_shape(shape: typing.Sequence[int], itemsize: int, datum_dimension_count: int, target_nbytes: int) -> typing.Optional[typing.Tuple[int, ...]]:
+    """Return a chunk shape aligned with the navigation and signal (datum) axes of data with shape.
+
+    Each chunk holds whole datums (e.g. one diffraction pattern or one spectrum) so that reading a datum touches a
+    single chunk. Adjacent datums, starting with the last navigation axis, are grouped into a chunk until the chunk is
+    about target_nbytes. A datum larger than target_nbytes is split along its first axis. Return None for data which
+    should not be chunked.
+    """
+    if len(shape) < 2 or 0 in shape:
+        return None
+    datum_dimension_count = min(max(datum_dimension_count, 1), len(shape))
+    chunk_shape = [1] * (len(shape) - datum_dimension_count) + list(shape[-datum_dimension_count:])
+    chunk_nbytes = int(numpy.prod(chunk_shape, dtype=numpy.uint64)) * itemsize
+    if chunk_nbytes > target_nbytes:
+        # split the datum along its first axis.
+        index = len(shape) - datum_dimension_count
+        row_nbytes = chunk_nbytes // chunk_shape[index]
+        chunk_shape[index] = max(1, min(chunk_shape[index], target_nbytes // max(row_nbytes, 1)))
+    else:
+        # group datums along the navigation axes, last axis first.
+        for index in reversed(range(len(shape) - datum_dimension_count)):
+            count = max(1, min(shape[index], target_nbytes // chunk_nbytes))
+            chunk_shape[index] = count
+            chunk_nbytes *= count
+            if count < shape[index]:
+                break
+    return tuple(chunk_shape)
+
+
+class HandlePool:
+    """A pool of open files with a maximum number of open files, shared by the handlers.
+
+    Files are opened on demand and closed in least recently used order when more than max_open_files are open. A file
+    is not closed while it is in use by an operation or while a dataset returned from it is still referenced (the data
+    of a loaded data item, for instance), so the maximum may be exceeded until those are released.
+    """
+
+    def __init__(self, max_open_files: int = 256):
+        self.max_open_files = max_open_files
+        self.__lock = threading.RLock()
+        self.__files: typing.Dict[str, h5py.File] = collections.OrderedDict()
+        self.__use_counts: typing.Dict[str, int] = dict()
+        self.__datasets: typing.Dict[str, weakref.WeakSet] = dict()
+
+    @property
+    def open_count(self) -> int:
+        return len(self.__files)
+
+    def is_open(self, file_path: str) -> bool:
+        return file_path in self.__files
+
+    @contextlib.contextmanager
+    def use(self, file_path: str) -> typing.Iterator[h5py.File]:
+        """Return a context manager for the open file, opening it if needed. The file stays open while in use."""
+        with self.__lock:
+            fp = self.__files.get(file_path)
+            if fp:
+                self.__files.move_to_end(file_path)
+            else:
+                make_directory_if_needed(os.path.dirname(file_path))
+                fp = h5py.File(file_path, "a")
+                self.__files[file_path] = fp
+            self.__use_counts[file_path] = self.__use_counts.get(file_path, 0) + 1
+            self.__close_unused()
+        try:
+            yield fp
+        finally:
+            with self.__lock:
+                self.__use_counts[file_path] -= 1
+                if not self.__use_counts[file_path]:
+                    self.__use_counts.pop(file_path)
+                    self.__close_unused()
+
+    def keep_open(self, file_path: str, dataset: h5py.Dataset) -> None:
+        """Keep the file open while the dataset is referenced."""
+        with self.__lock:
+            self.__datasets.setdefault(file_path, weakref.WeakSet()).add(dataset)
+
+    def close(self, file_path: str) -> None:
+        """Close the file, even if it is in use. Datasets returned from the file become invalid."""
+        with self.__lock:
+            fp = self.__files.pop(file_path, None)
+            self.__datasets.pop(file_path, None)
+            if fp:
+                fp.close()
+
+    def __close_unused(self) -> None:
+        for file_path in list(self.__files.keys()):
+            if len(self.__files) <= self.max_open_files:
+                break
+            if not self.__use_counts.get(file_path) and not self.__datasets.get(file_path):
+                self.close(file_path)
+
+
 class HDF5Handler:
+    """Storage handler for large format data items.
+
+    New datasets are chunked with chunks aligned with the navigation and signal axes (see make_chunk_shape) and
+    optionally compressed with a lossless filter. The class attributes configure the layout of new datasets; existing
+    datasets keep their layout.
+
+    Files are opened through the shared handle pool, which limits the number of open files. Writes to a file are
+    serialized, but reads only wait for a write which replaces the dataset; the properties are cached after they are
+    first read or written, so reading them does not touch the file.
+
+    The properties are stored as an attribute of the dataset unless properties_in_sidecar is set, in which case they are
+    stored in a small JSON file next to the data file (see get_properties_path), replaced atomically when written. The
+    data file is then only written when the data changes. Properties in a sidecar take precedence when reading;
+    writing the properties to the data file removes the sidecar.
+    """
+
+    # the open files of all handlers.
+    handle_pool = HandlePool()
+
+    # the approximate size of each chunk. None for contiguous (unchunked) storage.
+    chunk_nbytes = 1024 * 1024
+
+    # the lossless compression filter ("gzip" or "lzf") or None, its options, and whether to shuffle bytes first.
+    compression = None
+    compression_opts = None
+    shuffle = False
+
+    # data is written in slabs of whole chunks along the first axis of about this size.
+    write_nbytes = 64 * 1024 * 1024
+
+    # whether to write the properties to a sidecar file instead of the data file.
+    properties_in_sidecar = False
 
     def __init__(self, file_path):
         self.__file_path = str(file_path)
-        self.__lock = threading.RLock()
-        self.__fp = None
-        self.__dataset = None
+        self.__lock = threading.RLock()  # guards the dataset; held by readers and while the dataset is replaced
+        self.__write_lock = threading.RLock()  # serializes writes
+        self.__json_properties: typing.Optional[str] = None
 
     def close(self):
-        if self.__fp:
-            self.__fp.close()
-            self.__fp = None
+        # wait for a write in progress, which copies the data without holding the dataset lock.
+        with self.__write_lock:
+            with self.__lock:
+                self.handle_pool.close(self.__file_path)
 
     @property
     def reference(self):
@@ -65,98 +196,143 @@ class HDF5Handler:
     def get_extension(self) -> str:
         return ".h5"
 
-    def __ensure_open(self):
-        if not self.__fp:
-            make_directory_if_needed(os.path.dirname(self.__file_path))
-            self.__fp = h5py.File(self.__file_path, "a")
+    @classmethod
+    def get_properties_path(cls, file_path) -> pathlib.Path:
+        """Return the path of the sidecar properties file for the data file path."""
+        return pathlib.Path(file_path).with_suffix(".json")
 
-    def __write_properties_to_dataset(self, properties):
-        with self.__lock:
-            assert self.__dataset is not None
+    def __make_json_properties(self, properties) -> str:
 
-            class JSONEncoder(json.JSONEncoder):
-                def default(self, obj):
-                    if isinstance(obj, Geometry.IntPoint) or isinstance(obj, Geometry.IntSize) or isinstance(obj, Geometry.IntRect) or isinstance(obj, Geometry.FloatPoint) or isinstance(obj, Geometry.FloatSize) or isinstance(obj, Geometry.FloatRect):
-                        return tuple(obj)
-                    else:
-                        return json.JSONEncoder.default(self, obj)
+        class JSONEncoder(json.JSONEncoder):
+            def default(self, obj):
+                if isinstance(obj, Geometry.IntPoint) or isinstance(obj, Geometry.IntSize) or isinstance(obj, Geometry.IntRect) or isinstance(obj, Geometry.FloatPoint) or isinstance(obj, Geometry.FloatSize) or isinstance(obj, Geometry.FloatRect):
+                    return tuple(obj)
+                else:
+                    return json.JSONEncoder.default(self, obj)
 
-            json_io = io.StringIO()
-            json.dump(Utility.clean_dict(properties), json_io, cls=JSONEncoder)
-            json_str = json_io.getvalue()
+        json_io = io.StringIO()
+        json.dump(Utility.clean_dict(properties), json_io, cls=JSONEncoder)
+        return json_io.getvalue()
 
-            self.__dataset.attrs["properties"] = json_str
-
-    def __ensure_dataset(self):
-        with self.__lock:
-            self.__ensure_open()
-            if "data" in self.__fp:
-                self.__dataset = self.__fp["data"]
-            else:
-                self.__dataset = self.__fp.create_dataset("data", data=numpy.empty((0,)))
+    def __ensure_dataset(self, fp):
+        if "data" in fp:
+            return fp["data"]
+        return fp.create_dataset("data", data=numpy.empty((0,)))
 
     def write_data(self, data, file_datetime):
-        with self.__lock:
+        with self.__write_lock:
             assert data is not None
-            self.__ensure_open()
-            json_properties = None
             # handle three cases:
             #   1 - 'data' doesn't yet exist (require_dataset)
             #   2 - 'data' exists but is a different size (delete, then require_dataset)
             #   3 - 'data' exists and is the same size (overwrite)
-            if not "data" in self.__fp:
-                # case 1
-                self.__dataset = self.__fp.require_dataset("data", shape=data.shape, dtype=data.dtype)
-            else:
-                self.__dataset = self.__fp["data"]
-                if self.__dataset.shape != data.shape or self.__dataset.dtype != data.dtype:
-                    # case 2
-                    json_properties = self.__dataset.attrs.get("properties", "")
-                    self.__dataset = None
-                    self.__fp.close()
-                    self.__fp = None
+            # readers wait while the dataset is created or replaced, but not while the data is copied.
+            with self.__lock:
+                json_properties = None
+                with self.handle_pool.use(self.__file_path) as fp:
+                    dataset = fp.get("data")
+                    is_replacing = dataset is not None and (dataset.shape != data.shape or dataset.dtype != data.dtype)
+                    if is_replacing:
+                        # case 2
+                        json_properties = self.__read_json_properties()
+                    elif dataset is None:
+                        # case 1
+                        self.__create_dataset(fp, data, None)
+                    dataset = None
+                if is_replacing:
+                    self.handle_pool.close(self.__file_path)
                     os.remove(self.__file_path)
-                    self.__ensure_open()
-                    self.__dataset = self.__fp.require_dataset("data", shape=data.shape, dtype=data.dtype)
-            self.__copy_data(data)
-            if json_properties is not None:
-                self.__dataset.attrs["properties"] = json_properties
-            self.__fp.flush()
-
-    def __copy_data(self, data):
-        if len(data.shape) == 4:
-            for r in range(data.shape[0]):
-                for c in range(data.shape[1]):
-                    self.__dataset[r, c, ...] = data[r, c, ...]
-        elif len(data.shape) == 3:
-            for r in range(data.shape[0]):
-                self.__dataset[r, ...] = data[r, ...]
-        else:
-            self.__dataset[:] = data
+                    with self.handle_pool.use(self.__file_path) as fp:
+                        self.__create_dataset(fp, data, json_properties).attrs["properties"] = json_properties
+            with self.handle_pool.use(self.__file_path) as fp:
+                self.__copy_data(fp["data"], data)
+                fp.flush()
 
-    def write_properties(self, properties, file_datetime):
+    def __create_dataset(self, fp, data, json_properties: typing.Optional[str]):
+        # the properties (if already written) describe the datum (signal) dimensions; otherwise assume images.
+        datum_dimension_count = 2
+        if json_properties:
+            try:
+                datum_dimension_count = json.loads(json_properties).get("datum_dimension_count", datum_dimension_count)
+            except ValueError:
+                pass
+        dtype = numpy.dtype(data.dtype)
+        chunk_shape = make_chunk_shape(data.shape, dtype.itemsize, datum_dimension_count, self.chunk_nbytes) if self.chunk_nbytes else None
+        if chunk_shape:
+            return fp.require_dataset("data", shape=data.shape, dtype=data.dtype, chunks=chunk_shape,
+                                      compression=self.compression, compression_opts=self.compression_opts,
+                                      shuffle=self.shuffle and self.compression is not None)
+        return fp.require_dataset("data", shape=data.shape, dtype=data.dtype)
+
+    def __copy_data(self, dataset, data):
+        # write slabs of whole chunks along the first axis; each slab is written in a single call.
+        shape = dataset.shape
+        if len(shape) == 0 or shape[0] == 0:
+            dataset[...] = data
+            return
+        chunks = dataset.chunks
+        row_nbytes = int(numpy.prod(shape[1:], dtype=numpy.uint64)) * dataset.dtype.itemsize
+        row_count = max(1, self.write_nbytes // max(row_nbytes, 1))
+        if chunks:
+            row_count = max(chunks[0], row_count // chunks[0] * chunks[0])
+        for row in range(0, shape[0], row_count):
+            dataset[row:row + row_count] = data[row:row + row_count]
+
+    def __read_json_properties(self) -> str:
         with self.__lock:
-            self.__ensure_open()
-            self.__ensure_dataset()
-            self.__write_properties_to_dataset(properties)
-            self.__fp.flush()
+            if self.__json_properties is None:
+                properties_path = self.get_properties_path(self.__file_path)
+                if properties_path.exists():
+                    self.__json_properties = properties_path.read_text("utf-8")
+                else:
+                    with self.handle_pool.use(self.__file_path) as fp:
+                        self.__json_properties = self.__ensure_dataset(fp).attrs.get("properties", "")
+            return self.__json_properties
+
+    def write_properties(self, properties, file_datetime):
+        json_properties = self.__make_json_properties(properties)
+        properties_path = self.get_properties_path(self.__file_path)
+        if self.properties_in_sidecar:
+            # the sidecar is written without waiting for data writes.
+            with self.__lock:
+                if not os.path.exists(self.__file_path):
+                    # the data file identifies the item, so make sure it exists.
+                    with self.handle_pool.use(self.__file_path) as fp:
+                        self.__ensure_dataset(fp)
+                        fp.flush()
+                # atomically overwrite
+                temp_filepath = properties_path.with_suffix(".temp")
+                temp_filepath.write_text(json_properties, "utf-8")
+                os.replace(temp_filepath, properties_path)
+                self.__json_properties = json_properties
+        else:
+            with self.__write_lock:
+                with self.__lock:
+                    with self.handle_pool.use(self.__file_path) as fp:
+                        self.__ensure_dataset(fp).attrs["properties"] = json_properties
+                        fp.flush()
+                    if properties_path.exists():
+                        properties_path.unlink()
+                    self.__json_properties = json_properties
 
     def read_properties(self):
-        with self.__lock:
-            self.__ensure_open()
-            self.__ensure_dataset()
-            json_properties = self.__dataset.attrs.get("properties", "")
-            return json.loads(json_properties)
+        return json.loads(self.__read_json_properties())
 
     def read_data(self):
         with self.__lock:
-            self.__ensure_open()
-            self.__ensure_dataset()
-            if self.__dataset.shape == (0, ):
-                return None
-            return self.__dataset
+            with self.handle_pool.use(self.__file_path) as fp:
+                dataset = self.__ensure_dataset(fp)
+                if dataset.shape == (0, ):
+                    return None
+                # the returned dataset reads from the file, so keep it open while the dataset is referenced.
+                self.handle_pool.keep_open(self.__file_path, dataset)
+                return dataset
 
     def remove(self):
-        self.close()
-        if os.path.isfile(self.__file_path):
-            os.remove(self.__file_path)
+        with self.__write_lock:
+            self.close()
+            if os.path.isfile(self.__file_path):
+                os.remove(self.__file_path)
+            properties_path = self.get_properties_path(self.__file_path)
+            if properties_path.is_file():
+                properties_path.unlink()
@@ -36,6 +36,7 @@ from nion.swift.model import DisplayItem
 from nion.swift.model import Graphics
 from nion.swift.model import ImportExportManager
 from nion.swift.model import Persistence
+from nion.swift.model import Tracing
 from nion.swift.model import Utility
 from nion.utils import Event
 from nion.utils import Observable
@@ -314,7 +315,8 @@ class AcquisitionTask:
         if self._test_acquire_hook:
             self._test_acquire_hook()
 
-        partial_data_elements = self._acquire_data_elements()
+        with Tracing.span("acquire", "acquisition", frame_index=self.__frame_index):
+            partial_data_elements = self._acquire_data_elements()
         assert partial_data_elements is not None  # data_elements should never be empty
 
         # update frame_index if not supplied
@@ -431,6 +433,7 @@ class DataChannel:
         * state
         * src_channel_index
         * sub_area
+        * updated_sub_area
     """
     def __init__(self, hardware_source: "HardwareSource", index: int, channel_id: str=None, name: str=None, src_channel_index: int=None, processor=None):
         self.__hardware_source = hardware_source
@@ -442,6 +445,7 @@ class DataChannel:
         self.__start_count = False
         self.__state = None
         self.__sub_area = None
+        self.__updated_sub_area = None
         self.__data_and_metadata = None
         self.is_dirty = False
         self.data_channel_updated_event = Event.Event()
@@ -468,6 +472,11 @@ class DataChannel:
     def sub_area(self):
         return self.__sub_area
 
+    @property
+    def updated_sub_area(self):
+        """Return the sub area modified by the most recent update, or None if the entire data was replaced."""
+        return self.__updated_sub_area
+
     @property
     def src_channel_index(self):
         return self.__src_channel_index
@@ -511,6 +520,7 @@ class DataChannel:
         data = data_and_metadata.data
         master_data = self.__data_and_metadata.data if self.__data_and_metadata else None
         data_matches = master_data is not None and data.shape == master_data.shape and data.dtype == master_data.dtype
+        updated_sub_area = None
         if data_matches and sub_area is not None:
             top = sub_area[0][0]
             bottom = sub_area[0][0] + sub_area[1][0]
@@ -518,6 +528,7 @@ class DataChannel:
             right = sub_area[0][1] + sub_area[1][1]
             if top > 0 or left > 0 or bottom < data.shape[0] or right < data.shape[1]:
                 master_data[top:bottom, left:right] = data[top:bottom, left:right]
+                updated_sub_area = (top, left), (bottom - top, right - left)
             else:
                 master_data = numpy.copy(data)
         else:
@@ -530,6 +541,7 @@ class DataChannel:
         new_extended_data = DataAndMetadata.new_data_and_metadata(master_data, intensity_calibration=intensity_calibration, dimensional_calibrations=dimensional_calibrations, metadata=metadata, timestamp=timestamp, data_descriptor=data_descriptor)
 
         self.__data_and_metadata = new_extended_data
+        self.__updated_sub_area = updated_sub_area
 
         self.data_channel_updated_event.fire(new_extended_data)
         self.is_dirty = True
@@ -704,6 +716,10 @@ class HardwareSource:
     # beyond these three items, the data element will be converted to xdata using convert_data_element_to_data_and_metadata.
     # thread safe
     def __data_elements_changed(self, task, data_elements, view_id, is_complete, is_stopping):
+        with Tracing.span("data channel update", "acquisition", hardware_source_id=self.hardware_source_id) as span:
+            self.__data_elements_changed_inner(task, data_elements, view_id, is_complete, is_stopping, span)
+
+    def __data_elements_changed_inner(self, task, data_elements, view_id, is_complete, is_stopping, span):
         xdatas = list()
         data_channels = list()
         for data_element in data_elements:
@@ -721,6 +737,7 @@ class HardwareSource:
             # data_channel.update will make a copy of the data_and_metadata
             data_channel.update(data_and_metadata, channel_state, sub_area, view_id)
             data_channels.append(data_channel)
+            span.set(frame=Tracing.frame_id(data_channel.data_and_metadata))
             xdatas.append(data_channel.data_and_metadata)
         # update channel buffers with processors
         for data_channel in self.__data_channels:
@@ -1,10 +1,14 @@
 # standard libraries
+import concurrent.futures
 import copy
 import datetime
 import io
 import json
+import logging
 import os
 import pathlib
+import threading
+import traceback
 import typing
 import uuid
 import zipfile
@@ -138,6 +142,42 @@ class ImportExportManager(metaclass=Utility.Singleton):
                     return io_handler.read_data_items(ui, extension, path)
         return None
 
+    def read_data_items_bulk(self, ui, paths: typing.Sequence[str], *,
+                             progress_fn: typing.Callable[[str, int, int], None] = None,
+                             cancel_event: threading.Event = None,
+                             max_workers: int = None) -> typing.List[DataItem.DataItem]:
+        """Read the files on a pool of worker threads and return their data items in the order of the paths.
+
+        progress_fn is called on the calling thread with the path, the number of files read, and the number of files
+        as each file finishes. Files which cannot be read are logged and skipped. Setting cancel_event stops reading
+        files not yet started; the data items already read are returned.
+        """
+        def read_path(path: str) -> typing.Optional[typing.Sequence[DataItem.DataItem]]:
+            if cancel_event and cancel_event.is_set():
+                return None
+            try:
+                return self.read_data_items(ui, path)
+            except Exception as e:
+                logging.debug(f"Could not read image {path} / {e}")
+                traceback.print_exc()
+                return None
+
+        results = [None] * len(paths)
+        if paths:
+            max_workers = max_workers or min(os.cpu_count() or 1, 8)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="import") as executor:
+                futures = {executor.submit(read_path, path): index for index, path in enumerate(paths)}
+                for completed_count, future in enumerate(concurrent.futures.as_completed(futures)):
+                    index = futures[future]
+                    results[index] = future.result()
+                    if callable(progress_fn):
+                        progress_fn(paths[index], completed_count + 1, len(paths))
+        data_items = list()
+        for result in results:
+            if result:
+                data_items.extend(result)
+        return data_items
+
     # read file, return data elements
     def read_data_elements(self, ui, path):
         root, extension = os.path.splitext(path)
@@ -446,6 +486,37 @@ def create_data_element_from_extended_data(xdata: DataAndMetadata.DataAndMetadat
     return data_element
 
 
+# data is written in chunks of about this size so that writing does not need memory for more than a chunk beyond the
+# data itself. data stored in large format (hdf5) files is only read a chunk at a time.
+export_chunk_nbytes = 16 * 1024 * 1024
+
+
+def iter_data_chunks(data, chunk_nbytes: int = None) -> typing.Iterator[numpy.ndarray]:
+    """Yield consecutive slices of data along the first axis, each of about chunk_nbytes or at least one row."""
+    chunk_nbytes = chunk_nbytes or export_chunk_nbytes
+    shape = data.shape
+    if len(shape) == 0:
+        yield numpy.asarray(data)
+        return
+    row_nbytes = int(numpy.prod(shape[1:], dtype=numpy.uint64)) * numpy.dtype(data.dtype).itemsize
+    row_count = max(1, chunk_nbytes // max(1, row_nbytes))
+    for row in range(0, shape[0], row_count):
+        yield numpy.asarray(data[row:row + row_count])
+
+
+def write_npy_data(fp: typing.BinaryIO, data) -> None:
+    """Write data (a numpy array or an array-like such as an hdf5 dataset) to fp in the npy format, chunk by chunk."""
+    dtype = numpy.dtype(data.dtype)
+    header = {"descr": numpy.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": tuple(data.shape)}
+    try:
+        numpy.lib.format.write_array_header_1_0(fp, header)
+    except ValueError:
+        # version 1.0 headers are limited in length; only very high dimensional or structured data needs 2.0.
+        numpy.lib.format.write_array_header_2_0(fp, header)
+    for chunk in iter_data_chunks(data):
+        fp.write(numpy.ascontiguousarray(chunk, dtype=dtype).tobytes())
+
+
 class StandardImportExportHandler(ImportExportHandler):
 
     def __init__(self, io_handler_id, name, extensions):
@@ -497,9 +568,12 @@ class CSVImportExportHandler(ImportExportHandler):
         return True
 
     def write_display_item(self, ui, display_item: DisplayItem.DisplayItem, path_str: str, extension: str) -> None:
-        data = display_item.data_item.data
-        if data is not None:
-            numpy.savetxt(path_str, data, delimiter=', ')
+        with display_item.data_item.data_ref() as data_ref:
+            data = data_ref.data
+            if data is not None:
+                with open(path_str, "w") as fp:
+                    for chunk in iter_data_chunks(data):
+                        numpy.savetxt(fp, chunk, delimiter=', ')
 
 
 class CSV1ImportExportHandler(ImportExportHandler):
@@ -515,16 +589,21 @@ class CSV1ImportExportHandler(ImportExportHandler):
 
     def write_display_item(self, ui, display_item: DisplayItem.DisplayItem, path_str: str, extension: str) -> None:
         data_item = display_item.data_item
-        data = data_item.data
         calibration = data_item.xdata.dimensional_calibrations[0]
         intensity_calibration = data_item.xdata.intensity_calibration
-        if data is not None:
-            calibrated_data = numpy.empty(data.shape + (2,), data.dtype)
-            length = calibrated_data.shape[0]
-            calibrated_data[:, 0] = numpy.linspace(calibration.offset, calibration.offset + (length - 1) * calibration.scale, length)
-            calibrated_data[:, 1] = intensity_calibration.offset + data * intensity_calibration.scale
-            header = str(calibration.units) + ", " + str(intensity_calibration.units)
-            numpy.savetxt(path_str, calibrated_data, delimiter=', ', header=header)
+        with data_item.data_ref() as data_ref:
+            data = data_ref.data
+            if data is not None:
+                header = str(calibration.units) + ", " + str(intensity_calibration.units)
+                with open(path_str, "w") as fp:
+                    start = 0
+                    for chunk in iter_data_chunks(data, export_chunk_nbytes // 2):
+                        calibrated_data = numpy.empty(chunk.shape + (2,), chunk.dtype)
+                        indexes = numpy.arange(start, start + chunk.shape[0])
+                        calibrated_data[:, 0] = calibration.offset + indexes * calibration.scale
+                        calibrated_data[:, 1] = intensity_calibration.offset + chunk * intensity_calibration.scale
+                        numpy.savetxt(fp, calibrated_data, delimiter=', ', header=header if start == 0 else str())
+                        start += chunk.shape[0]
 
 
 class NDataImportExportHandler(ImportExportHandler):
@@ -551,21 +630,14 @@ class NDataImportExportHandler(ImportExportHandler):
     def write_display_item(self, ui, display_item: DisplayItem.DisplayItem, path_str: str, extension: str) -> None:
         data_item = display_item.data_item
         data_element = create_data_element_from_data_item(data_item, include_data=False)
-        data = data_item.data
-        if data is not None:
-            root, ext = os.path.splitext(path_str)
-            metadata_path = root + "_metadata.json"
-            data_path = root + "_data.npy"
-            try:
-                with open(metadata_path, "w") as fp:
-                    json.dump(data_element, fp)
-                numpy.save(data_path, data)
-                zip_file = zipfile.ZipFile(path_str, 'w')
-                zip_file.write(metadata_path, "metadata.json")
-                zip_file.write(data_path, "data.npy")
-            finally:
-                os.remove(metadata_path)
-                os.remove(data_path)
+        with data_item.data_ref() as data_ref:
+            data = data_ref.data
+            if data is not None:
+                # the data is streamed into the archive rather than through temporary files.
+                with zipfile.ZipFile(path_str, 'w') as zip_file:
+                    zip_file.writestr("metadata.json", json.dumps(data_element))
+                    with zip_file.open("data.npy", "w", force_zip64=True) as fp:
+                        write_npy_data(fp, data)
 
 
 class NumPyImportExportHandler(ImportExportHandler):
@@ -606,12 +678,15 @@ class NumPyImportExportHandler(ImportExportHandler):
         data_path = pathlib.Path(path_str)
         metadata_path = data_path.with_suffix(".json")
         data_element = create_data_element_from_data_item(data_item, include_data=False)
-        data = data_item.data
-        if data is not None:
+        with data_item.data_ref() as data_ref:
+            data = data_ref.data
+            if data is None:
+                return
             try:
                 with open(str(metadata_path), "w") as fp:
                     json.dump(data_element, fp)
-                numpy.save(str(data_path), data)
+                with open(str(data_path), "wb") as fp:
+                    write_npy_data(fp, data)
             except Exception:
                 os.remove(str(metadata_path))
                 os.remove(str(data_path))
@@ -0,0 +1,121 @@
+"""
+Track the data resident in memory for the data items of a document and keep it within a budget.
+
+Data items report accesses and loads to the memory manager. When the resident data exceeds the budget, the least
+recently used data items are asked to evict their data. Evicted data is reloaded from storage on its next access.
+"""
+
+# standard libraries
+import collections
+import threading
+import typing
+
+# third party libraries
+# None
+
+# local libraries
+# None
+
+
+class MemoryManager:
+    """Keep the loaded data of data items within a memory budget by evicting the least recently used data.
+
+    A budget of None (the default) means unlimited; resident bytes and statistics are still tracked.
+
+    Only data that is unloadable (backed by storage) and not in a transaction can be evicted; other data is counted as
+    resident but is never evicted. Budget checks are requested by data item accesses and loads and run from periodic,
+    which the document model calls regularly from the main thread. Call enforce_budget to check immediately.
+    """
+
+    def __init__(self, budget: typing.Optional[int] = None):
+        self.__lock = threading.RLock()
+        self.__budget = budget
+        self.__data_items = collections.OrderedDict()  # least recently used first
+        self.__is_check_pending = False
+        self.__eviction_count = 0
+        self.__evicted_bytes = 0
+        self.__reload_count = 0
+        self.__reload_time_total = 0.0
+        self.__reload_time_max = 0.0
+
+    @property
+    def budget(self) -> typing.Optional[int]:
+        return self.__budget
+
+    @budget.setter
+    def budget(self, value: typing.Optional[int]) -> None:
+        self.__budget = value
+        self.__is_check_pending = True
+
+    def add_data_item(self, data_item) -> None:
+        with self.__lock:
+            self.__data_items[data_item] = None
+            self.__is_check_pending = True
+
+    def remove_data_item(self, data_item) -> None:
+        with self.__lock:
+            self.__data_items.pop(data_item, None)
+
+    def data_item_accessed(self, data_item) -> None:
+        """Mark the data item as most recently used. Thread safe."""
+        with self.__lock:
+            if data_item in self.__data_items:
+                self.__data_items.move_to_end(data_item)
+                self.__is_check_pending = True
+
+    def data_item_loaded(self, data_item, elapsed: float, is_reload: bool) -> None:
+        """Record that the data item loaded its data in elapsed seconds; reloads are evicted data loaded again."""
+        with self.__lock:
+            if is_reload:
+                self.__reload_count += 1
+                self.__reload_time_total += elapsed
+                self.__reload_time_max = max(self.__reload_time_max, elapsed)
+        self.data_item_accessed(data_item)
+
+    @property
+    def resident_bytes(self) -> int:
+        with self.__lock:
+            data_items = list(self.__data_items.keys())
+        return sum(data_item.resident_data_nbytes for data_item in data_items)
+
+    def periodic(self) -> None:
+        if self.__is_check_pending:
+            self.enforce_budget()
+
+    def enforce_budget(self) -> int:
+        """Evict least recently used data until the resident data is within budget. Return the number evicted."""
+        with self.__lock:
+            self.__is_check_pending = False
+            budget = self.__budget
+            if budget is None:
+                return 0
+            data_items = list(self.__data_items.keys())
+        resident_bytes = sum(data_item.resident_data_nbytes for data_item in data_items)
+        eviction_count = 0
+        for data_item in data_items:
+            if resident_bytes <= budget:
+                break
+            evicted_bytes = data_item.evict_data()
+            if evicted_bytes:
+                resident_bytes -= evicted_bytes
+                eviction_count += 1
+                with self.__lock:
+                    self.__eviction_count += 1
+                    self.__evicted_bytes += evicted_bytes
+        return eviction_count
+
+    @property
+    def statistics(self) -> typing.Dict[str, typing.Any]:
+        """Return the resident bytes, budget, eviction counts, and reload latency (seconds)."""
+        resident_bytes = self.resident_bytes
+        with self.__lock:
+            return {
+                "budget": self.__budget,
+                "resident_bytes": resident_bytes,
+                "data_item_count": len(self.__data_items),
+                "eviction_count": self.__eviction_count,
+                "evicted_bytes": self.__evicted_bytes,
+                "reload_count": self.__reload_count,
+                "reload_time_mean": self.__reload_time_total / self.__reload_count if self.__reload_count else 0.0,
+                "reload_time_max": self.__reload_time_max,
+            }
@@ -37,6 +37,34 @@ def migrate_library_to_latest(library_properties: typing.Dict) -> None:
     migrate_library_to_v3(library_properties)
 
 
+def read_header(properties: typing.Mapping) -> typing.Dict:
+    """Return the uuid, version, title, created date, and data shape of data item properties of any version.
+
+    This is much cheaper than migrating the properties and does not modify them. It is enough to list the items and to
+    decide which items need to be migrated at all.
+    """
+    version = properties.get("version", 0)
+    title = properties.get("title")
+    if title is None:
+        title = properties.get("description", dict()).get("title")
+    if title is None:
+        title = properties.get("metadata", dict()).get("description", dict()).get("title")
+    created = properties.get("created")
+    if created is None and "datetime_original" in properties:
+        local_datetime = Utility.get_datetime_from_datetime_item(properties["datetime_original"])
+        created = local_datetime.isoformat() if local_datetime else None
+    data_shape = properties.get("data_shape")
+    if data_shape is None:
+        data_source_properties = properties.get("data_source")
+        if data_source_properties is None and properties.get("data_sources"):
+            data_source_properties = properties["data_sources"][0]
+        if isinstance(data_source_properties, dict):
+            data_shape = data_source_properties.get("data_shape")
+    if data_shape is None:
+        data_shape = properties.get("master_data_shape")
+    return {"uuid": properties.get("uuid"), "version": version, "title": title, "created": created, "data_shape": tuple(data_shape) if data_shape is not None else None}
+
+
 def transform_to_latest(properties):
     return properties
 
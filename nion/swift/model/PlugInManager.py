@@ -138,10 +138,14 @@ class PlugInAdapter:
 
 
 def load_plug_ins(app, root_dir):
-    """Load plug-ins."""
+    """Load plug-ins.
+
+    If app is None, only the plug-in packages and the plug-ins in root_dir are loaded, since the data and document
+    locations are provided by the user interface.
+    """
     global extensions
 
-    ui = app.ui
+    ui = app.ui if app else None
 
     # a list of directories in which sub-directories PlugIns will be searched.
     subdirectories = []
@@ -152,7 +156,7 @@ def load_plug_ins(app, root_dir):
 
     # also search the default data location; create directory there if it doesn't exist to make it easier for user.
     # default data location will be application specific.
-    data_location = ui.get_data_location()
+    data_location = ui.get_data_location() if ui else None
     if data_location is not None:
         subdirectories.append(data_location)
         # create directories here if they don't exist
@@ -163,7 +167,7 @@ def load_plug_ins(app, root_dir):
 
     # search the Nion/Swift subdirectory of the default document location too,
     # but don't create directories here - avoid polluting user visible directories.
-    document_location = ui.get_document_location()
+    document_location = ui.get_document_location() if ui else None
     if document_location is not None:
         subdirectories.append(os.path.join(document_location, "Nion", "Swift"))
         # do not create them in documents if they don't exist. this location is optional.
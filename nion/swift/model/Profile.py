@@ -336,7 +336,18 @@ class Profile(Observable.Observable, Persistence.PersistentObject):
             project_reference = self.add_project_index(path)
         self.read_project(project_reference)
 
-    def upgrade_project(self, project: Project) -> None:
+    def upgrade_project(self, project: Project, progress_fn: typing.Callable[[int, int], None] = None) -> None:
+        """Upgrade the legacy project to a new project, calling progress_fn with the items processed and total items."""
+        target_project_path = self.migrate_project(project, progress_fn)
+        if target_project_path:
+            self.replace_upgraded_project(project, target_project_path)
+
+    def migrate_project(self, project: Project, progress_fn: typing.Callable[[int, int], None] = None) -> typing.Optional[pathlib.Path]:
+        """Copy the legacy project to a new project next to it and return the new project path.
+
+        Only writes the new project; the profile is not changed, so this may run on a thread. Return None if the project
+        does not need an upgrade. Call replace_upgraded_project with the path to finish the upgrade.
+        """
         assert project in self.__projects
         if project.needs_upgrade:
             legacy_path = project.legacy_path
@@ -348,9 +359,14 @@ class Profile(Observable.Observable, Persistence.PersistentObject):
             target_project_path.write_text(target_project_data_json, "utf-8")
             new_storage_system = FileStorageSystem.FileProjectStorageSystem(target_project_path)
             new_storage_system.load_properties()
-            FileStorageSystem.migrate_to_latest(project.project_storage_system, new_storage_system)
-            self.remove_project(project)
-            self.read_project(self.add_project_index(target_project_path))
+            FileStorageSystem.migrate_to_latest(project.project_storage_system, new_storage_system, progress_fn)
+            return target_project_path
+        return None
+
+    def replace_upgraded_project(self, project: Project, target_project_path: pathlib.Path) -> None:
+        """Replace the legacy project with the project it was migrated to by migrate_project."""
+        self.remove_project(project)
+        self.read_project(self.add_project_index(target_project_path))
 
     def read_project(self, project_reference: typing.Dict) -> typing.Optional[Project.Project]:
         if project_reference:
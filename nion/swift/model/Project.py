@@ -59,6 +59,14 @@ class Project(Observable.Observable, Persistence.PersistentObject):
     def open(self) -> None:
         self.__storage_system.reset()  # this makes storage reusable during tests
 
+    def close(self) -> None:
+        # data may still be being written in the background; make sure it is durable before closing. a failed write
+        # is raised after closing.
+        try:
+            self.__storage_system.flush_data()
+        finally:
+            super().close()
+
     def create_proxy(self) -> Persistence.PersistentObjectProxy:
         return self.container.create_item_proxy(item=self)
 
@@ -324,6 +332,10 @@ class Project(Observable.Observable, Persistence.PersistentObject):
     def prune(self) -> None:
         self.__storage_system.prune()
 
+    def read_migration_headers(self) -> typing.List[typing.Dict]:
+        """Return the uuid, title, created date, and data shape of the data items an upgrade would copy."""
+        return self.__storage_system.read_migration_headers()
+
     def migrate_to_latest(self) -> None:
         self.__storage_system.migrate_to_latest()
         self.__storage_system.load_properties()
@@ -342,6 +354,7 @@ class Project(Observable.Observable, Persistence.PersistentObject):
             self.unload_item("display_items", len(self.display_items) - 1)
         while len(self.data_items) > 0:
             self.unload_item("data_items", len(self.data_items) - 1)
+        self.__storage_system.flush_data()
 
 
 def data_item_factory(lookup_id):
@@ -0,0 +1,201 @@
+"""
+Detect stalls of the main (user interface) thread and sample the stacks of all threads while it is stalled.
+
+The main thread calls beat each time it runs its periodic processing from the event loop. A watchdog thread checks at
+regular intervals whether the last beat is older than the threshold and, if so, samples the stacks of all threads. The
+stall ends with the next beat. Stalls anywhere on the main thread (event handlers, drawing, periodic processing) are
+detected this way. The main thread may also mark its work with the activity context manager; activities (periodic
+listeners, tasks, etc.) only annotate the stalls. Stalls are collected into a per-session report.
+"""
+
+# standard libraries
+import collections
+import contextlib
+import functools
+import sys
+import threading
+import time
+import traceback
+import typing
+
+# third party libraries
+# None
+
+# local libraries
+# None
+
+
+def describe(fn: typing.Callable) -> str:
+    """Return a short label for a callable, suitable for an activity label."""
+    while isinstance(fn, functools.partial):
+        fn = fn.func
+    name = getattr(fn, "__qualname__", None) or getattr(fn, "__name__", None) or type(fn).__qualname__
+    module = getattr(fn, "__module__", None)
+    return f"{module}.{name}" if module else name
+
+
+class Stall:
+    """A single stall of the main thread.
+
+    The activities are the activity paths which individually exceeded the threshold, innermost first. The samples count
+    the sampled stacks by (activity path, stack text).
+    """
+
+    def __init__(self, start_time: float):
+        self.start_time = start_time
+        self.duration = 0.0
+        self.activities: typing.List[typing.Tuple[str, float]] = list()
+        self.samples: typing.Counter[typing.Tuple[str, str]] = collections.Counter()
+
+    @property
+    def activity(self) -> str:
+        """Return the innermost activity path responsible for the stall."""
+        if self.activities:
+            return self.activities[0][0]
+        if self.samples:
+            return self.samples.most_common(1)[0][0][0]
+        return str()
+
+
+class StallDetector:
+    """Watch the main thread and record stalls longer than threshold seconds.
+
+    The detector must be constructed on the main thread; beats and activities on other threads are ignored. Watching
+    begins with the first beat. Call start to start the watchdog thread and close to stop it. Stalls are recorded
+    (without stack samples) on the next beat even when the watchdog is not running.
+    """
+
+    max_stall_count = 1000
+
+    def __init__(self, threshold: float = 0.25, sample_interval: float = 0.05):
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.__thread_id = threading.get_ident()
+        self.__lock = threading.RLock()
+        self.__labels: typing.List[str] = list()
+        self.__last_beat_time: typing.Optional[float] = None
+        self.__stall: typing.Optional[Stall] = None
+        self.__stalls: typing.Deque[Stall] = collections.deque(maxlen=self.max_stall_count)
+        self.__stop_event = threading.Event()
+        self.__thread: typing.Optional[threading.Thread] = None
+
+    def close(self) -> None:
+        self.__stop_event.set()
+        if self.__thread:
+            self.__thread.join()
+            self.__thread = None
+
+    def start(self) -> None:
+        if not self.__thread:
+            self.__stop_event.clear()
+            self.__thread = threading.Thread(target=self.__watch, name="stall-detector", daemon=True)
+            self.__thread.start()
+
+    @property
+    def stalls(self) -> typing.List[Stall]:
+        with self.__lock:
+            return list(self.__stalls)
+
+    def beat(self) -> None:
+        """Mark that the main thread is responsive. A stall in progress ends with the beat."""
+        if threading.get_ident() != self.__thread_id:
+            return
+        beat_time = time.perf_counter()
+        with self.__lock:
+            stall = self.__stall
+            last_beat_time = self.__last_beat_time
+            if stall is None and last_beat_time is not None and beat_time - last_beat_time >= self.threshold:
+                stall = Stall(last_beat_time)
+            if stall is not None:
+                stall.duration = beat_time - stall.start_time
+                self.__stalls.append(stall)
+            self.__stall = None
+            self.__last_beat_time = beat_time
+
+    @contextlib.contextmanager
+    def activity(self, label: str) -> typing.Iterator[None]:
+        """Mark the work done within the context as the labeled activity. Activities may be nested."""
+        if threading.get_ident() != self.__thread_id:
+            yield
+            return
+        start_time = time.perf_counter()
+        with self.__lock:
+            self.__labels.append(label)
+            path = "/".join(self.__labels)
+        try:
+            yield
+        finally:
+            end_time = time.perf_counter()
+            duration = end_time - start_time
+            with self.__lock:
+                self.__labels.pop()
+                if duration >= self.threshold:
+                    # annotate the stall in progress. if there was a beat during the activity and the main thread has
+                    # been responsive since, the stall has already been recorded by the beat.
+                    responsive_time = max(self.__last_beat_time, start_time) if self.__last_beat_time is not None else start_time
+                    if self.__stall is None and end_time - responsive_time >= self.threshold:
+                        self.__stall = Stall(responsive_time)
+                    if self.__stall is not None:
+                        self.__stall.activities.append((path, duration))
+
+    def __watch(self) -> None:
+        while not self.__stop_event.wait(self.sample_interval):
+            with self.__lock:
+                last_beat_time = self.__last_beat_time
+                if last_beat_time is None or time.perf_counter() - last_beat_time < self.threshold:
+                    continue
+                if self.__stall is None:
+                    self.__stall = Stall(last_beat_time)
+                stall = self.__stall
+                path = "/".join(self.__labels)
+            stack_text = self.__sample_stacks()
+            with self.__lock:
+                # only record the sample if the main thread is still in the same stall (no beat since).
+                if self.__stall is stall:
+                    stall.samples[(path, stack_text)] += 1
+
+    def __sample_stacks(self) -> str:
+        # main thread first, followed by the other threads which are not idle.
+        frames = sys._current_frames()
+        watch_thread_id = threading.get_ident()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        lines = list()
+        for thread_id in sorted(frames.keys(), key=lambda thread_id: thread_id != self.__thread_id):
+            if thread_id == watch_thread_id:
+                continue
+            stack = traceback.extract_stack(frames[thread_id])
+            if thread_id != self.__thread_id and stack and stack[-1].name in ("wait", "select", "_worker", "sleep", "get", "_wait_for_tstate_lock", "accept", "readinto", "run_forever"):
+                continue
+            lines.append(f"# Thread: {thread_names.get(thread_id, thread_id)}")
+            for frame_summary in stack:
+                lines.append(f'File: "{frame_summary.filename}", line {frame_summary.lineno}, in {frame_summary.name}')
+                if frame_summary.line:
+                    lines.append(f"  {frame_summary.line.strip()}")
+        return "\n".join(lines)
+
+    def report(self, stack_count: int = 5) -> str:
+        """Return a text report of the stalls recorded this session.
+
+        The report lists the total and longest stall time for each responsible activity and the most frequently sampled
+        stacks.
+        """
+        stalls = self.stalls
+        if not stalls:
+            return "No stalls of the main thread longer than {:.0f} ms.".format(self.threshold * 1000)
+        lines = list()
+        lines.append("{} stalls of the main thread longer than {:.0f} ms; total {:.2f} s, longest {:.2f} s.".format(
+            len(stalls), self.threshold * 1000, sum(stall.duration for stall in stalls), max(stall.duration for stall in stalls)))
+        activity_durations: typing.Dict[str, typing.List[float]] = collections.defaultdict(list)
+        samples: typing.Counter[typing.Tuple[str, str]] = collections.Counter()
+        for stall in stalls:
+            activity_durations[stall.activity].append(stall.duration)
+            samples.update(stall.samples)
+        lines.append("By activity:")
+        for activity, durations in sorted(activity_durations.items(), key=lambda item: -sum(item[1])):
+            lines.append("  {}: {} stalls, total {:.2f} s, longest {:.2f} s".format(activity or "(unknown)", len(durations), sum(durations), max(durations)))
+        if samples:
+            lines.append("Most frequent stacks:")
+            for (activity, stack_text), count in samples.most_common(stack_count):
+                lines.append("  {} samples in {}".format(count, activity or "(unknown)"))
+                lines.extend("    " + line for line in stack_text.splitlines())
+        return "\n".join(lines)
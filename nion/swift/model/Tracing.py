@@ -0,0 +1,166 @@
+"""
+Lightweight span based tracing across threads, off by default.
+
+When enabled, spans (named, timed sections of work) are recorded with their thread into a ring buffer. Spans may carry
+arguments such as the data item uuid and the frame (the timestamp of the data, which is kept from acquisition through
+display), so that a single frame can be followed from acquisition to pixels on screen. A span which gives the frame a
+new identifier (storing it into a data item, for instance) carries the new identifier as the next_frame argument. The
+buffer can be dumped to a trace event JSON file which can be loaded into timeline viewers such as chrome://tracing or
+Perfetto.
+
+When disabled, span returns a shared do-nothing context manager so the instrumented code pays only a function call.
+Code with span arguments which are costly to compute checks is_enabled first.
+"""
+
+# standard libraries
+import collections
+import datetime
+import json
+import os
+import pathlib
+import threading
+import time
+import typing
+
+# third party libraries
+# None
+
+# local libraries
+# None
+
+
+class Span:
+    """A section of work being timed. Use set to add arguments while the span is active."""
+
+    __slots__ = ("name", "category", "args", "start_time")
+
+    def __init__(self, name: str, category: str, args: typing.Dict):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start_time = 0.0
+
+    def __enter__(self) -> "Span":
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        end_time = time.perf_counter()
+        _record("X", self.name, self.category, self.start_time, end_time - self.start_time, self.args)
+
+    def set(self, **kwargs) -> None:
+        self.args.update(kwargs)
+
+
+class NullSpan:
+    """A span which records nothing; used when tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+    def set(self, **kwargs) -> None:
+        pass
+
+
+_null_span = NullSpan()
+_origin = time.perf_counter()
+_events: typing.Optional[typing.Deque] = None  # (phase, name, category, start time, duration, thread id, args)
+_thread_names: typing.Dict[int, str] = dict()
+
+default_capacity = 100000
+
+
+def enable(capacity: int = None) -> None:
+    """Enable tracing, keeping the most recent capacity spans. Clears previously recorded spans."""
+    global _events
+    _thread_names.clear()
+    _events = collections.deque(maxlen=capacity or default_capacity)
+
+
+def disable() -> None:
+    """Disable tracing and discard the recorded spans."""
+    global _events
+    _events = None
+
+
+def is_enabled() -> bool:
+    return _events is not None
+
+
+def span(name: str, category: str, **kwargs) -> typing.Union[Span, NullSpan]:
+    """Return a context manager timing the enclosed work as a span with the arguments, if tracing is enabled."""
+    if _events is None:
+        return _null_span
+    return Span(name, category, kwargs)
+
+
+def instant(name: str, category: str, **kwargs) -> None:
+    """Record an instantaneous event with the arguments, if tracing is enabled."""
+    if _events is not None:
+        _record("i", name, category, time.perf_counter(), 0.0, kwargs)
+
+
+def frame_id(data_and_metadata) -> typing.Optional[datetime.datetime]:
+    """Return the frame identifier of the data, its timestamp, used to follow a frame through the spans."""
+    return getattr(data_and_metadata, "timestamp", None) if data_and_metadata is not None else None
+
+
+def _record(phase: str, name: str, category: str, start_time: float, duration: float, args: typing.Dict) -> None:
+    events = _events
+    if events is not None:
+        thread_id = threading.get_ident()
+        if thread_id not in _thread_names:
+            _thread_names[thread_id] = threading.current_thread().name
+        events.append((phase, name, category, start_time, duration, thread_id, args))
+
+
+def get_trace_events() -> typing.Dict:
+    """Return the recorded spans as a trace event format dict.
+
+    Spans with the same frame argument, or with a frame argument given as the next_frame of a span of the frame, are
+    connected by flow events in time order.
+    """
+    events = list(_events) if _events is not None else list()
+    frame_aliases = dict()  # next frame -> frame
+    for phase, name, category, start_time, duration, thread_id, args in events:
+        if args.get("frame") is not None and args.get("next_frame") is not None:
+            frame_aliases[str(args["next_frame"])] = str(args["frame"])
+    pid = os.getpid()
+    trace_events = list()
+    for thread_id, thread_name in list(_thread_names.items()):
+        trace_events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id, "args": {"name": thread_name}})
+    frame_events: typing.Dict[str, typing.List] = collections.defaultdict(list)
+    for phase, name, category, start_time, duration, thread_id, args in events:
+        trace_event = {"name": name, "cat": category, "ph": phase, "ts": (start_time - _origin) * 1E6, "pid": pid, "tid": thread_id,
+                       "args": {key: value if isinstance(value, (int, float, bool)) else str(value) for key, value in args.items() if value is not None}}
+        if phase == "X":
+            trace_event["dur"] = duration * 1E6
+        else:
+            trace_event["s"] = "t"
+        trace_events.append(trace_event)
+        frame = trace_event["args"].get("frame")
+        if frame and phase == "X":
+            while frame in frame_aliases and frame_aliases[frame] != frame:
+                frame = frame_aliases[frame]
+            frame_events[frame].append(trace_event)
+    for flow_id, frame in enumerate(sorted(frame_events.keys())):
+        frame_spans = sorted(frame_events[frame], key=lambda trace_event: trace_event["ts"])
+        if len(frame_spans) > 1:
+            for index, trace_event in enumerate(frame_spans):
+                flow_phase = "s" if index == 0 else "f" if index == len(frame_spans) - 1 else "t"
+                flow_event = {"name": "frame", "cat": "frame", "ph": flow_phase, "id": flow_id, "ts": trace_event["ts"], "pid": pid, "tid": trace_event["tid"]}
+                if flow_phase == "f":
+                    flow_event["bp"] = "e"
+                trace_events.append(flow_event)
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def dump(file_path: typing.Union[str, pathlib.Path]) -> None:
+    """Write the recorded spans to a trace event JSON file."""
+    with open(file_path, "w") as fp:
+        json.dump(get_trace_events(), fp)
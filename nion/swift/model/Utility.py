@@ -4,11 +4,13 @@ import collections
 import contextlib
 import datetime
 import functools
+import json
 import logging
 import sys
 import threading
 import time
 import traceback
+import typing
 
 # third party libraries
 import numpy
@@ -216,6 +218,83 @@ def clean_item_no_list(i):
     return None
 
 
+_json_encoder = json.JSONEncoder()
+
+
+class CleanJSONCache:
+    """Encode dicts as the JSON text of their json-clean version, reusing the text of unchanged item dicts.
+
+    dumps(d) returns the same text as json.dumps(clean_dict(d)). The text of each nested dict with a uuid (the
+    properties of a persistent object) is cached and reused until the dict is invalidated, so the caller must call
+    invalidate for each item dict it changes (and for the item dicts containing it) and invalidate_nested for values
+    which may contain item dicts changed in place. Cached text for dicts no longer reachable is dropped on each dumps.
+    """
+
+    def __init__(self):
+        self.__lock = threading.RLock()
+        self.__fragments = dict()  # id(item dict) -> (item dict, text); holding the dict keeps its id unique
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__fragments = dict()
+
+    def invalidate(self, d: typing.Optional[typing.Dict]) -> None:
+        with self.__lock:
+            self.__fragments.pop(id(d), None)
+
+    def invalidate_nested(self, value) -> None:
+        with self.__lock:
+            if self.__fragments:
+                self.__invalidate_nested(value)
+
+    def __invalidate_nested(self, value) -> None:
+        value_type = type(value)
+        if value_type == dict:
+            self.__fragments.pop(id(value), None)
+            for item in value.values():
+                self.__invalidate_nested(item)
+        elif value_type in (list, tuple):
+            for item in value:
+                self.__invalidate_nested(item)
+
+    def dumps(self, d: typing.Dict) -> str:
+        with self.__lock:
+            fragments = dict()
+            text = self.__encode_dict(d, fragments, False)
+            self.__fragments = fragments
+            return text
+
+    def __encode_dict(self, d: typing.Dict, fragments: typing.Dict, is_cached: bool) -> str:
+        if is_cached:
+            fragment = self.__fragments.get(id(d))
+            if fragment and fragment[0] is d:
+                fragments[id(d)] = fragment
+                return fragment[1]
+        parts = list()
+        for key, value in d.items():
+            text = self.__encode_item(value, fragments)
+            if text is not None:
+                if not isinstance(key, str):
+                    key = _json_encoder.encode(key)
+                parts.append(json.encoder.encode_basestring_ascii(key) + ": " + text)
+        text = "{" + ", ".join(parts) + "}"
+        if is_cached:
+            fragments[id(d)] = (d, text)
+        return text
+
+    def __encode_item(self, i, fragments: typing.Dict) -> typing.Optional[str]:
+        # return None for items dropped by clean_dict.
+        itype = type(i)
+        if itype == str:
+            return json.encoder.encode_basestring_ascii(i)
+        elif itype == dict:
+            return self.__encode_dict(i, fragments, "uuid" in i)
+        elif itype == list or itype == tuple:
+            return "[" + ", ".join(self.__encode_item(item, fragments) or "null" for item in i) + "]"
+        cleaned_item = clean_item(i)
+        return _json_encoder.encode(cleaned_item) if cleaned_item is not None else None
+
+
 def parse_version(version, count=3, max_count=None):
     max_count = max_count if max_count is not None else count
     version_components = [int(version_component) for version_component in version.split(".")]
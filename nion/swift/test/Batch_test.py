@@ -0,0 +1,83 @@
+# standard libraries
+import contextlib
+import io
+import logging
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+# third party libraries
+import numpy
+
+# local libraries
+from nion.swift.batch import Batch
+from nion.swift.batch import __main__ as BatchMain
+
+
+class TestBatchClass(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+        self.input_directory = self.directory / "input"
+        self.input_directory.mkdir()
+        for index in range(3):
+            numpy.save(str(self.input_directory / f"data{index}.npy"), numpy.random.randn(16, 16))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_batch_writes_processed_inputs_to_output_directory(self):
+        output_directory = self.directory / "output"
+        report = Batch.run_batch([self.input_directory], ["crop", "fft"], output_directory=output_directory, max_workers=2)
+        self.assertEqual(3, len(report.results))
+        self.assertEqual(0, report.failed_count)
+        self.assertEqual(["data0.ndata1", "data1.ndata1", "data2.ndata1"], sorted(p.name for p in output_directory.iterdir()))
+
+    def test_batch_adds_results_to_project_and_processes_project_inputs(self):
+        project_path = self.directory / "Results" / "Results.nsproj"
+        report = Batch.run_batch([self.input_directory], ["gaussian-blur"], project_path=project_path)
+        self.assertEqual(0, report.failed_count)
+        with Batch.open_project(project_path) as document_model:
+            self.assertEqual(3, len(document_model.data_items))
+            self.assertEqual(["data0 (gaussian-blur)", "data1 (gaussian-blur)", "data2 (gaussian-blur)"], sorted(data_item.title for data_item in document_model.data_items))
+        output_directory = self.directory / "output"
+        report = Batch.run_batch([project_path], ["fft"], output_directory=output_directory)
+        self.assertEqual(3, len(report.results))
+        self.assertEqual(0, report.failed_count)
+        self.assertEqual(3, len(list(output_directory.iterdir())))
+
+    def test_batch_reports_inapplicable_processing_as_failed_items(self):
+        numpy.save(str(self.input_directory / "line.npy"), numpy.random.randn(16))
+        report = Batch.run_batch([self.input_directory], ["line-profile"], output_directory=self.directory / "output")
+        self.assertEqual(4, len(report.results))
+        self.assertEqual(1, report.failed_count)
+        self.assertEqual(["line"], [result.name for result in report.results if not result.is_ok])
+
+    def test_batch_raises_error_for_unknown_processing_or_missing_input(self):
+        with self.assertRaises(Batch.BatchError):
+            Batch.run_batch([self.input_directory], ["not-a-processing"], output_directory=self.directory / "output")
+        with self.assertRaises(Batch.BatchError):
+            Batch.run_batch([self.directory / "missing"], ["fft"], output_directory=self.directory / "output")
+
+    def test_batch_rejects_formats_that_require_user_interface(self):
+        self.assertIn("npy", Batch.get_output_extensions())
+        self.assertNotIn("png", Batch.get_output_extensions())
+        with self.assertRaises(Batch.BatchError):
+            Batch.run_batch([self.input_directory], ["fft"], output_directory=self.directory / "output", output_extension="png")
+
+    def test_command_line_returns_status_and_prints_summary(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            status = BatchMain.main(["fft", "--input", str(self.input_directory), "--output-dir", str(self.directory / "output")])
+        self.assertEqual(0, status)
+        self.assertIn("3 items", output.getvalue())
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(1, BatchMain.main(["not-a-processing", "--input", str(self.input_directory), "--output-dir", str(self.directory / "output")]))
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            BatchMain.main(["fft", "--input", str(self.input_directory)])
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,60 @@
+# standard libraries
+import pathlib
+import tempfile
+import unittest
+
+# third party libraries
+# None
+
+# local libraries
+from nion.swift.benchmark import Benchmark
+from nion.swift.benchmark import Benchmarks  # registers the benchmarks
+from nion.swift.model import HardwareSource
+
+
+class TestBenchmarkClass(unittest.TestCase):
+
+    def setUp(self):
+        HardwareSource.HardwareSourceManager()._reset()
+
+    def tearDown(self):
+        HardwareSource.HardwareSourceManager().close()
+
+    def test_all_benchmarks_run_with_tiny_configuration(self):
+        configuration = Benchmark.BenchmarkConfiguration("tiny")
+        results = Benchmark.run_benchmarks(configuration)
+        self.assertEqual(set(Benchmark.benchmark_classes.keys()), set(results.keys()))
+        for result in results.values():
+            self.assertEqual(configuration.repeat, len(result.times))
+            self.assertGreater(result.median, 0.0)
+            self.assertGreaterEqual(result.peak_memory, 0)
+
+    def test_results_round_trip_through_file(self):
+        configuration = Benchmark.BenchmarkConfiguration("tiny", image_size=32)
+        results = {"a": Benchmark.BenchmarkResult("a", [0.1, 0.3, 0.2], 1000)}
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / "results.json"
+            Benchmark.write_results(path, results, configuration)
+            read_results, read_configuration = Benchmark.read_results(path)
+        self.assertEqual(configuration.to_dict(), read_configuration)
+        self.assertEqual([0.1, 0.3, 0.2], read_results["a"].times)
+        self.assertAlmostEqual(0.2, read_results["a"].median)
+        self.assertEqual(1000, read_results["a"].peak_memory)
+
+    def test_compare_results_reports_regressions_beyond_tolerance(self):
+        baseline = {"a": Benchmark.BenchmarkResult("a", [1.0], 1000), "b": Benchmark.BenchmarkResult("b", [1.0], 1000)}
+        results = {"a": Benchmark.BenchmarkResult("a", [1.1], 1000), "b": Benchmark.BenchmarkResult("b", [1.5], 2000), "c": Benchmark.BenchmarkResult("c", [9.0], 0)}
+        regressions = Benchmark.compare_results(results, baseline, tolerance=0.2)
+        self.assertEqual([("b", "median time"), ("b", "peak memory")], [(r.name, r.measurement) for r in regressions])
+        self.assertFalse(Benchmark.compare_results(results, baseline, tolerance=1.0))
+
+    def test_configuration_rejects_unknown_size_and_keys(self):
+        with self.assertRaises(ValueError):
+            Benchmark.BenchmarkConfiguration("enormous")
+        with self.assertRaises(ValueError):
+            Benchmark.BenchmarkConfiguration("tiny", pixel_count=4)
+        self.assertEqual(7, Benchmark.BenchmarkConfiguration("small", item_count=7).item_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
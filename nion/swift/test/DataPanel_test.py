@@ -16,6 +16,7 @@ from nion.swift import MimeTypes
 from nion.swift.model import DataGroup
 from nion.swift.model import DataItem
 from nion.swift.model import DocumentModel
+from nion.ui import DrawingContext
 from nion.ui import TestUI
 from nion.utils import Geometry
 from nion.utils import ListModel
@@ -659,6 +660,24 @@ class TestDataPanelClass(unittest.TestCase):
             data_panel.data_list_controller.scroll_bar_canvas_item.simulate_drag((8, 8), (24, 8))
             self.assertEqual(data_panel.data_list_controller.scroll_area_canvas_item.content.canvas_rect, Geometry.IntRect((-80, 0), (800, 304)))
 
+    def test_data_panel_list_only_activates_display_item_adapters_in_visible_window(self):
+        document_model = DocumentModel.DocumentModel()
+        document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
+        with contextlib.closing(document_controller):
+            for _ in range(100):
+                document_model.append_data_item(DataItem.DataItem(numpy.zeros((8, 8), numpy.uint32)))
+            document_controller.periodic()
+            data_panel = document_controller.find_dock_widget("data-panel").panel
+            canvas_item = data_panel._data_list_widget.content_widget.children[0].canvas_item
+            canvas_item.layout_immediate(Geometry.IntSize(width=320, height=160))
+            canvas_item.repaint_immediate(DrawingContext.DrawingContext(), Geometry.IntSize(width=320, height=160))
+            display_item_adapters = data_panel.data_list_controller.display_item_adapters
+            self.assertEqual(100, len(display_item_adapters))
+            self.assertTrue(display_item_adapters[0].is_active)
+            self.assertFalse(display_item_adapters[-1].is_active)
+            self.assertLess(len([display_item_adapter for display_item_adapter in display_item_adapters if display_item_adapter.is_active]), 10)
+        self.assertFalse(any(display_item_adapter.is_active for display_item_adapter in display_item_adapters))
+
     def test_data_panel_grid_contents_resize_properly(self):
         document_model = DocumentModel.DocumentModel()
         document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
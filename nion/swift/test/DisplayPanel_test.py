@@ -1,6 +1,7 @@
 # standard libraries
 import contextlib
 import logging
+import time
 import unittest
 import uuid
 import weakref
@@ -2129,6 +2130,30 @@ class TestDisplayPanelClass(unittest.TestCase):
             self.assertEqual(2, len(display_item4.display_data_channels))
             self.assertEqual(new_legend_position, display_item4.get_display_property("legend_position"))
 
+    def test_display_values_are_prepared_before_being_passed_to_canvas_item(self):
+        app = Application.Application(TestUI.UserInterface(), set_global=False)
+        document_model = DocumentModel.DocumentModel()
+        document_model.start_dispatcher()
+        document_controller = DocumentController.DocumentController(app.ui, document_model, workspace_id="library")
+        with contextlib.closing(document_controller):
+            display_panel = document_controller.selected_display_panel
+            data_item = DataItem.DataItem(numpy.random.randn(8, 8))
+            document_model.append_data_item(data_item)
+            display_item = document_model.get_display_item_for_data_item(data_item)
+            display_panel.set_display_panel_display_item(display_item)
+            display_panel.root_container.layout_immediate(Geometry.IntSize(240, 240))
+            data = numpy.random.randn(8, 8)
+            data_item.set_data(data)
+            start_time = time.time()
+            while time.time() - start_time < 5.0:
+                display_values = display_panel.display_canvas_item._display_values
+                if display_values and numpy.array_equal(display_values.data_and_metadata.data, data):
+                    break
+                time.sleep(0.01)
+            display_values = display_panel.display_canvas_item._display_values
+            self.assertTrue(numpy.array_equal(display_values.data_and_metadata.data, data))
+            self.assertTrue(display_values.is_prepared)
+
 
 if __name__ == '__main__':
     logging.getLogger().setLevel(logging.DEBUG)
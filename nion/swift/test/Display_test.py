@@ -12,10 +12,13 @@ import numpy
 # local libraries
 from nion.data import Calibration
 from nion.data import DataAndMetadata
+from nion.data import Image
 from nion.swift import Application
 from nion.swift import DocumentController
 from nion.swift import Facade
+from nion.swift.model import ColorMaps
 from nion.swift.model import DataItem
+from nion.swift.model import DisplayItem
 from nion.swift.model import DocumentModel
 from nion.swift.model import Symbolic
 from nion.swift.model import Utility
@@ -630,6 +633,116 @@ class TestDisplayClass(unittest.TestCase):
                 display_data = display_data_channel.get_calculated_display_values(True).display_data_and_metadata.data
                 self.assertTrue(numpy.array_equal(display_data, d[2, 2, ...]))
 
+    def test_partial_data_updates_keep_data_range_and_statistics_valid(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data = numpy.zeros((512, 64), numpy.float32)
+            data_item = DataItem.DataItem(data)
+            document_model.append_data_item(data_item)
+            display_item = document_model.get_display_item_for_data_item(data_item)
+            display_data_channel = display_item.display_data_channels[0]
+            self.assertEqual(display_data_channel.get_calculated_display_values(True).data_range, (0, 0))
+            for row, value in ((3, 4.0), (300, -2.0), (301, 8.0)):
+                data[row, :] = value
+                data_item.set_pending_xdata(DataAndMetadata.new_data_and_metadata(data), ((row, 0), (1, 64)))
+                data_item.update_to_pending_xdata()
+            display_values = display_data_channel.get_calculated_display_values(True)
+            self.assertEqual(display_values.data_range, (-2, 8))
+            data_statistics = display_values.data_statistics
+            self.assertAlmostEqual(data_statistics["mean"], numpy.mean(data))
+            self.assertAlmostEqual(data_statistics["std"], numpy.std(data), places=5)
+            self.assertAlmostEqual(data_statistics["sum"], numpy.sum(data))
+            # overwrite the extremes and make sure the previously reduced bands get reduced again
+            data[300:302, :] = 1.0
+            data_item.set_pending_xdata(DataAndMetadata.new_data_and_metadata(data), ((300, 0), (1, 64)))
+            data_item.set_pending_xdata(DataAndMetadata.new_data_and_metadata(data), ((301, 0), (1, 64)))
+            data_item.update_to_pending_xdata()
+            self.assertEqual(display_data_channel.get_calculated_display_values(True).data_range, (0, 4))
+
+    def test_partial_data_updates_only_reduce_updated_bands(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data = numpy.zeros((512, 64), numpy.float32)
+            data_item = DataItem.DataItem(data)
+            document_model.append_data_item(data_item)
+            display_item = document_model.get_display_item_for_data_item(data_item)
+            display_data_channel = display_item.display_data_channels[0]
+            display_data_summary = display_data_channel._display_data_summary
+            # full frame updates do not use the summary.
+            data_item.set_data(numpy.ones((512, 64), numpy.float32))
+            self.assertEqual(display_data_channel.get_calculated_display_values(True).data_range, (1, 1))
+            self.assertEqual(0, display_data_summary._reduced_band_count)
+            # the first partial update reduces all bands; later ones only the updated band.
+            for row, value in ((3, 4.0), (300, -2.0)):
+                data[row, :] = value
+                data_item.set_pending_xdata(DataAndMetadata.new_data_and_metadata(data), ((row, 0), (1, 64)))
+                data_item.update_to_pending_xdata()
+                display_data_channel.get_calculated_display_values(True).data_range
+            self.assertEqual(DisplayItem.DisplayDataSummary.band_count + 1, display_data_summary._reduced_band_count)
+            # display values made before the last update do not consume the dirty bands.
+            stale_display_values = display_data_channel.get_calculated_display_values(True)
+            data[400, :] = 9.0
+            data_item.set_pending_xdata(DataAndMetadata.new_data_and_metadata(data), ((400, 0), (1, 64)))
+            data_item.update_to_pending_xdata()
+            stale_display_values.data_statistics
+            display_values = display_data_channel.get_calculated_display_values(True)
+            self.assertIsNot(stale_display_values, display_values)
+            self.assertEqual(display_values.data_range, (-2, 9))
+            self.assertEqual(DisplayItem.DisplayDataSummary.band_count + 2, display_data_summary._reduced_band_count)
+
+    def test_full_data_update_after_partial_updates_recalculates_data_range(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data = numpy.zeros((256, 16), numpy.float32)
+            data_item = DataItem.DataItem(data)
+            document_model.append_data_item(data_item)
+            display_item = document_model.get_display_item_for_data_item(data_item)
+            display_data_channel = display_item.display_data_channels[0]
+            data[10, :] = 5.0
+            data_item.set_pending_xdata(DataAndMetadata.new_data_and_metadata(data), ((10, 0), (1, 16)))
+            data_item.update_to_pending_xdata()
+            self.assertEqual(display_data_channel.get_calculated_display_values(True).data_range, (0, 5))
+            data_item.set_data(numpy.full((256, 16), 3.0, numpy.float32))
+            self.assertEqual(display_data_channel.get_calculated_display_values(True).data_range, (3, 3))
+
+    def test_partial_data_updates_of_complex_data_keep_data_sample_valid(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data = numpy.ones((256, 16), numpy.complex64)
+            data_item = DataItem.DataItem(data)
+            document_model.append_data_item(data_item)
+            display_item = document_model.get_display_item_for_data_item(data_item)
+            display_data_channel = display_item.display_data_channels[0]
+            self.assertEqual(display_data_channel.get_calculated_display_values(True).data_sample.shape, (200, ))
+            data[:, :] = 100
+            data_item.set_pending_xdata(DataAndMetadata.new_data_and_metadata(data), ((0, 0), (256, 16)))
+            data_item.update_to_pending_xdata()
+            data_sample = display_data_channel.get_calculated_display_values(True).data_sample
+            self.assertTrue(numpy.allclose(data_sample, numpy.log(numpy.abs(100) + numpy.nextafter(0, 1))))
+
+    def test_apply_color_map_matches_rgba_image_from_array(self):
+        numpy.random.seed(0)
+        lookups = (None, ColorMaps.get_color_map_data_by_id("grayscale"), ColorMaps.get_color_map_data_by_id("magma"), ColorMaps.get_color_map_data_by_id("hsv"))
+        for dtype in (numpy.float32, numpy.float64, numpy.int16, numpy.uint16, numpy.int32):
+            data = (numpy.random.randn(300, 40) * 100).astype(dtype)
+            if data.dtype.kind == "f":
+                data[0, :3] = numpy.inf, -numpy.inf, numpy.nan
+            for display_limits in ((-50, 80), (10, 10), (-400, 400)):
+                for lookup in lookups:
+                    expected = Image.create_rgba_image_from_array(data, display_limits=display_limits, lookup=lookup)
+                    actual = ColorMaps.apply_color_map(data, display_limits, lookup, band_row_count=64)
+                    self.assertTrue(numpy.array_equal(expected, actual), (dtype, display_limits, lookup is None))
+        data = numpy.linspace(0, 1, 100, dtype=numpy.float32)
+        expected = Image.create_rgba_image_from_array(data, display_limits=(0.2, 0.8), lookup=None)
+        self.assertTrue(numpy.array_equal(expected, ColorMaps.apply_color_map(data, (0.2, 0.8), None)))
+
+    def test_apply_color_map_splits_large_data_into_bands(self):
+        data = numpy.random.randn(2048, 1024).astype(numpy.float32)
+        expected = Image.create_rgba_image_from_array(data, display_limits=(-1, 1), lookup=None)
+        out = numpy.empty(data.shape, numpy.uint32)
+        self.assertIs(ColorMaps.apply_color_map(data, (-1, 1), None, out=out, band_row_count=100), out)
+        self.assertTrue(numpy.array_equal(expected, out))
+
 
 if __name__ == '__main__':
     unittest.main()
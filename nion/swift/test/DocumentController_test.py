@@ -2,6 +2,7 @@
 import contextlib
 import gc
 import logging
+import time
 import unittest
 import weakref
 
@@ -894,6 +895,68 @@ class TestDocumentControllerClass(unittest.TestCase):
             document_controller.handle_redo()
             self.assertEqual(1, len(document_model.get_display_items_for_data_item(data_item)))
 
+    def test_undo_stack_drops_oldest_commands_beyond_memory_limit(self):
+        app = Application.Application(TestUI.UserInterface(), set_global=False)
+        document_model = DocumentModel.DocumentModel()
+        document_controller = DocumentController.DocumentController(app.ui, document_model, workspace_id="library")
+        with contextlib.closing(document_controller):
+            data_item = DataItem.DataItem(numpy.zeros((2, 2)))
+            document_model.append_data_item(data_item)
+            display_item = document_model.get_display_item_for_data_item(data_item)
+            copy_display_items = [document_model.get_display_item_copy_new(display_item) for i in range(3)]
+            undo_stack = document_controller._undo_stack
+            self.assertEqual(0, undo_stack.memory_footprint)
+            command = DocumentController.DocumentController.RemoveDisplayItemCommand(document_controller, copy_display_items[0])
+            command.perform()
+            document_controller.push_undo_command(command)
+            command_footprint = undo_stack.memory_footprint
+            self.assertLess(0, command_footprint)
+            # limit the stack to two commands; the third push drops the oldest command
+            undo_stack.memory_limit = command_footprint * 2 + command_footprint // 2
+            for copy_display_item in copy_display_items[1:]:
+                command = DocumentController.DocumentController.RemoveDisplayItemCommand(document_controller, copy_display_item)
+                command.perform()
+                document_controller.push_undo_command(command)
+            self.assertEqual(2, undo_stack._undo_count)
+            self.assertGreaterEqual(undo_stack.memory_limit, undo_stack.memory_footprint)
+            document_controller.handle_undo()
+            document_controller.handle_undo()
+            self.assertFalse(undo_stack.can_undo)
+            self.assertEqual(3, len(document_model.get_display_items_for_data_item(data_item)))
+
+    def test_move_display_layer_and_insert_data_item_commands_report_undelete_log_memory_footprint(self):
+        app = Application.Application(TestUI.UserInterface(), set_global=False)
+        document_model = DocumentModel.DocumentModel()
+        document_controller = DocumentController.DocumentController(app.ui, document_model, workspace_id="library")
+        with contextlib.closing(document_controller):
+            data_item1 = DataItem.DataItem(numpy.ones(8))
+            data_item2 = DataItem.DataItem(numpy.ones(8))
+            data_item3 = DataItem.DataItem(numpy.ones(8))
+            document_model.append_data_item(data_item1)
+            document_model.append_data_item(data_item2)
+            document_model.append_data_item(data_item3)
+            display_item1 = document_model.get_display_item_for_data_item(data_item1)
+            display_item1.append_display_data_channel(DisplayItem.DisplayDataChannel(data_item=data_item2), display_layer=dict())
+            display_item3 = document_model.get_display_item_for_data_item(data_item3)
+            undo_stack = document_controller._undo_stack
+            # the display data channel removed from the old display item is held on the undo stack.
+            command = DisplayPanel.MoveDisplayLayerCommand(document_model, display_item1, 1, display_item3, 1)
+            command.perform()
+            document_controller.push_undo_command(command)
+            self.assertLess(0, command.memory_footprint)
+            self.assertEqual(command.memory_footprint, undo_stack.memory_footprint)
+            document_controller.handle_undo()
+            self.assertEqual(0, undo_stack.memory_footprint)
+            # the inserted data item removed by undo is held on the redo stack.
+            command = document_controller.create_insert_data_item_command(lambda: document_model.copy_data_item(data_item1))
+            command.perform()
+            document_controller.push_undo_command(command)
+            document_controller.handle_undo()
+            self.assertLess(0, undo_stack.memory_footprint)
+            document_controller.handle_redo()
+            self.assertEqual(0, undo_stack.memory_footprint)
+            self.assertEqual(4, len(document_model.data_items))
+
     def test_add_line_profile_undo_redo_cycle(self):
         app = Application.Application(TestUI.UserInterface(), set_global=False)
         document_model = DocumentModel.DocumentModel()
@@ -1117,6 +1180,85 @@ class TestDocumentControllerClass(unittest.TestCase):
                 self.assertIn(profile.projects[1], document_controller.selected_projects)
 
 
+    def test_periodic_calls_due_listeners_by_priority_and_defers_low_priority_listeners_over_budget(self):
+        document_model = DocumentModel.DocumentModel()
+        document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
+        with contextlib.closing(document_controller):
+            periodic_listener_count = document_controller.periodic_listener_count
+            calls = list()
+            def low():
+                calls.append("low")
+            def normal():
+                calls.append("normal")
+            def high():
+                calls.append("high")
+            def later():
+                calls.append("later")
+            low_listener = document_controller.add_periodic(0, low, priority=-1)
+            normal_listener = document_controller.add_periodic(0, normal)
+            high_listener = document_controller.add_periodic(0, high, priority=1)
+            later_listener = document_controller.add_periodic(3600, later)
+            # with no time budget, the low priority listener is deferred.
+            document_controller.periodic_time_budget = 0.0
+            document_controller.periodic()
+            self.assertEqual(["high", "normal"], calls)
+            document_controller.periodic_time_budget = 10.0
+            document_controller.periodic()
+            self.assertEqual(["high", "normal", "high", "normal", "low"], calls)
+            # closed listeners are no longer called and are dropped.
+            normal_listener.close()
+            document_controller.periodic()
+            self.assertEqual(["high", "normal", "high", "normal", "low", "high", "low"], calls)
+            self.assertEqual(periodic_listener_count + 3, document_controller.periodic_listener_count)
+            listener_times = {label.rsplit(".", 1)[-1]: call_count for label, call_count, cumulative_time in document_controller.get_periodic_listener_times()}
+            self.assertEqual(3, listener_times["high"])
+            self.assertEqual(2, listener_times["normal"])
+            self.assertEqual(2, listener_times["low"])
+            self.assertNotIn("later", listener_times)
+
+    def test_periodic_runs_deferred_low_priority_listener_after_maximum_delay(self):
+        document_model = DocumentModel.DocumentModel()
+        document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
+        with contextlib.closing(document_controller):
+            calls = list()
+            def low():
+                calls.append("low")
+            def slow():
+                calls.append("slow")
+                time.sleep(0.01)
+            low_listener = document_controller.add_periodic(0, low, priority=-1)
+            slow_listener = document_controller.add_periodic(0, slow)
+            # the slow listener always exceeds the time budget.
+            document_controller.periodic_time_budget = 0.001
+            document_controller.periodic_max_delay = 0.05
+            document_controller.periodic()
+            self.assertNotIn("low", calls)
+            start_time = time.time()
+            while "low" not in calls and time.time() - start_time < 5.0:
+                document_controller.periodic()
+            self.assertIn("low", calls)
+            self.assertGreaterEqual(calls.count("slow"), 4)
+            low_listener.close()
+            slow_listener.close()
+
+    def test_periodic_defers_workspace_panels_over_budget(self):
+        document_model = DocumentModel.DocumentModel()
+        document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
+        with contextlib.closing(document_controller):
+            calls = list()
+            document_controller.workspace_controller.periodic = lambda: calls.append("workspace")
+            document_controller.periodic_time_budget = 10.0
+            document_controller.periodic()
+            self.assertEqual(["workspace"], calls)
+            normal_listener = document_controller.add_periodic(0, lambda: calls.append("normal"))
+            document_controller.periodic_time_budget = 0.0
+            document_controller.periodic()
+            self.assertEqual(["workspace", "normal"], calls)
+            document_controller.periodic_time_budget = 10.0
+            document_controller.periodic()
+            self.assertEqual(["workspace", "normal", "normal", "workspace"], calls)
+            normal_listener.close()
+
 if __name__ == '__main__':
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
@@ -10,6 +10,7 @@ import uuid
 import numpy
 
 # local libraries
+from nion.data import DataAndMetadata
 from nion.swift import Application
 from nion.swift import Facade
 from nion.swift.model import DataGroup
@@ -2249,6 +2250,133 @@ class TestDocumentModelClass(unittest.TestCase):
                 data_item_reference = document_model.get_data_item_reference("abc")
                 self.assertEqual(document_model.data_items[0], data_item_reference.data_item)
 
+    def test_memory_manager_evicts_least_recently_used_data_and_reloads_it_on_access(self):
+        with create_memory_profile_context() as profile_context:
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            with contextlib.closing(document_model):
+                data_items = list()
+                for i in range(4):
+                    data_item = DataItem.DataItem(numpy.full((100, 100), i, numpy.float64))
+                    document_model.append_data_item(data_item)
+                    data_item.increment_data_ref_count()
+                    data_items.append(data_item)
+                memory_manager = document_model.memory_manager
+                self.assertEqual(4 * 80000, memory_manager.resident_bytes)
+                data_items[0].data  # most recently used
+                memory_manager.budget = 2 * 80000
+                document_model.perform_data_item_updates()
+                self.assertEqual([False, True, True, False], [data_item.is_data_evicted for data_item in data_items])
+                self.assertEqual(2 * 80000, memory_manager.resident_bytes)
+                self.assertTrue(numpy.array_equal(numpy.full((100, 100), 1), data_items[1].data))
+                self.assertFalse(data_items[1].is_data_evicted)
+                statistics = memory_manager.statistics
+                self.assertEqual(2, statistics["eviction_count"])
+                self.assertEqual(1, statistics["reload_count"])
+                for data_item in data_items:
+                    data_item.decrement_data_ref_count()
+                self.assertEqual(0, memory_manager.resident_bytes)
+
+    def test_memory_manager_eviction_leaves_data_of_existing_xdata_loaded(self):
+        with create_memory_profile_context() as profile_context:
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            with contextlib.closing(document_model):
+                data_item = DataItem.DataItem(numpy.full((100, 100), 3, numpy.float64))
+                document_model.append_data_item(data_item)
+                with data_item.data_ref():
+                    xdata = data_item.xdata
+                    data = xdata.data
+                    self.assertEqual(80000, data_item.evict_data())
+                    self.assertTrue(data_item.is_data_evicted)
+                    self.assertIsNot(xdata, data_item.xdata)
+                    # the previous xdata is not reloaded on access.
+                    self.assertIs(data, xdata.data)
+                    self.assertEqual(0, document_model.memory_manager.statistics["reload_count"])
+                    self.assertTrue(numpy.array_equal(data, data_item.data))
+                    self.assertEqual(1, document_model.memory_manager.statistics["reload_count"])
+
+    def test_memory_manager_does_not_evict_data_in_transaction(self):
+        with create_memory_profile_context() as profile_context:
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            with contextlib.closing(document_model):
+                data_item = DataItem.DataItem(numpy.zeros((100, 100)))
+                document_model.append_data_item(data_item)
+                document_model.memory_manager.budget = 0
+                with document_model.item_transaction(data_item):
+                    self.assertEqual(0, document_model.memory_manager.enforce_budget())
+                    self.assertFalse(data_item.is_data_evicted)
+                    self.assertEqual(80000, document_model.memory_manager.resident_bytes)
+
+    def test_pending_data_item_updates_are_coalesced_and_applied_within_time_budget(self):
+        with create_memory_profile_context() as profile_context:
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            with contextlib.closing(document_model):
+                data_items = list()
+                for i in range(3):
+                    data_item = DataItem.DataItem(numpy.zeros((4, 4)))
+                    document_model.append_data_item(data_item)
+                    data_items.append(data_item)
+                queue_data_item_update = document_model._DocumentModel__queue_data_item_update
+                for i, data_item in enumerate(data_items):
+                    queue_data_item_update(data_item, DataAndMetadata.new_data_and_metadata(numpy.full((4, 4), i + 1.0)))
+                queue_data_item_update(data_items[0], DataAndMetadata.new_data_and_metadata(numpy.full((4, 4), 5.0)))
+                self.assertEqual(3, document_model.pending_data_item_updates_count)
+                # a zero budget applies exactly one update per call, oldest first, and leaves the rest pending
+                document_model.perform_data_item_updates(time_budget=0)
+                self.assertEqual(2, document_model.pending_data_item_updates_count)
+                self.assertEqual(5.0, data_items[0].data[0, 0])
+                self.assertEqual(0.0, data_items[1].data[0, 0])
+                document_model.perform_data_item_updates(time_budget=None)
+                self.assertEqual(0, document_model.pending_data_item_updates_count)
+                self.assertEqual([5.0, 2.0, 3.0], [data_item.data[0, 0] for data_item in data_items])
+
+    def test_drag_session_limits_computation_rate_and_evaluates_final_state_when_closed(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            d = numpy.random.randn(8, 8, 16)
+            data_item = DataItem.DataItem(d)
+            document_model.append_data_item(data_item)
+            display_item = document_model.get_display_item_for_data_item(data_item)
+            pick_data_item = document_model.get_pick_new(display_item)
+            document_model.recompute_all()
+            document_model.drag_preview_period = 60
+            with document_model.begin_drag_session(display_item):
+                # the first change is previewed; later changes within the period are deferred.
+                display_item.graphics[0].position = 0, 0
+                document_model.recompute_all()
+                self.assertTrue(numpy.array_equal(pick_data_item.data, d[0, 0, :]))
+                display_item.graphics[0].position = 0.25, 0.25
+                display_item.graphics[0].position = 0.5, 0.5
+                document_model.perform_data_item_updates()
+                document_model.recompute_all()
+                self.assertTrue(numpy.array_equal(pick_data_item.data, d[0, 0, :]))
+            document_model.recompute_all()
+            self.assertTrue(numpy.array_equal(pick_data_item.data, d[4, 4, :]))
+            # without a drag session, every change is evaluated.
+            display_item.graphics[0].position = 0, 0
+            document_model.recompute_all()
+            self.assertTrue(numpy.array_equal(pick_data_item.data, d[0, 0, :]))
+
+    def test_drag_session_does_not_limit_computations_without_inputs_from_dragged_display_item(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            d = numpy.random.randn(8, 8, 16)
+            data_item = DataItem.DataItem(d)
+            document_model.append_data_item(data_item)
+            display_item = document_model.get_display_item_for_data_item(data_item)
+            pick_data_item = document_model.get_pick_new(display_item)
+            other_data_item = DataItem.DataItem(numpy.zeros((8, 8)))
+            document_model.append_data_item(other_data_item)
+            other_display_item = document_model.get_display_item_for_data_item(other_data_item)
+            document_model.recompute_all()
+            document_model.drag_preview_period = 60
+            with document_model.begin_drag_session(other_display_item):
+                display_item.graphics[0].position = 0, 0
+                document_model.recompute_all()
+                self.assertTrue(numpy.array_equal(pick_data_item.data, d[0, 0, :]))
+                display_item.graphics[0].position = 0.5, 0.5
+                document_model.recompute_all()
+                self.assertTrue(numpy.array_equal(pick_data_item.data, d[4, 4, :]))
+
     # solve problem of where to create new elements (same library), generally shouldn't create data items for now?
     # way to configure display for new data items?
     # splitting complex and reconstructing complex does so efficiently (i.e. one recompute for each change at each step)
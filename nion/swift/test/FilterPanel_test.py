@@ -13,6 +13,7 @@ from nion.swift import FilterPanel
 from nion.swift.model import DataItem
 from nion.swift.model import DocumentModel
 from nion.ui import TestUI
+from nion.utils import ListModel
 
 
 class TestFilterPanelClass(unittest.TestCase):
@@ -69,6 +70,44 @@ class TestFilterPanelClass(unittest.TestCase):
             self.assertEqual(1, len(display_items))
             self.assertEqual(data_item1, display_items[0].data_item)
 
+    def test_filter_index_tracks_changes_and_refines_queries(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            filter_index = document_model.display_item_filter_index
+            data_items = list()
+            for title in ("Spectrum Alpha", "Image Beta", "spectrum gamma"):
+                data_item = DataItem.DataItem(numpy.zeros((4, 4)))
+                data_item.title = title
+                document_model.append_data_item(data_item)
+                data_items.append(data_item)
+            display_items = [document_model.get_display_item_for_data_item(data_item) for data_item in data_items]
+            self.assertEqual({display_items[0], display_items[2]}, filter_index.find_text("spec"))
+            self.assertEqual({display_items[0]}, filter_index.find_text("spectrum al"))
+            # changing a title updates the index and the cached results
+            data_items[1].title = "Spectrum Delta"
+            self.assertEqual({display_items[0], display_items[1], display_items[2]}, filter_index.find_text("spec"))
+            self.assertEqual({display_items[0]}, filter_index.find_text("spectrum al"))
+            document_model.remove_data_item(data_items[0])
+            self.assertEqual({display_items[1], display_items[2]}, filter_index.find_text("spec"))
+            self.assertEqual(set(), filter_index.find_text("spectrum al"))
+
+    def test_filter_index_date_filter_matches_partial_dates(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            filter_index = document_model.display_item_filter_index
+            for i in range(3):
+                document_model.append_data_item(DataItem.DataItem(numpy.zeros((4, 4))))
+            display_items = document_model.display_items
+            created_local = display_items[0].created_local
+            self.assertIn(display_items[0], filter_index.find_date(created_local.year))
+            self.assertIn(display_items[0], filter_index.find_date(created_local.year, created_local.month))
+            self.assertIn(display_items[0], filter_index.find_date(created_local.year, created_local.month, created_local.day))
+            self.assertEqual(set(), filter_index.find_date(created_local.year - 1))
+            for year, month, day in ((created_local.year, None, None), (created_local.year, created_local.month, None), (created_local.year - 1, 12, 31)):
+                date_filter = ListModel.PartialDateFilter("created_local", year, month, day)
+                expected = {display_item for display_item in display_items if date_filter.matches(display_item)}
+                self.assertEqual(expected, filter_index.find_date(year, month, day))
+
 
 if __name__ == '__main__':
     logging.getLogger().setLevel(logging.DEBUG)
@@ -14,6 +14,7 @@ from nion.swift.model import DocumentModel
 from nion.swift.model import HardwareSource
 from nion.swift.model import ImportExportManager
 from nion.swift.model import Profile
+from nion.swift.model import Tracing
 from nion.swift.model import Utility
 from nion.swift import Application
 from nion.swift import DocumentController
@@ -1131,5 +1132,28 @@ class TestHardwareSourceClass(unittest.TestCase):
                 Utility.local_utcoffset_override = None
 
 
+    def test_tracing_follows_acquired_frame_to_display_values(self):
+        document_controller, document_model, hardware_source = self.__setup_simple_hardware_source()
+        with contextlib.closing(document_controller):
+            Tracing.enable()
+            try:
+                self.__acquire_one(document_controller, hardware_source)
+                data_item = document_model.data_items[0]
+                display_values = document_model.get_display_item_for_data_item(data_item).display_data_channel.get_calculated_display_values(True)
+                display_values.prepare()
+                trace_events = Tracing.get_trace_events()["traceEvents"]
+            finally:
+                Tracing.disable()
+        spans = {trace_event["name"]: trace_event for trace_event in trace_events if trace_event["ph"] == "X"}
+        self.assertIn("acquire", spans)
+        frame = spans["data item update"]["args"]["frame"]
+        self.assertEqual(str(data_item.uuid), spans["data item update"]["args"]["data_item"])
+        self.assertEqual(spans["data item update"]["args"]["next_frame"], spans["display values"]["args"]["frame"])
+        self.assertIn(frame, [trace_event["args"].get("frame") for trace_event in trace_events if trace_event["name"] == "data channel update"])
+        # the flow of the frame ends at the display values.
+        flow_ends = [trace_event for trace_event in trace_events if trace_event.get("cat") == "frame" and trace_event["ph"] == "f"]
+        self.assertIn(spans["display values"]["ts"], [trace_event["ts"] for trace_event in flow_ends])
+        self.assertIsInstance(Tracing.span("name", "category"), Tracing.NullSpan)
+
 if __name__ == '__main__':
     unittest.main()
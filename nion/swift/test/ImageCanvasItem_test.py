@@ -13,6 +13,7 @@ from nion.swift import Application
 from nion.swift import DocumentController
 from nion.swift import Panel
 from nion.swift.model import DataItem
+from nion.swift.model import DisplayItem
 from nion.swift.model import DocumentModel
 from nion.swift.model import Graphics
 from nion.ui import TestUI
@@ -267,6 +268,43 @@ class TestImageCanvasItemClass(unittest.TestCase):
             document_controller.tool_mode = "hand"
             display_panel.display_canvas_item.simulate_press((100,125))
 
+    def test_large_image_displays_reduced_tiles_covering_visible_area(self):
+        document_model = DocumentModel.DocumentModel()
+        document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
+        with contextlib.closing(document_controller):
+            display_panel = document_controller.selected_display_panel
+            data_item = DataItem.DataItem(numpy.random.randn(1600, 1200).astype(numpy.float32))
+            document_model.append_data_item(data_item)
+            display_item = document_model.get_display_item_for_data_item(data_item)
+            display_panel.set_display_panel_display_item(display_item)
+            header_height = display_panel.header_canvas_item.header_height
+            display_panel.root_container.layout_immediate((200 + header_height, 200))
+            image_canvas_item = display_panel.display_canvas_item
+            image_canvas_item.pyramid_pixel_threshold = 1000 * 1000
+            image_canvas_item.prepare_display()
+            tiles = image_canvas_item._tiled_bitmap_canvas_item.tiles
+            self.assertIsNone(image_canvas_item._bitmap_canvas_item.rgba_bitmap_data)
+            self.assertIsNone(image_canvas_item._bitmap_canvas_item.data)
+            # 1600 rows displayed in 200 pixels uses the coarsest level, which fits into a single tile
+            self.assertEqual(len(tiles), 1)
+            self.assertEqual(tiles[0][0].shape, (400, 300))
+            # zoom in and verify that only the visible tiles of the full resolution level are used
+            image_canvas_item.set_one_to_one_mode()
+            display_panel.root_container.layout_immediate((200 + header_height, 200))
+            image_canvas_item.prepare_display()
+            tiles = image_canvas_item._tiled_bitmap_canvas_item.tiles
+            # the visible rows 700-900 and columns 500-700 are covered by two of the twelve full resolution tiles
+            self.assertEqual(len(tiles), 2)
+            self.assertEqual(tiles[0][0].shape, (512, 512))
+            self.assertEqual(tiles[1][0].shape, (512, 512))
+
+    def test_reduced_display_data_averages_blocks_and_covers_odd_sizes(self):
+        data = numpy.arange(15, dtype=numpy.float32).reshape(3, 5)
+        reduced = DisplayItem.reduce_display_data(data)
+        self.assertEqual(reduced.shape, (2, 3))
+        self.assertAlmostEqual(reduced[0, 0], numpy.mean(data[0:2, 0:2]))
+        self.assertAlmostEqual(reduced[1, 2], data[2, 4])
+
 
 if __name__ == '__main__':
     logging.getLogger().setLevel(logging.DEBUG)
@@ -5,6 +5,8 @@ import datetime
 import json
 import logging
 import os
+import tempfile
+import threading
 import unittest
 import uuid
 
@@ -91,6 +93,29 @@ class TestImportExportManagerClass(unittest.TestCase):
             finally:
                 os.remove(file_path)
 
+    def test_writers_stream_data_in_chunks_and_write_same_data(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model), tempfile.TemporaryDirectory() as directory:
+            data = numpy.random.randn(40, 8)
+            data_item = DataItem.DataItem(data)
+            document_model.append_data_item(data_item)
+            display_item = document_model.get_display_item_for_data_item(data_item)
+            export_chunk_nbytes = ImportExportManager.export_chunk_nbytes
+            ImportExportManager.export_chunk_nbytes = 100  # several rows at a time
+            try:
+                for handler, extension in ((ImportExportManager.NDataImportExportHandler("ndata1-io-handler", "ndata", ["ndata"]), "ndata"),
+                                           (ImportExportManager.NumPyImportExportHandler("numpy-io-handler", "npy", ["npy"]), "npy"),
+                                           (ImportExportManager.CSVImportExportHandler("csv-io-handler", "csv", ["csv"]), "csv")):
+                    file_path = os.path.join(directory, "file." + extension)
+                    handler.write_display_item(None, display_item, file_path, extension)
+                    if extension == "csv":
+                        read_data = numpy.loadtxt(file_path, delimiter=",")
+                    else:
+                        read_data = handler.read_data_items(None, extension, file_path)[0].data
+                    self.assertTrue(numpy.array_equal(data, read_data))
+            finally:
+                ImportExportManager.export_chunk_nbytes = export_chunk_nbytes
+
     def test_npy_write_to_then_read_from_temp_file(self):
         document_model = DocumentModel.DocumentModel()
         with contextlib.closing(document_model):
@@ -109,6 +134,22 @@ class TestImportExportManagerClass(unittest.TestCase):
                 os.remove(file_path_npy)
                 os.remove(file_path_json)
 
+    def test_bulk_read_returns_data_items_in_path_order_and_stops_when_cancelled(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_paths = list()
+            for i in range(6):
+                file_path = os.path.join(directory, f"file{i}.npy")
+                numpy.save(file_path, numpy.zeros((i + 1, 4)))
+                file_paths.append(file_path)
+            file_paths.append(os.path.join(directory, "missing.npy"))
+            progress = list()
+            data_items = ImportExportManager.ImportExportManager().read_data_items_bulk(None, file_paths, progress_fn=lambda file_path, file_count, count: progress.append((file_count, count)), max_workers=3)
+            self.assertEqual([(i + 1, 4) for i in range(6)], [data_item.data_shape for data_item in data_items])
+            self.assertEqual([(i + 1, 7) for i in range(7)], progress)
+            cancel_event = threading.Event()
+            cancel_event.set()
+            self.assertEqual(list(), ImportExportManager.ImportExportManager().read_data_items_bulk(None, file_paths, cancel_event=cancel_event))
+
     def test_get_writers_for_empty_data_item_returns_valid_list(self):
         data_item = DataItem.DataItem()
         writers = ImportExportManager.ImportExportManager().get_writers_for_data_item(data_item)
@@ -11,6 +11,7 @@ import numpy
 
 # local imports
 from nion.data import Calibration
+from nion.data import DataAndMetadata
 from nion.swift import Application
 from nion.swift import DocumentController
 from nion.swift import Facade
@@ -1177,6 +1178,48 @@ class TestInspectorClass(unittest.TestCase):
             self.assertEqual("image", display_item.display_type)
 
 
+    def test_inspector_keeps_sections_which_still_apply_when_selection_or_shape_changes(self):
+        document_model = DocumentModel.DocumentModel()
+        document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
+        with contextlib.closing(document_controller):
+            display_panel = document_controller.selected_display_panel
+            data_item = DataItem.DataItem(numpy.zeros((16, 16)))
+            document_model.append_data_item(data_item)
+            display_item = document_model.get_display_item_for_data_item(data_item)
+            display_item.add_graphic(Graphics.PointGraphic())
+            display_item.add_graphic(Graphics.RectangleGraphic())
+            display_panel.set_display_panel_display_item(display_item)
+            inspector_panel = document_controller.find_dock_widget("inspector-panel").panel
+            document_controller.periodic()
+            info_section = inspector_panel._get_inspector_sections()[3]
+            self.assertIsInstance(info_section, Inspector.InfoInspectorSection)
+            # changing the shape only adds the sequence section
+            data_item.set_data_and_metadata(DataAndMetadata.new_data_and_metadata(numpy.zeros((4, 16, 16)), data_descriptor=DataAndMetadata.DataDescriptor(True, 0, 2)))
+            document_controller.periodic()
+            inspector_sections = inspector_panel._get_inspector_sections()
+            self.assertIs(info_section, inspector_sections[3])
+            self.assertIn(Inspector.SequenceInspectorSection, [type(inspector_section) for inspector_section in inspector_sections])
+            # changing the selected graphic keeps the selected graphics section and updates its list
+            display_item.graphic_selection.set(0)
+            document_controller.periodic()
+            graphics_section = inspector_panel._get_inspector_sections()[3]
+            self.assertIsInstance(graphics_section, Inspector.GraphicsInspectorSection)
+            selected_graphics_binding = Inspector.SelectedGraphicsListBinding(display_item)
+            with contextlib.closing(selected_graphics_binding):
+                changes = list()
+                selected_graphics_binding.inserter = lambda item, before_index: changes.append(("insert", item, before_index))
+                selected_graphics_binding.remover = lambda index: changes.append(("remove", index))
+                display_item.graphic_selection.add(1)
+                document_controller.periodic()
+                self.assertIs(graphics_section, inspector_panel._get_inspector_sections()[3])
+                self.assertEqual([("insert", display_item.graphics[1], 1)], changes)
+                changes.clear()
+                display_item.graphic_selection.set(1)
+                document_controller.periodic()
+                self.assertIs(graphics_section, inspector_panel._get_inspector_sections()[3])
+                self.assertEqual([("remove", 0)], changes)
+                self.assertEqual([display_item.graphics[1]], selected_graphics_binding.items)
+
 if __name__ == '__main__':
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
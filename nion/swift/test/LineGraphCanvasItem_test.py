@@ -13,6 +13,7 @@ from nion.data import DataAndMetadata
 from nion.swift import Application
 from nion.swift import DocumentController
 from nion.swift import LineGraphCanvasItem
+from nion.swift import LinePlotCanvasItem
 from nion.swift.model import DataItem
 from nion.swift.model import DisplayItem
 from nion.swift.model import DocumentModel
@@ -194,6 +195,41 @@ class TestLineGraphCanvasItem(unittest.TestCase):
             self.assertAlmostEqual(axes.uncalibrated_data_min, 0.0)
             self.assertAlmostEqual(axes.uncalibrated_data_max, 80.0)
 
+    def test_line_plot_does_not_update_unchanged_layers_or_axes_when_one_layer_changes(self):
+        document_model = DocumentModel.DocumentModel()
+        with contextlib.closing(document_model):
+            data_item = DataItem.DataItem(numpy.linspace(0, 75, 100))
+            static_data_item = DataItem.DataItem(numpy.linspace(75, 0, 100))
+            document_model.append_data_item(data_item)
+            document_model.append_data_item(static_data_item)
+            display_item = document_model.get_display_item_for_data_item(data_item)
+            display_item.append_display_data_channel_for_data_item(static_data_item)
+            line_plot_canvas_item = LinePlotCanvasItem.LinePlotCanvasItem(self.app.ui.get_font_metrics, None, None)
+            with contextlib.closing(line_plot_canvas_item):
+
+                def update_display() -> None:
+                    display_values_list = [display_data_channel.get_calculated_display_values() for display_data_channel in display_item.display_data_channels]
+                    line_plot_canvas_item.update_display_values(display_values_list)
+                    line_plot_canvas_item.update_display_properties(DisplayItem.DisplayCalibrationInfo(display_item), display_item.display_properties, display_item.display_layers)
+                    line_plot_canvas_item.layout_immediate((640, 480))
+
+                update_display()
+                axes = line_plot_canvas_item._axes
+                self.assertAlmostEqual(axes.calibrated_data_max, 80.0)
+                # layers are drawn back to front; the last layer canvas item draws the first layer.
+                line_graph_canvas_items = line_plot_canvas_item.line_graph_stack.canvas_items[:2]
+                update_counts = [line_graph_canvas_item._update_count for line_graph_canvas_item in line_graph_canvas_items]
+                # change the data of the first layer within the same range; only its layer is updated.
+                data_item.set_data(numpy.linspace(75, 0, 100))
+                update_display()
+                self.assertEqual(update_counts[0], line_graph_canvas_items[0]._update_count)
+                self.assertLess(update_counts[1], line_graph_canvas_items[1]._update_count)
+                self.assertIs(axes.y_ticker, line_plot_canvas_item._axes.y_ticker)
+                # change the range of the data; the axes are recalculated.
+                data_item.set_data(numpy.linspace(0, 150, 100))
+                update_display()
+                self.assertAlmostEqual(line_plot_canvas_item._axes.calibrated_data_max, 150.0)
+
     def test_line_plot_with_no_data_displays_gracefully(self):
         document_model = DocumentModel.DocumentModel()
         document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
@@ -0,0 +1,100 @@
+# standard libraries
+import contextlib
+import logging
+import time
+import unittest
+
+# third party libraries
+# None
+
+# local libraries
+from nion.swift import Application
+from nion.swift import DocumentController
+from nion.swift.model import DocumentModel
+from nion.swift.model import StallDetector
+from nion.ui import TestUI
+
+
+class TestStallDetectorClass(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Application.Application(TestUI.UserInterface(), set_global=False)
+
+    def tearDown(self):
+        pass
+
+    def test_stall_longer_than_threshold_is_recorded_with_activity_and_stack_samples(self):
+        stall_detector = StallDetector.StallDetector(threshold=0.05, sample_interval=0.01)
+        stall_detector.start()
+        try:
+            stall_detector.beat()
+            with stall_detector.activity("periodic"):
+                with stall_detector.activity("quick"):
+                    pass
+                with stall_detector.activity("slow"):
+                    time.sleep(0.2)
+            stall_detector.beat()
+            with stall_detector.activity("periodic"):
+                pass
+            stall_detector.beat()
+        finally:
+            stall_detector.close()
+        stalls = stall_detector.stalls
+        self.assertEqual(1, len(stalls))
+        self.assertEqual("periodic/slow", stalls[0].activity)
+        self.assertGreaterEqual(stalls[0].duration, 0.2)
+        self.assertTrue(stalls[0].samples)
+        for (activity, stack_text), count in stalls[0].samples.items():
+            self.assertEqual("periodic/slow", activity)
+            self.assertIn("test_stall_longer_than_threshold_is_recorded_with_activity_and_stack_samples", stack_text)
+        self.assertIn("periodic/slow: 1 stalls", stall_detector.report())
+
+    def test_stall_without_activity_is_detected_from_missing_beats(self):
+        stall_detector = StallDetector.StallDetector(threshold=0.05, sample_interval=0.01)
+        stall_detector.start()
+        try:
+            stall_detector.beat()
+            time.sleep(0.01)
+            stall_detector.beat()
+            time.sleep(0.2)  # e.g. a slow event handler, outside of any activity
+            stall_detector.beat()
+        finally:
+            stall_detector.close()
+        stalls = stall_detector.stalls
+        self.assertEqual(1, len(stalls))
+        self.assertEqual(str(), stalls[0].activity)
+        self.assertGreaterEqual(stalls[0].duration, 0.2)
+        self.assertTrue(stalls[0].samples)
+        for (activity, stack_text), count in stalls[0].samples.items():
+            self.assertIn("test_stall_without_activity_is_detected_from_missing_beats", stack_text)
+
+    def test_document_controller_periodic_reports_stalling_periodic_listener(self):
+        class App:
+            def __init__(self):
+                self.stall_detector = StallDetector.StallDetector(threshold=0.02)
+
+            def periodic(self):
+                self.stall_detector.beat()
+
+        def stalling_listener():
+            time.sleep(0.05)
+
+        app = App()
+        document_model = DocumentModel.DocumentModel()
+        document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
+        document_controller.app = app
+        with contextlib.closing(document_controller):
+            listener = document_controller.add_periodic(0, stalling_listener)
+            document_controller.periodic()
+            document_controller.app = None
+            listener.close()
+        stalls = app.stall_detector.stalls
+        self.assertEqual(1, len(stalls))
+        self.assertIn("periodic listener:", stalls[0].activity)
+        self.assertIn("stalling_listener", stalls[0].activity)
+        self.assertTrue(stalls[0].activity.startswith("periodic/"))
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
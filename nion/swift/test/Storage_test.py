@@ -9,15 +9,18 @@ import os
 import pathlib
 import shutil
 import threading
+import time
 import typing
 import unittest
 import uuid
 
 # third party libraries
+import h5py
 import numpy
 
 # local libraries
 from nion.data import Calibration
+from nion.data import DataAndMetadata
 from nion.swift import Application
 from nion.swift import ComputationPanel
 from nion.swift import DisplayPanel
@@ -31,6 +34,8 @@ from nion.swift.model import DataItem
 from nion.swift.model import DocumentModel
 from nion.swift.model import FileStorageSystem
 from nion.swift.model import Graphics
+from nion.swift.model import HDF5Handler
+from nion.swift.model import Migration
 from nion.swift.model import Persistence
 from nion.swift.model import Profile
 from nion.swift.model import Symbolic
@@ -845,6 +850,170 @@ class TestStorageClass(unittest.TestCase):
             with contextlib.closing(document_model):
                 self.assertTrue(numpy.array_equal(document_model.data_items[0].data, zeros))
 
+    def test_large_format_data_is_chunked_along_datums_and_compressed(self):
+        with create_temp_profile_context() as profile_context:
+            data = numpy.zeros((6, 5, 16, 16), numpy.float32)
+            data[2, 3, 4, 5] = 1.0
+            compression = HDF5Handler.HDF5Handler.compression
+            chunk_nbytes = HDF5Handler.HDF5Handler.chunk_nbytes
+            HDF5Handler.HDF5Handler.compression = "gzip"
+            HDF5Handler.HDF5Handler.chunk_nbytes = 4096  # four 1024 byte datums
+            try:
+                document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+                with contextlib.closing(document_model):
+                    data_item = DataItem.DataItem(large_format=True)
+                    document_model.append_data_item(data_item)
+                    data_item.set_xdata(DataAndMetadata.new_data_and_metadata(data, data_descriptor=DataAndMetadata.DataDescriptor(False, 2, 2)))
+                    file_path = data_item._test_get_file_path()
+            finally:
+                HDF5Handler.HDF5Handler.compression = compression
+                HDF5Handler.HDF5Handler.chunk_nbytes = chunk_nbytes
+            with h5py.File(file_path, "r") as f:
+                self.assertEqual((1, 4, 16, 16), f["data"].chunks)
+                self.assertEqual("gzip", f["data"].compression)
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            with contextlib.closing(document_model):
+                self.assertTrue(numpy.array_equal(document_model.data_items[0].data, data))
+
+    def test_large_format_files_are_closed_least_recently_used_first_and_reopened_when_read(self):
+        with create_temp_profile_context() as profile_context:
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            with contextlib.closing(document_model):
+                for i in range(5):
+                    data_item = DataItem.DataItem(numpy.full((8, 8), i, numpy.uint32), large_format=True)
+                    document_model.append_data_item(data_item)
+            handle_pool = HDF5Handler.HDF5Handler.handle_pool
+            max_open_files = handle_pool.max_open_files
+            handle_pool.max_open_files = 2
+            try:
+                document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+                with contextlib.closing(document_model):
+                    self.assertLessEqual(handle_pool.open_count, 2)
+                    values = set()
+                    for data_item in document_model.data_items:
+                        with data_item.data_ref() as data_ref:
+                            values.add(int(data_ref.data[7, 7]))
+                        self.assertLessEqual(handle_pool.open_count, 2)
+                    self.assertEqual({0, 1, 2, 3, 4}, values)
+            finally:
+                handle_pool.max_open_files = max_open_files
+
+    def test_large_format_file_is_readable_while_data_is_being_written(self):
+        started_event = threading.Event()
+        release_event = threading.Event()
+
+        class SlowData:
+            shape = (4, 8, 8)
+            dtype = numpy.dtype(numpy.float32)
+
+            def __getitem__(self, key):
+                started_event.set()
+                release_event.wait(5.0)
+                return numpy.ones(self.shape, self.dtype)[key]
+
+        with create_temp_profile_context() as profile_context:
+            handler = HDF5Handler.HDF5Handler.make(profile_context.projects_dir / "slow")
+            try:
+                handler.write_properties({"title": "slow"}, datetime.datetime.now())
+                handler.write_data(numpy.zeros((4, 8, 8), numpy.float32), datetime.datetime.now())
+                thread = threading.Thread(target=handler.write_data, args=(SlowData(), datetime.datetime.now()))
+                thread.start()
+                try:
+                    self.assertTrue(started_event.wait(5.0))
+                    start_time = time.perf_counter()
+                    self.assertEqual("slow", handler.read_properties()["title"])
+                    self.assertEqual((4, 8, 8), handler.read_data().shape)
+                    self.assertLess(time.perf_counter() - start_time, 1.0)
+                finally:
+                    release_event.set()
+                    thread.join()
+                self.assertTrue(numpy.array_equal(handler.read_data(), numpy.ones((4, 8, 8))))
+            finally:
+                handler.close()
+
+    def test_large_format_close_waits_for_write_in_progress(self):
+        started_event = threading.Event()
+        release_event = threading.Event()
+
+        class SlowData:
+            shape = (4, 8, 8)
+            dtype = numpy.dtype(numpy.float32)
+
+            def __getitem__(self, key):
+                started_event.set()
+                release_event.wait(5.0)
+                return numpy.ones(self.shape, self.dtype)[key]
+
+        with create_temp_profile_context() as profile_context:
+            handler = HDF5Handler.HDF5Handler.make(profile_context.projects_dir / "slow")
+            handler.write_properties({"title": "slow"}, datetime.datetime.now())
+            exceptions = list()
+
+            def write_data():
+                try:
+                    handler.write_data(SlowData(), datetime.datetime.now())
+                except Exception as e:
+                    exceptions.append(e)
+
+            thread = threading.Thread(target=write_data)
+            thread.start()
+            try:
+                self.assertTrue(started_event.wait(5.0))
+                close_thread = threading.Thread(target=handler.close)
+                close_thread.start()
+                close_thread.join(0.1)
+                # the file stays open until the write is done.
+                self.assertTrue(close_thread.is_alive())
+            finally:
+                release_event.set()
+                thread.join()
+            close_thread.join()
+            self.assertEqual(list(), exceptions)
+            self.assertFalse(HDF5Handler.HDF5Handler.handle_pool.is_open(handler.reference))
+            try:
+                self.assertTrue(numpy.array_equal(handler.read_data(), numpy.ones((4, 8, 8))))
+            finally:
+                handler.close()
+
+    def test_large_format_properties_in_sidecar_do_not_modify_data_file(self):
+        with create_temp_profile_context() as profile_context:
+            properties_in_sidecar = HDF5Handler.HDF5Handler.properties_in_sidecar
+            HDF5Handler.HDF5Handler.properties_in_sidecar = True
+            try:
+                document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+                with contextlib.closing(document_model):
+                    data_item = DataItem.DataItem(numpy.ones((8, 8), numpy.uint32), large_format=True)
+                    document_model.append_data_item(data_item)
+                    file_path = pathlib.Path(data_item._test_get_file_path())
+                    properties_path = HDF5Handler.HDF5Handler.get_properties_path(file_path)
+                    self.assertTrue(properties_path.exists())
+                    HDF5Handler.HDF5Handler.handle_pool.close(str(file_path))
+                    file_bytes = file_path.read_bytes()
+                    data_item.title = "sidecar"
+                    data_item.set_intensity_calibration(Calibration.Calibration(units="e"))
+                    self.assertEqual(file_bytes, file_path.read_bytes())
+                    self.assertEqual("sidecar", json.loads(properties_path.read_text())["title"])
+                    # removing the item moves the sidecar to the trash with the data file; restoring moves it back.
+                    data_item_uuid = data_item.uuid
+                    document_model.remove_data_item(data_item, safe=True)
+                    self.assertFalse(properties_path.exists())
+                    document_model.restore_data_item(document_model.profile.projects[0], data_item_uuid)
+                    self.assertTrue(properties_path.exists())
+                document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+                with contextlib.closing(document_model):
+                    self.assertEqual("sidecar", document_model.data_items[0].title)
+                    self.assertEqual("e", document_model.data_items[0].intensity_calibration.units)
+            finally:
+                HDF5Handler.HDF5Handler.properties_in_sidecar = properties_in_sidecar
+            # writing the properties to the data file removes the sidecar.
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            with contextlib.closing(document_model):
+                document_model.data_items[0].title = "data file"
+                self.assertFalse(properties_path.exists())
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            with contextlib.closing(document_model):
+                self.assertEqual("data file", document_model.data_items[0].title)
+
     def test_writing_empty_data_item_returns_expected_values(self):
         with create_temp_profile_context() as profile_context:
             document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
@@ -1253,11 +1422,106 @@ class TestStorageClass(unittest.TestCase):
             with contextlib.closing(document_model):
                 data_item = DataItem.DataItem(data=numpy.zeros((32, 32)))
                 document_model.append_data_item(data_item)
+                project_storage_system = document_model.profile.projects[0].project_storage_system
+                project_storage_system.flush_data()  # data is written in the background
                 data_file_path = data_item._test_get_file_path()
                 file_size = os.path.getsize(data_file_path)
                 data_item.set_data(numpy.zeros((16, 16)))
+                project_storage_system.flush_data()
                 self.assertLess(os.path.getsize(data_file_path), file_size)
 
+    def test_data_writes_are_coalesced_and_durable_after_close(self):
+        with create_temp_profile_context() as profile_context:
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            with contextlib.closing(document_model):
+                data_item = DataItem.DataItem(data=numpy.zeros((32, 32)))
+                document_model.append_data_item(data_item)
+                write_count = 0
+                storage_handler_class = type(document_model.profile.projects[0].project_storage_system._data_properties_map[data_item.uuid].storage_handler)
+                original_write_data = storage_handler_class.write_data
+
+                def write_data(storage_handler, data, file_datetime):
+                    nonlocal write_count
+                    write_count += 1
+                    time.sleep(0.01)
+                    original_write_data(storage_handler, data, file_datetime)
+
+                storage_handler_class.write_data = write_data
+                try:
+                    for i in range(20):
+                        data_item.set_data(numpy.full((32, 32), i))
+                    # reading back before the write finishes returns the latest data
+                    self.assertEqual(19, document_model.profile.projects[0].project_storage_system.read_external_data(data_item, "data")[0, 0])
+                finally:
+                    document_model.profile.projects[0].project_storage_system.flush_data()
+                    storage_handler_class.write_data = original_write_data
+                self.assertLess(write_count, 20)
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            with contextlib.closing(document_model):
+                self.assertTrue(numpy.array_equal(numpy.full((32, 32), 19), document_model.data_items[0].data))
+
+    def test_failed_data_write_keeps_latest_data_and_is_raised_from_flush(self):
+        with create_temp_profile_context() as profile_context:
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            with contextlib.closing(document_model):
+                data_item = DataItem.DataItem(data=numpy.zeros((32, 32)))
+                document_model.append_data_item(data_item)
+                project_storage_system = document_model.profile.projects[0].project_storage_system
+                project_storage_system.flush_data()
+                storage_handler_class = type(project_storage_system._data_properties_map[data_item.uuid].storage_handler)
+                original_write_data = storage_handler_class.write_data
+                write_count = 0
+
+                def write_data(storage_handler, data, file_datetime):
+                    nonlocal write_count
+                    write_count += 1
+                    raise IOError("disk full")
+
+                storage_handler_class.write_data = write_data
+                try:
+                    data_item.set_data(numpy.full((32, 32), 5))
+                    with self.assertRaises(IOError):
+                        project_storage_system.flush_data()
+                    # the failed write was retried in the background and again by flush.
+                    self.assertEqual(3, write_count)
+                    # the latest data is still read, not the stale stored data.
+                    self.assertEqual(5, project_storage_system.read_external_data(data_item, "data")[0, 0])
+                finally:
+                    storage_handler_class.write_data = original_write_data
+                # once the storage works again, flush writes the data.
+                project_storage_system.flush_data()
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            with contextlib.closing(document_model):
+                self.assertTrue(numpy.array_equal(numpy.full((32, 32), 5), document_model.data_items[0].data))
+
+    def test_data_write_is_not_affected_by_modifying_array_after_queueing(self):
+        data_writer = FileStorageSystem.DataWriter("test-data-writer")
+        written = list()
+        release_event = threading.Event()
+
+        def write_fn(data):
+            release_event.wait(5.0)
+            written.append(numpy.copy(data))
+
+        data = numpy.zeros((8, 8))
+        data_writer.queue_write("key", data, write_fn)
+        data[0:4, :] = 1  # a partial update in place, as during acquisition
+        release_event.set()
+        data_writer.flush()
+        self.assertTrue(numpy.array_equal(numpy.zeros((8, 8)), written[0]))
+
+    def test_undeleted_data_item_has_data_written_before_removal(self):
+        with create_temp_profile_context() as profile_context:
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            with contextlib.closing(document_model):
+                data_item = DataItem.DataItem(data=numpy.zeros((32, 32)))
+                document_model.append_data_item(data_item)
+                document_model.profile.projects[0].project_storage_system.flush_data()
+                data_item.set_data(numpy.full((32, 32), 3))
+                with contextlib.closing(document_model.remove_data_item_with_log(data_item, safe=True)) as undelete_log:
+                    document_model.undelete_all(undelete_log)
+                self.assertTrue(numpy.array_equal(numpy.full((32, 32), 3), document_model.data_items[0].data))
+
     def test_reloaded_display_has_correct_storage_cache(self):
         with create_memory_profile_context() as profile_context:
             document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
@@ -3131,6 +3395,92 @@ class TestStorageClass(unittest.TestCase):
                 self.assertEqual(len(document_model.data_items), 1)
                 self.assertEqual(document_model.data_items[0].uuid, uuid.UUID(data_item_dict["uuid"]))
 
+    def test_auto_migrate_reads_headers_and_skips_stages_with_no_new_data_items(self):
+        with create_temp_profile_context() as profile_context:
+            # construct workspace with the same data item in two migration stages
+            library_path = profile_context.projects_dir / "Nion Swift Workspace.nslib"
+            with library_path.open("w") as fp:
+                json.dump({}, fp)
+            data_item_dict = dict()
+            data_item_dict["uuid"] = str(uuid.uuid4())
+            data_item_dict["version"] = 9
+            data_item_dict["title"] = "Title"
+            data_source_dict = dict()
+            data_source_dict["uuid"] = str(uuid.uuid4())
+            data_source_dict["type"] = "buffered-data-source"
+            data_source_dict["displays"] = [{"uuid": str(uuid.uuid4())}]
+            data_source_dict["data_dtype"] = str(numpy.dtype(numpy.uint32))
+            data_source_dict["data_shape"] = (8, 8)
+            data_item_dict["data_sources"] = [data_source_dict]
+            file_handler = profile_context._file_handlers[0]
+            for data_path in (profile_context.projects_dir / "Nion Swift Data 10", profile_context.projects_dir / "Nion Swift Data"):
+                handler = file_handler(pathlib.Path(data_path, "File").with_suffix(file_handler.get_extension()))
+                with contextlib.closing(handler):
+                    handler.write_properties(copy.deepcopy(data_item_dict), datetime.datetime.utcnow())
+                    handler.write_data(numpy.zeros((8,8)), datetime.datetime.utcnow())
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            with contextlib.closing(document_model):
+                project = document_model.profile.projects[0]
+                headers = project.read_migration_headers()
+                self.assertEqual(1, len(headers))
+                self.assertEqual(data_item_dict["uuid"], headers[0]["uuid"])
+                self.assertEqual("Title", headers[0]["title"])
+                self.assertEqual((8, 8), headers[0]["data_shape"])
+                migrated_stages = list()
+                migrate_to_latest = Migration.migrate_to_latest
+
+                def migrate_stage_to_latest(reader_info_list, library_updates):
+                    migrated_stages.append(len(reader_info_list))
+                    migrate_to_latest(reader_info_list, library_updates)
+
+                progress = list()
+                Migration.migrate_to_latest = migrate_stage_to_latest
+                try:
+                    project.project_storage_system.migrate_to_latest(progress_fn=lambda index, count: progress.append((index, count)))
+                finally:
+                    Migration.migrate_to_latest = migrate_to_latest
+                self.assertEqual([1], migrated_stages)
+                self.assertEqual((2, 2), progress[-1])
+
+    def test_upgrade_project_lists_items_and_reports_progress_in_task(self):
+        with create_temp_profile_context() as profile_context:
+            library_path = profile_context.projects_dir / "Nion Swift Workspace.nslib"
+            with library_path.open("w") as fp:
+                json.dump({}, fp)
+            data_item_dict = dict()
+            data_item_dict["uuid"] = str(uuid.uuid4())
+            data_item_dict["version"] = 9
+            data_item_dict["title"] = "Title"
+            data_source_dict = dict()
+            data_source_dict["uuid"] = str(uuid.uuid4())
+            data_source_dict["type"] = "buffered-data-source"
+            data_source_dict["displays"] = [{"uuid": str(uuid.uuid4())}]
+            data_source_dict["data_dtype"] = str(numpy.dtype(numpy.uint32))
+            data_source_dict["data_shape"] = (8, 8)
+            data_item_dict["data_sources"] = [data_source_dict]
+            file_handler = profile_context._file_handlers[0]
+            handler = file_handler(pathlib.Path(profile_context.projects_dir / "Nion Swift Data", "File").with_suffix(file_handler.get_extension()))
+            with contextlib.closing(handler):
+                handler.write_properties(copy.deepcopy(data_item_dict), datetime.datetime.utcnow())
+                handler.write_data(numpy.zeros((8,8)), datetime.datetime.utcnow())
+            document_model = DocumentModel.DocumentModel(profile=profile_context.create_profile())
+            document_controller = DocumentController.DocumentController(self.app.ui, document_model, workspace_id="library")
+            with contextlib.closing(document_controller):
+                document_model.profile.open_project(library_path)
+                project = document_model.profile.projects[-1]
+                self.assertTrue(project.needs_upgrade)
+                tasks = list()
+                with contextlib.closing(document_controller.task_created_event.listen(tasks.append)):
+                    document_controller.upgrade_project(project, threaded=False)
+                self.assertEqual(1, len(tasks))
+                self.assertEqual(1, len(tasks[0].task_data["data"]))
+                self.assertEqual("Title", tasks[0].task_data["data"][0][0])
+                self.assertEqual(str((8, 8)), tasks[0].task_data["data"][0][2])
+                self.assertEqual((1, 1), tasks[0].progress)
+                self.assertNotIn(project, document_model.profile.projects)
+                self.assertFalse(document_model.profile.projects[-1].needs_upgrade)
+                self.assertEqual(1, len(document_model.profile.projects[-1].data_items))
+
     def test_auto_migrate_migrates_new_data_items(self):
         with create_temp_profile_context() as profile_context:
             # construct workspace with old file
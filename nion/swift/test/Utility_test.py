@@ -1,6 +1,8 @@
 import json
 import unittest
 
+import numpy
+
 from nion.swift.model import Utility
 
 class TestUtilityClass(unittest.TestCase):
@@ -45,5 +47,20 @@ class TestUtilityClass(unittest.TestCase):
         self.assertEqual(Utility.clean_dict(json.loads(json.dumps(d1))), d3)
 
 
+    def test_clean_json_cache_matches_json_of_clean_dict_and_reuses_unchanged_items(self):
+        item0 = {"uuid": "0", "title": "A\u00e9", "value": numpy.float32(1.5), "none": None, "shape": (2, 3)}
+        item1 = {"uuid": "1", "list": [None, 2, numpy.int64(4), {"a": True}], "nested": {"uuid": "2", "x": 1.25}}
+        d = {"version": 3, "items": [item0, item1], "numbers": {1: "one"}}
+        cache = Utility.CleanJSONCache()
+        self.assertEqual(json.dumps(Utility.clean_dict(d)), cache.dumps(d))
+        # changes to item dicts are only reflected after they are invalidated
+        item0["title"] = "B"
+        self.assertEqual("A\u00e9", json.loads(cache.dumps(d))["items"][0]["title"])
+        cache.invalidate(item0)
+        self.assertEqual(json.dumps(Utility.clean_dict(d)), cache.dumps(d))
+        item1["nested"]["x"] = 2.5
+        cache.invalidate_nested(item1)
+        self.assertEqual(json.dumps(Utility.clean_dict(d)), cache.dumps(d))
+
 if __name__ == '__main__':
     unittest.main()